@@ -0,0 +1,277 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('phone_hash', sa.String(), nullable=True),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'AGENT', 'BORROWER', 'INVESTOR', 'OPERATOR', name='userrole'), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('profile_metadata', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_phone_hash'), 'users', ['phone_hash'], unique=False)
+    op.create_table('organizations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('country', sa.String(), nullable=False),
+    sa.Column('region', sa.String(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.Column('org_type', sa.String(), nullable=True),
+    sa.Column('registration_number', sa.String(), nullable=True),
+    sa.Column('tax_id', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('settings', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_organizations_id'), 'organizations', ['id'], unique=False)
+    op.create_index(op.f('ix_organizations_name'), 'organizations', ['name'], unique=False)
+    op.create_index(op.f('ix_organizations_registration_number'), 'organizations', ['registration_number'], unique=False)
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('actor_type', sa.String(), nullable=False),
+    sa.Column('actor_name', sa.String(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('resource_type', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=True),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('details_json', sa.Text(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('user_agent', sa.String(), nullable=True),
+    sa.Column('request_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_logs_action'), 'audit_logs', ['action'], unique=False)
+    op.create_index(op.f('ix_audit_logs_actor_id'), 'audit_logs', ['actor_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_org_id'), 'audit_logs', ['org_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_request_id'), 'audit_logs', ['request_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_resource_id'), 'audit_logs', ['resource_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_resource_type'), 'audit_logs', ['resource_type'], unique=False)
+    op.create_table('customers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('country', sa.String(), nullable=True),
+    sa.Column('tax_id', sa.String(), nullable=True),
+    sa.Column('registration_number', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_customers_id'), 'customers', ['id'], unique=False)
+    op.create_index(op.f('ix_customers_name'), 'customers', ['name'], unique=False)
+    op.create_index(op.f('ix_customers_org_id'), 'customers', ['org_id'], unique=False)
+    op.create_table('score_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('score', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('score_band', sa.String(), nullable=True),
+    sa.Column('confidence', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('model_type', sa.String(), nullable=False),
+    sa.Column('features_json', sa.Text(), nullable=False),
+    sa.Column('shap_values', sa.Text(), nullable=True),
+    sa.Column('top_features', sa.Text(), nullable=True),
+    sa.Column('valid_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_valid', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_score_cache_entity_id'), 'score_cache', ['entity_id'], unique=False)
+    op.create_index(op.f('ix_score_cache_id'), 'score_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_score_cache_org_id'), 'score_cache', ['org_id'], unique=False)
+    op.create_table('invoices',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('creator_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_number', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('tax_amount', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('amount_paid', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('issued_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payment_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('status', sa.Enum('DRAFT', 'ISSUED', 'PAYMENT_PENDING', 'PARTIALLY_PAID', 'PAID', 'OVERDUE', 'CANCELLED', name='invoicestatus'), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('ocr_extracted', sa.Boolean(), nullable=True),
+    sa.Column('ocr_confidence', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('file_url', sa.String(), nullable=True),
+    sa.Column('file_hash', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_invoices_customer_id'), 'invoices', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_invoices_id'), 'invoices', ['id'], unique=False)
+    op.create_index(op.f('ix_invoices_invoice_number'), 'invoices', ['invoice_number'], unique=True)
+    op.create_index(op.f('ix_invoices_org_id'), 'invoices', ['org_id'], unique=False)
+    op.create_table('attestations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('attestation_type', sa.String(), nullable=False),
+    sa.Column('media_url', sa.String(), nullable=True),
+    sa.Column('file_hash', sa.String(), nullable=False),
+    sa.Column('signature', sa.Text(), nullable=False),
+    sa.Column('signature_algorithm', sa.String(), nullable=True),
+    sa.Column('public_key_id', sa.String(), nullable=True),
+    sa.Column('ipfs_hash', sa.String(), nullable=True),
+    sa.Column('latitude', sa.String(), nullable=True),
+    sa.Column('longitude', sa.String(), nullable=True),
+    sa.Column('location_accuracy', sa.Integer(), nullable=True),
+    sa.Column('device_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('device_metadata', sa.Text(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('verified_by', sa.Integer(), nullable=True),
+    sa.Column('verified_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ),
+    sa.ForeignKeyConstraint(['verified_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_attestations_agent_id'), 'attestations', ['agent_id'], unique=False)
+    op.create_index(op.f('ix_attestations_file_hash'), 'attestations', ['file_hash'], unique=False)
+    op.create_index(op.f('ix_attestations_id'), 'attestations', ['id'], unique=False)
+    op.create_index(op.f('ix_attestations_invoice_id'), 'attestations', ['invoice_id'], unique=False)
+    op.create_index(op.f('ix_attestations_ipfs_hash'), 'attestations', ['ipfs_hash'], unique=False)
+    op.create_table('tranches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('tranche_number', sa.String(), nullable=False),
+    sa.Column('share_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('price', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('pledged_amount', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('funded_amount', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('target_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('expected_return', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('actual_return', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('return_percentage', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('risk_band', sa.String(), nullable=True),
+    sa.Column('risk_score', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('status', sa.Enum('OPEN', 'FUNDING', 'FUNDED', 'ACTIVE', 'REPAYING', 'COMPLETED', 'DEFAULTED', 'CANCELLED', name='tranchestatus'), nullable=False),
+    sa.Column('open_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('funding_deadline', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('funded_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('maturity_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('closed_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('terms', sa.Text(), nullable=True),
+    sa.Column('minimum_investment', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('maximum_investment', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tranches_id'), 'tranches', ['id'], unique=False)
+    op.create_index(op.f('ix_tranches_invoice_id'), 'tranches', ['invoice_id'], unique=False)
+    op.create_index(op.f('ix_tranches_tranche_number'), 'tranches', ['tranche_number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tranches_id'), table_name='tranches')
+    op.drop_index(op.f('ix_tranches_invoice_id'), table_name='tranches')
+    op.drop_index(op.f('ix_tranches_tranche_number'), table_name='tranches')
+    op.drop_table('tranches')
+    op.drop_index(op.f('ix_attestations_agent_id'), table_name='attestations')
+    op.drop_index(op.f('ix_attestations_file_hash'), table_name='attestations')
+    op.drop_index(op.f('ix_attestations_id'), table_name='attestations')
+    op.drop_index(op.f('ix_attestations_invoice_id'), table_name='attestations')
+    op.drop_index(op.f('ix_attestations_ipfs_hash'), table_name='attestations')
+    op.drop_table('attestations')
+    op.drop_index(op.f('ix_invoices_customer_id'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_id'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_invoice_number'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_org_id'), table_name='invoices')
+    op.drop_table('invoices')
+    op.drop_index(op.f('ix_score_cache_entity_id'), table_name='score_cache')
+    op.drop_index(op.f('ix_score_cache_id'), table_name='score_cache')
+    op.drop_index(op.f('ix_score_cache_org_id'), table_name='score_cache')
+    op.drop_table('score_cache')
+    op.drop_index(op.f('ix_customers_id'), table_name='customers')
+    op.drop_index(op.f('ix_customers_name'), table_name='customers')
+    op.drop_index(op.f('ix_customers_org_id'), table_name='customers')
+    op.drop_table('customers')
+    op.drop_index(op.f('ix_audit_logs_action'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_actor_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_created_at'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_org_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_request_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_resource_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_resource_type'), table_name='audit_logs')
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_organizations_id'), table_name='organizations')
+    op.drop_index(op.f('ix_organizations_name'), table_name='organizations')
+    op.drop_index(op.f('ix_organizations_registration_number'), table_name='organizations')
+    op.drop_table('organizations')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_phone_hash'), table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='tranchestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='invoicestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
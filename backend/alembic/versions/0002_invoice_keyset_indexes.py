@@ -0,0 +1,38 @@
+"""Composite indexes for keyset-paginated invoice listing
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and avoids locking a large
+    # invoices table against writes while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_invoices_org_status_due_id', 'invoices',
+            ['org_id', 'status', 'due_date', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_invoices_org_due_id', 'invoices',
+            ['org_id', 'due_date', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_invoices_org_due_id', table_name='invoices', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_invoices_org_status_due_id', table_name='invoices', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,131 @@
+"""Range-partition audit_logs by month on created_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Months of partitions created ahead of now; the housekeeping job keeps
+# extending this (see app.services.audit_retention).
+MONTHS_AHEAD = 3
+
+LEGACY_INDEXES = (
+    'ix_audit_logs_action', 'ix_audit_logs_actor_id', 'ix_audit_logs_created_at',
+    'ix_audit_logs_id', 'ix_audit_logs_org_id', 'ix_audit_logs_request_id',
+    'ix_audit_logs_resource_id', 'ix_audit_logs_resource_type',
+)
+INDEXES = (
+    ('ix_audit_logs_action', ['action']),
+    ('ix_audit_logs_actor_id', ['actor_id']),
+    ('ix_audit_logs_created_at', ['created_at']),
+    ('ix_audit_logs_org_id', ['org_id']),
+    ('ix_audit_logs_request_id', ['request_id']),
+    ('ix_audit_logs_resource_id', ['resource_id']),
+    ('ix_audit_logs_resource_type', ['resource_type']),
+    ('ix_audit_logs_org_created', ['org_id', 'created_at']),
+)
+COLUMNS = (
+    "id, actor_id, actor_type, actor_name, action, resource_type, resource_id, org_id, "
+    "details_json, ip_address, user_agent, request_id, status, error_message, created_at"
+)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    for name in LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+    op.execute("UPDATE audit_logs_legacy SET created_at = now() WHERE created_at IS NULL")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_id INTEGER REFERENCES users (id),
+            actor_type VARCHAR NOT NULL,
+            actor_name VARCHAR,
+            action VARCHAR NOT NULL,
+            resource_type VARCHAR NOT NULL,
+            resource_id INTEGER,
+            org_id INTEGER REFERENCES organizations (id),
+            details_json TEXT,
+            ip_address VARCHAR,
+            user_agent VARCHAR,
+            request_id VARCHAR,
+            status VARCHAR NOT NULL,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+    # One partition per month from the oldest existing row to MONTHS_AHEAD out
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start date := date_trunc('month', coalesce(
+                (SELECT min(created_at) FROM audit_logs_legacy), now()))::date;
+            last_month date := (date_trunc('month', now()) + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    'audit_logs_' || to_char(month_start, '"y"YYYY"m"MM'),
+                    month_start,
+                    (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'audit_logs', columns, unique=False)
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_legacy")
+    op.drop_table('audit_logs_legacy')
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('audit_logs_id_seq')"), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('actor_type', sa.String(), nullable=False),
+    sa.Column('actor_name', sa.String(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('resource_type', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=True),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('details_json', sa.Text(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('user_agent', sa.String(), nullable=True),
+    sa.Column('request_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+
+    for name in LEGACY_INDEXES:
+        column = name[len('ix_audit_logs_'):]
+        op.create_index(name, 'audit_logs', [column], unique=False)
@@ -0,0 +1,32 @@
+"""One score_cache row per (entity_type, entity_id)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the newest row per entity before enforcing uniqueness
+    op.execute("""
+        DELETE FROM score_cache older
+        USING score_cache newer
+        WHERE older.entity_type = newer.entity_type
+          AND older.entity_id = newer.entity_id
+          AND older.id < newer.id
+    """)
+    op.create_index('uq_score_cache_entity', 'score_cache', ['entity_type', 'entity_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_score_cache_entity', table_name='score_cache')
@@ -0,0 +1,57 @@
+"""Feature store table for per-organization / per-customer invoice aggregates
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:00:00
+
+Populate after upgrading with ``python -m app.cli.refresh_features``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('entity_features',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_count', sa.Integer(), nullable=False),
+    sa.Column('total_invoiced', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('paid_ratio', sa.Numeric(precision=10, scale=6), nullable=True),
+    sa.Column('overdue_ratio', sa.Numeric(precision=10, scale=6), nullable=True),
+    sa.Column('avg_days_to_pay', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('avg_days_past_due', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('open_count', sa.Integer(), nullable=False),
+    sa.Column('outstanding_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('dpd_current', sa.Integer(), nullable=False),
+    sa.Column('dpd_1_30', sa.Integer(), nullable=False),
+    sa.Column('dpd_31_60', sa.Integer(), nullable=False),
+    sa.Column('dpd_61_90', sa.Integer(), nullable=False),
+    sa.Column('dpd_over_90', sa.Integer(), nullable=False),
+    sa.Column('turnover_30d', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('turnover_90d', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('turnover_365d', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('customer_count', sa.Integer(), nullable=True),
+    sa.Column('top_customer_share', sa.Numeric(precision=10, scale=6), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_entity_features_id'), 'entity_features', ['id'], unique=False)
+    op.create_index(op.f('ix_entity_features_org_id'), 'entity_features', ['org_id'], unique=False)
+    op.create_index('uq_entity_features_entity', 'entity_features', ['entity_type', 'entity_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_entity_features_entity', table_name='entity_features')
+    op.drop_index(op.f('ix_entity_features_org_id'), table_name='entity_features')
+    op.drop_index(op.f('ix_entity_features_id'), table_name='entity_features')
+    op.drop_table('entity_features')
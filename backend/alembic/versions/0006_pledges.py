@@ -0,0 +1,54 @@
+"""Pledges table and tranche funding guard
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE tranches SET pledged_amount = 0 WHERE pledged_amount IS NULL")
+    op.alter_column('tranches', 'pledged_amount', existing_type=sa.Numeric(precision=15, scale=2),
+                    nullable=False, server_default='0')
+    op.create_check_constraint('ck_tranches_not_overfunded', 'tranches', 'pledged_amount <= target_amount')
+
+    op.create_table('pledges',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tranche_id', sa.Integer(), nullable=False),
+    sa.Column('investor_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('status', sa.Enum('PLEDGED', 'SETTLED', 'CANCELLED', name='pledgestatus'), nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['investor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['tranche_id'], ['tranches.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pledges_id'), 'pledges', ['id'], unique=False)
+    op.create_index(op.f('ix_pledges_tranche_id'), 'pledges', ['tranche_id'], unique=False)
+    op.create_index(op.f('ix_pledges_investor_id'), 'pledges', ['investor_id'], unique=False)
+    op.create_index('uq_pledges_investor_idempotency_key', 'pledges', ['investor_id', 'idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_pledges_investor_idempotency_key', table_name='pledges')
+    op.drop_index(op.f('ix_pledges_investor_id'), table_name='pledges')
+    op.drop_index(op.f('ix_pledges_tranche_id'), table_name='pledges')
+    op.drop_index(op.f('ix_pledges_id'), table_name='pledges')
+    op.drop_table('pledges')
+    sa.Enum(name='pledgestatus').drop(op.get_bind(), checkfirst=True)
+
+    op.drop_constraint('ck_tranches_not_overfunded', 'tranches', type_='check')
+    op.alter_column('tranches', 'pledged_amount', existing_type=sa.Numeric(precision=15, scale=2),
+                    nullable=True, server_default=None)
@@ -0,0 +1,77 @@
+"""Marketplace listings: denormalized tranche browse table with partial indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+LISTED = "status IN ('OPEN', 'FUNDING')"
+
+
+def upgrade() -> None:
+    op.create_table('marketplace_listings',
+    sa.Column('tranche_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('tranche_number', sa.String(), nullable=False),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('status', postgresql.ENUM(name='tranchestatus', create_type=False), nullable=False),
+    sa.Column('risk_band', sa.String(), nullable=True),
+    sa.Column('risk_score', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('return_percentage', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('funding_deadline', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('maturity_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('invoice_due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('sort_deadline', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sort_return', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('target_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('pledged_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('remaining_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('minimum_investment', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('maximum_investment', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['tranche_id'], ['tranches.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('tranche_id')
+    )
+    op.create_index('ix_marketplace_listed_deadline', 'marketplace_listings',
+                    ['sort_deadline', 'tranche_id'], postgresql_where=sa.text(LISTED))
+    op.create_index('ix_marketplace_listed_return', 'marketplace_listings',
+                    ['sort_return', 'tranche_id'], postgresql_where=sa.text(LISTED))
+    op.create_index('ix_marketplace_listed_remaining', 'marketplace_listings',
+                    ['remaining_amount', 'tranche_id'], postgresql_where=sa.text(LISTED))
+    op.create_index('ix_marketplace_listed_band_return', 'marketplace_listings',
+                    ['risk_band', 'sort_return', 'tranche_id'], postgresql_where=sa.text(LISTED))
+
+    # Backfill from existing tranches
+    op.execute("""
+        INSERT INTO marketplace_listings (
+            tranche_id, invoice_id, org_id, tranche_number, currency, status, risk_band, risk_score,
+            return_percentage, funding_deadline, maturity_date, invoice_due_date, sort_deadline, sort_return,
+            target_amount, pledged_amount, remaining_amount, minimum_investment, maximum_investment
+        )
+        SELECT t.id, t.invoice_id, i.org_id, t.tranche_number, i.currency, t.status, t.risk_band, t.risk_score,
+               t.return_percentage, t.funding_deadline, t.maturity_date, i.due_date,
+               COALESCE(t.funding_deadline, '9999-12-31 00:00:00+00'), COALESCE(t.return_percentage, -1),
+               t.target_amount, t.pledged_amount, t.target_amount - t.pledged_amount,
+               t.minimum_investment, t.maximum_investment
+        FROM tranches t JOIN invoices i ON i.id = t.invoice_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_marketplace_listed_band_return', table_name='marketplace_listings')
+    op.drop_index('ix_marketplace_listed_remaining', table_name='marketplace_listings')
+    op.drop_index('ix_marketplace_listed_return', table_name='marketplace_listings')
+    op.drop_index('ix_marketplace_listed_deadline', table_name='marketplace_listings')
+    op.drop_table('marketplace_listings')
@@ -0,0 +1,53 @@
+"""Cashflow forecast store keyed by (org_id, data_watermark)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 16:00:00
+
+Populate after upgrading with ``python -m app.cli.fit_forecasts``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('cashflow_forecasts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('data_watermark', sa.String(), nullable=False),
+    sa.Column('history_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('history_end', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('history_days', sa.Integer(), nullable=False),
+    sa.Column('total_paid', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('model_type', sa.String(), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('model_json', sa.Text(), nullable=False),
+    sa.Column('warm_started', sa.Boolean(), nullable=False),
+    sa.Column('fit_seconds', sa.Numeric(precision=10, scale=3), nullable=True),
+    sa.Column('horizon_days', sa.Integer(), nullable=False),
+    sa.Column('forecast_json', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cashflow_forecasts_id'), 'cashflow_forecasts', ['id'], unique=False)
+    op.create_index(op.f('ix_cashflow_forecasts_org_id'), 'cashflow_forecasts', ['org_id'], unique=False)
+    op.create_index('uq_cashflow_forecasts_org_watermark', 'cashflow_forecasts', ['org_id', 'data_watermark'], unique=True)
+    # Watermarks and daily series aggregate each organization's paid invoices
+    op.create_index('ix_invoices_org_payment_date', 'invoices', ['org_id', 'payment_date'], unique=False,
+                    postgresql_include=['amount_paid'], postgresql_where=sa.text('payment_date IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_org_payment_date', table_name='invoices')
+    op.drop_index('uq_cashflow_forecasts_org_watermark', table_name='cashflow_forecasts')
+    op.drop_index(op.f('ix_cashflow_forecasts_org_id'), table_name='cashflow_forecasts')
+    op.drop_index(op.f('ix_cashflow_forecasts_id'), table_name='cashflow_forecasts')
+    op.drop_table('cashflow_forecasts')
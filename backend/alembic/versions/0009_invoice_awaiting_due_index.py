@@ -0,0 +1,34 @@
+"""Partial due-date index over invoices awaiting payment, for the overdue sweep
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+AWAITING_PAYMENT = "status IN ('ISSUED', 'PAYMENT_PENDING', 'PARTIALLY_PAID')"
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and avoids locking a large
+    # invoices table against writes while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_invoices_awaiting_due', 'invoices', ['due_date', 'id'],
+            unique=False, postgresql_where=sa.text(AWAITING_PAYMENT),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_invoices_awaiting_due', table_name='invoices', postgresql_concurrently=True, if_exists=True)
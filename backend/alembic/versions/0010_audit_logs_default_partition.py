@@ -0,0 +1,36 @@
+"""DEFAULT partition for audit_logs, so a missing monthly partition never fails an insert
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows caught here are moved into their monthly partition by
+    # app.services.audit_retention.ensure_partitions.
+    op.execute("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+
+def downgrade() -> None:
+    # Keep caught rows as a standalone table rather than dropping them
+    op.execute("""
+        DO $$
+        BEGIN
+            ALTER TABLE audit_logs DETACH PARTITION audit_logs_default;
+            IF NOT EXISTS (SELECT 1 FROM audit_logs_default) THEN
+                DROP TABLE audit_logs_default;
+            ELSE
+                RAISE NOTICE 'audit_logs_default is not empty; kept as a standalone table';
+            END IF;
+        END $$
+    """)
@@ -1,21 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 from pydantic import BaseModel, EmailStr
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_user
 )
 from app.core.config import settings
 from app.db.models.user import User, UserRole
+from app.services.audit import audit_sink
 
 router = APIRouter()
 
 
+def _audit_auth(request: Request, action: str, outcome: str = "success", user: Optional[User] = None, **kwargs):
+    """Queue an audit record for an authentication event"""
+    audit_sink.emit(
+        action,
+        "user",
+        outcome,
+        actor_id=user.id if user else None,
+        actor_name=user.email if user else None,
+        resource_id=user.id if user else None,
+        org_id=user.org_id if user else None,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        request_id=request.headers.get("x-request-id"),
+        **kwargs
+    )
+
+
 class UserRegister(BaseModel):
     email: EmailStr
     password: str
@@ -46,11 +66,12 @@ class UserResponse(BaseModel):
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,15 +81,16 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     # Create new user
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
         is_active=True
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    _audit_auth(request, "register", user=new_user)
     
     # Create access token
     access_token = create_access_token(
@@ -88,19 +110,22 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
     
     # Find user
-    user = db.query(User).filter(User.email == credentials.email).first()
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    user = result.scalar_one_or_none()
     if not user:
+        _audit_auth(request, "login", "failure", details={"email": credentials.email}, error_message="Unknown email")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await verify_password_async(credentials.password, user.hashed_password):
+        _audit_auth(request, "login", "failure", user=user, error_message="Incorrect password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -108,11 +133,14 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     
     # Check if user is active
     if not user.is_active:
+        _audit_auth(request, "login", "failure", user=user, error_message="Inactive user")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
     
+    _audit_auth(request, "login", user=user)
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email, "role": user.role.value}
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from typing import List
+
+from app.core.database import get_async_db
+from app.core.features import forecasting_enabled, require_feature
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.db.models.user import UserRole
+from app.services.forecasting import get_forecast
+
+router = APIRouter()
+
+# Roles that may read any organization's forecast (everyone else: own organization only)
+FORECAST_READER_ROLES = (UserRole.ADMIN.value, UserRole.OPERATOR.value, UserRole.INVESTOR.value)
+
+_require_forecasting_enabled = require_feature(forecasting_enabled, "Cashflow forecasting")
+
+
+class ForecastPoint(BaseModel):
+    date: date
+    yhat: float
+    yhat_lower: float
+    yhat_upper: float
+
+
+class ForecastResponse(BaseModel):
+    org_id: int
+    model_type: str
+    model_version: str
+    history_start: datetime
+    history_end: datetime
+    history_days: int
+    horizon_days: int
+    computed_at: datetime
+    stale: bool
+    points: List[ForecastPoint]
+
+    class Config:
+        protected_namespaces = ()
+
+
+@router.get("/{org_id}", response_model=ForecastResponse, dependencies=[Depends(_require_forecasting_enabled)])
+async def get_cashflow_forecast(
+    org_id: int,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Daily cashflow forecast for the `horizon_days` after the organization's last payment.
+
+    Served from the nightly fit. If payments arrived since, the previous
+    forecast is returned with `stale: true` while a refit runs in the background.
+    """
+    if principal.role not in FORECAST_READER_ROLES and principal.org_id != org_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this organization")
+
+    entry = await get_forecast(db, org_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No forecast yet for this organization"
+        )
+    return entry
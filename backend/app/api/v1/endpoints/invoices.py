@@ -0,0 +1,302 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, List, Literal, Optional
+from pydantic import BaseModel, Field
+import base64
+import hashlib
+import json
+
+from app.core.config import settings
+from app.core.features import ocr_enabled, require_feature
+from app.core.database import AsyncSessionLocal, get_async_db, get_db
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.db.loading import INVOICE_LIST
+from app.db.models.invoice import Invoice, InvoiceStatus
+from app.db.models.user import UserRole
+from app.ocr.engine import ocr_engine, record_result
+from app.ocr.pipeline import OCRError, OCRTimeoutError
+from app.services import jobs
+from app.services.invoice_import import InvoiceImporter, detect_format, iter_records
+from app.services.uploads import blob_scope, upload_service
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = 1000
+
+_require_ocr_enabled = require_feature(ocr_enabled, "OCR")
+
+
+class InvoiceResponse(BaseModel):
+    id: int
+    org_id: int
+    customer_id: int
+    invoice_number: str
+    amount: Decimal
+    currency: Optional[str]
+    tax_amount: Optional[Decimal]
+    total_amount: Decimal
+    amount_paid: Optional[Decimal]
+    issued_date: datetime
+    due_date: datetime
+    payment_date: Optional[datetime]
+    status: InvoiceStatus
+    file_hash: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class InvoicePage(BaseModel):
+    items: List[InvoiceResponse]
+    next_cursor: Optional[str]
+
+
+class OCRJobCreate(BaseModel):
+    file_hash: str = Field(pattern=r"^[0-9a-fA-F]{64}$", description="SHA-256 of a file stored via /uploads")
+
+
+class JobCreated(BaseModel):
+    job_id: str
+    status_url: str
+
+
+class OCRResponse(BaseModel):
+    invoice_id: int
+    file_hash: str
+    cached: bool
+    pages: int
+    confidence: Optional[float]
+    text: str
+    fields: dict
+
+
+def _check_org_access(principal: Principal, org_id: int) -> None:
+    """Staff may read any organization; everyone else only their own"""
+    if principal.role in (UserRole.ADMIN.value, UserRole.OPERATOR.value):
+        return
+    if principal.org_id != org_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized for this organization"
+        )
+
+
+def _encode_cursor(invoice: Invoice) -> str:
+    raw = json.dumps({
+        "s": invoice.status.name,
+        "d": invoice.due_date.isoformat(),
+        "i": invoice.id,
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[InvoiceStatus, datetime, int]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return InvoiceStatus[data["s"]], datetime.fromisoformat(data["d"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _keyset_query(
+    org_id: int,
+    invoice_status: Optional[InvoiceStatus],
+    sort: str,
+    cursor: Optional[str],
+):
+    """Build an index-backed keyset query.
+
+    Both orderings are served straight from the composite indexes
+    ix_invoices_org_status_due_id / ix_invoices_org_due_id, so the cost of a
+    page does not grow with how deep the client has paged.
+    """
+    query = select(Invoice).where(Invoice.org_id == org_id).options(*INVOICE_LIST)
+    if invoice_status is not None:
+        query = query.where(Invoice.status == invoice_status)
+
+    if sort == "status":
+        sort_key = (Invoice.status, Invoice.due_date, Invoice.id)
+    else:
+        sort_key = (Invoice.due_date, Invoice.id)
+
+    if cursor:
+        last_status, last_due, last_id = _decode_cursor(cursor)
+        last = (last_status, last_due, last_id) if sort == "status" else (last_due, last_id)
+        # Bind with the column types so the status is sent as the enum value
+        query = query.where(tuple_(*sort_key) > tuple_(*[
+            literal(value, column.type) for value, column in zip(last, sort_key)
+        ]))
+
+    return query.order_by(*sort_key)
+
+
+@router.get("", response_model=InvoicePage)
+async def list_invoices(
+    org_id: int,
+    invoice_status: Optional[InvoiceStatus] = Query(None, alias="status"),
+    sort: Literal["due_date", "status"] = "due_date",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List an organization's invoices with cursor (keyset) pagination"""
+    _check_org_access(principal, org_id)
+
+    query = _keyset_query(org_id, invoice_status, sort, cursor).limit(limit + 1)
+    result = await db.execute(query)
+    invoices = list(result.scalars().all())
+
+    next_cursor = None
+    if len(invoices) > limit:
+        invoices = invoices[:limit]
+        next_cursor = _encode_cursor(invoices[-1])
+
+    return {"items": invoices, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_invoices(
+    org_id: int,
+    invoice_status: Optional[InvoiceStatus] = Query(None, alias="status"),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Stream an organization's full invoice book as NDJSON.
+
+    Rows are read through a server-side cursor in batches, so memory use is
+    constant regardless of the size of the book.
+    """
+    _check_org_access(principal, org_id)
+    query = _keyset_query(org_id, invoice_status, "due_date", None)
+
+    async def rows() -> AsyncIterator[bytes]:
+        # The stream outlives the request's dependencies, so it owns its session
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for partition in result.scalars().partitions():
+                lines = [
+                    InvoiceResponse.model_validate(invoice).model_dump_json()
+                    for invoice in partition
+                ]
+                db.expunge_all()
+                yield ("\n".join(lines) + "\n").encode()
+
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="invoices-{org_id}.ndjson"'}
+    )
+
+
+@router.post("/import")
+def import_invoices(
+    org_id: int,
+    file: UploadFile = File(...),
+    method: Literal["copy", "insert"] = "copy",
+    chunk_size: int = Query(1000, ge=100, le=10000),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Bulk import invoices (and their customers) from a CSV or JSON-lines file.
+    
+    Runs in the threadpool (sync def) since COPY goes through psycopg2.
+    Returns per-row errors and throughput.
+    """
+    _check_org_access(principal, org_id)
+    try:
+        fmt = detect_format(file.filename or "")
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    
+    importer = InvoiceImporter(db, org_id, principal.id, method=method, chunk_size=chunk_size)
+    report = importer.run(iter_records(file.file, fmt))
+    return report.as_dict()
+
+
+@router.post("/{invoice_id}/ocr", response_model=OCRResponse, dependencies=[Depends(_require_ocr_enabled)])
+async def ocr_invoice(
+    invoice_id: int,
+    file: UploadFile = File(...),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Extract text and fields from an invoice scan (image or PDF).
+    
+    Results are cached by the file's SHA-256, so uploading the same document
+    again returns immediately.
+    """
+    invoice = await db.get(Invoice, invoice_id)
+    if invoice is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    _check_org_access(principal, invoice.org_id)
+
+    extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Allowed file types: {', '.join(settings.ALLOWED_FILE_TYPES)}"
+        )
+    max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    data = await file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB"
+        )
+
+    file_hash = hashlib.sha256(data).hexdigest()
+    try:
+        result = await ocr_engine.extract(data, file_hash, file.content_type)
+    except OCRTimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc))
+    except OCRError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    if record_result(invoice, file_hash, result):
+        await db.commit()
+
+    return {"invoice_id": invoice_id, "file_hash": file_hash, **result}
+
+
+@router.post(
+    "/{invoice_id}/ocr/jobs",
+    response_model=JobCreated,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(_require_ocr_enabled)],
+)
+async def queue_ocr_invoice(
+    invoice_id: int,
+    body: OCRJobCreate,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue OCR of a file already stored through /uploads, for polling.
+
+    Runs on the interactive OCR queue. Poll `status_url` (GET /jobs/{job_id})
+    for progress; the result is recorded on the invoice as with POST /ocr.
+    """
+    invoice = await db.get(Invoice, invoice_id)
+    if invoice is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
+    _check_org_access(principal, invoice.org_id)
+
+    file_hash = body.file_hash.lower()
+    scope = blob_scope(principal.org_id, principal.id)
+    if await upload_service.find(scope, file_hash) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No uploaded file with this hash")
+
+    from app.tasks.ocr import extract_invoice  # imports Celery; only when a job is queued
+
+    job_id = await jobs.submit(extract_invoice, (invoice_id, file_hash, scope), principal.id, kind="ocr")
+    return {"job_id": job_id, "status_url": f"{settings.API_V1_PREFIX}/jobs/{job_id}"}
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.db.models.user import UserRole
+from app.services import jobs
+
+router = APIRouter()
+
+# Suggested polling interval while a job is running
+POLL_AFTER_SECONDS = 2
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    state: str
+    finished: bool
+    created_at: datetime
+    progress: Optional[dict]
+    result: Optional[Any]
+    error: Optional[str]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    response: Response,
+    principal: Principal = Depends(get_current_principal)
+):
+    """Poll a background job started by another endpoint (e.g. OCR).
+
+    While the job is running the response carries `Retry-After`; `progress`
+    holds whatever the task last reported.
+    """
+    staff = principal.role in (UserRole.ADMIN.value, UserRole.OPERATOR.value)
+    job = await jobs.status(job_id, owner_id=None if staff else principal.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if not job["finished"]:
+        response.headers["Retry-After"] = str(POLL_AFTER_SECONDS)
+    return job
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+from app.core.features import require_feature, scoring_enabled
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.db.models.user import UserRole
+from app.ml.scoring import ModelUnavailableError
+from app.services.score_service import EntityNotFoundError, score_service
+
+router = APIRouter()
+
+EntityType = Literal["organization", "customer"]
+
+_require_scoring_enabled = require_feature(scoring_enabled, "Credit scoring")
+
+# Roles that may read any entity's score (everyone else: own organization only)
+SCORE_READER_ROLES = (UserRole.ADMIN.value, UserRole.OPERATOR.value, UserRole.INVESTOR.value)
+
+
+class ScoreResponse(BaseModel):
+    entity_type: str
+    entity_id: int
+    org_id: Optional[int]
+    score: float
+    score_band: Optional[str]
+    confidence: Optional[float]
+    model_version: str
+    model_type: str
+    top_features: Optional[List[str]]
+    valid_until: Optional[datetime]
+    computed_at: datetime
+    stale: bool = False
+    
+    class Config:
+        protected_namespaces = ()
+
+
+class ScoreBatchResponse(BaseModel):
+    scores: Dict[int, Optional[ScoreResponse]]
+    pending: List[int]
+
+
+def _can_read(principal: Principal, org_id: Optional[int]) -> bool:
+    if principal.role in SCORE_READER_ROLES:
+        return True
+    return org_id is not None and org_id == principal.org_id
+
+
+@router.get("", response_model=ScoreBatchResponse, dependencies=[Depends(_require_scoring_enabled)])
+async def get_scores(
+    entity_type: EntityType = "customer",
+    ids: List[int] = Query(..., max_length=500),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Look up many scores at once (e.g. a borrower list on the dashboard).
+    
+    Never waits for model inference: entities without a score are listed in
+    `pending` and scored in the background. Unknown entities, and those the
+    caller may not read, come back as None and are never scored.
+    """
+    owners = await score_service.owners(entity_type, ids)
+    readable = [entity_id for entity_id, org_id in owners.items() if _can_read(principal, org_id)]
+    entries = await score_service.get_many(entity_type, readable)
+    return {
+        "scores": {entity_id: entries.get(entity_id) for entity_id in dict.fromkeys(ids)},
+        "pending": [entity_id for entity_id, entry in entries.items() if entry is None],
+    }
+
+
+@router.get("/{entity_id}", response_model=ScoreResponse, dependencies=[Depends(_require_scoring_enabled)])
+async def get_score(
+    entity_id: int,
+    entity_type: EntityType = "organization",
+    principal: Principal = Depends(get_current_principal)
+):
+    """Get an entity's credit score, serving a cached (possibly stale) score when available"""
+    owners = await score_service.owners(entity_type, [entity_id])
+    if entity_id not in owners:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{entity_type.capitalize()} not found")
+    if not _can_read(principal, owners[entity_id]):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this entity")
+    try:
+        return await score_service.get(entity_type, entity_id)
+    except EntityNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{entity_type.capitalize()} not found")
+    except ModelUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Credit scoring model is not available"
+        )
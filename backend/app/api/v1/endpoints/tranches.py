@@ -0,0 +1,184 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Literal, Optional
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.db.models.tranche import TrancheStatus
+from app.db.models.user import UserRole
+from app.services.audit import audit_sink
+from app.services.marketplace import BrowseFilters, InvalidCursorError, browse
+from app.services.pledging import (
+    IdempotencyConflictError,
+    PledgeError,
+    PledgeRejectedError,
+    TrancheNotFoundError,
+    pledge,
+)
+
+router = APIRouter()
+
+# Rejections that are about the request itself rather than the tranche's state
+INVALID_PLEDGE_REASONS = ("invalid_amount", "above_maximum", "below_minimum")
+
+
+class ListingResponse(BaseModel):
+    tranche_id: int
+    invoice_id: int
+    org_id: int
+    tranche_number: str
+    currency: Optional[str]
+    status: TrancheStatus
+    risk_band: Optional[str]
+    risk_score: Optional[Decimal]
+    return_percentage: Optional[Decimal]
+    funding_deadline: Optional[datetime]
+    maturity_date: Optional[datetime]
+    invoice_due_date: Optional[datetime]
+    target_amount: Decimal
+    pledged_amount: Decimal
+    remaining_amount: Decimal
+    minimum_investment: Optional[Decimal]
+    maximum_investment: Optional[Decimal]
+    updated_at: datetime
+
+
+class ListingPage(BaseModel):
+    items: List[ListingResponse]
+    next_cursor: Optional[str]
+
+
+class PledgeCreate(BaseModel):
+    amount: Decimal = Field(gt=0, max_digits=15, decimal_places=2)
+
+
+class PledgeResponse(BaseModel):
+    pledge_id: int
+    tranche_id: int
+    amount: Decimal
+    pledged_amount: Decimal
+    target_amount: Decimal
+    remaining: Decimal
+    tranche_status: TrancheStatus
+    created_at: datetime
+    replayed: bool
+
+
+def _pledge_http_error(exc: PledgeError) -> HTTPException:
+    if isinstance(exc, TrancheNotFoundError):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    if isinstance(exc, IdempotencyConflictError):
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if isinstance(exc, PledgeRejectedError):
+        return HTTPException(
+            status_code=(
+                status.HTTP_422_UNPROCESSABLE_ENTITY if exc.reason in INVALID_PLEDGE_REASONS
+                else status.HTTP_409_CONFLICT
+            ),
+            detail={
+                "message": str(exc),
+                "reason": exc.reason,
+                "remaining": str(exc.remaining) if exc.remaining is not None else None,
+            }
+        )
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get("", response_model=ListingPage)
+async def list_tranches(
+    response: Response,
+    risk_band: Optional[List[str]] = Query(None),
+    min_return: Optional[Decimal] = Query(None, description="Minimum return percentage"),
+    min_remaining: Optional[Decimal] = Query(None, ge=0),
+    max_remaining: Optional[Decimal] = Query(None, ge=0),
+    deadline_before: Optional[datetime] = None,
+    currency: Optional[str] = None,
+    sort: Literal["deadline", "return", "remaining"] = "deadline",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Browse tranches open for pledging, with cursor (keyset) pagination.
+
+    Served from the marketplace_listings read model. Pages are cached for a
+    few seconds, so remaining amounts can trail the latest pledges slightly.
+    """
+    filters = BrowseFilters(
+        risk_bands=tuple(sorted(set(risk_band or ()))),
+        min_return=min_return,
+        min_remaining=min_remaining,
+        max_remaining=max_remaining,
+        deadline_before=deadline_before,
+        currency=currency,
+    )
+    try:
+        items, next_cursor, cached = await browse(db, filters, sort, cursor, limit)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    response.headers["Cache-Control"] = f"private, max-age={int(settings.MARKETPLACE_CACHE_TTL_SECONDS)}"
+    response.headers["X-Cache"] = "hit" if cached else "miss"
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/{tranche_id}/pledge", response_model=PledgeResponse, status_code=status.HTTP_201_CREATED)
+async def pledge_tranche(
+    tranche_id: int,
+    body: PledgeCreate,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Pledge part of a tranche.
+
+    Admission is a single conditional UPDATE, so concurrent pledges never
+    overfund the tranche. Send an Idempotency-Key header to make retries
+    safe: a repeated key returns the original pledge with 200.
+    """
+    if principal.role != UserRole.INVESTOR.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only investors can pledge"
+        )
+
+    try:
+        result = await pledge(tranche_id, principal.id, body.amount, idempotency_key)
+    except PledgeError as exc:
+        raise _pledge_http_error(exc)
+
+    if result.replayed:
+        response.status_code = status.HTTP_200_OK
+    else:
+        audit_sink.emit(
+            "pledge",
+            "tranche",
+            actor_id=principal.id,
+            resource_id=tranche_id,
+            details={
+                "pledge_id": result.pledge_id,
+                "amount": result.amount,
+                "tranche_status": result.tranche_status.value,
+            },
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            request_id=request.headers.get("x-request-id"),
+        )
+
+    return PledgeResponse(
+        pledge_id=result.pledge_id,
+        tranche_id=result.tranche_id,
+        amount=result.amount,
+        pledged_amount=result.pledged_amount,
+        target_amount=result.target_amount,
+        remaining=result.remaining,
+        tranche_status=result.tranche_status,
+        created_at=result.created_at,
+        replayed=result.replayed,
+    )
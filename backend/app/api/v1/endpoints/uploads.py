@@ -0,0 +1,170 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import BaseModel, Field
+from typing import Optional
+import re
+
+from app.core.config import settings
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.uploads import (
+    HashMismatchError,
+    OffsetConflictError,
+    SessionNotFoundError,
+    UploadError,
+    UploadTooLargeError,
+    blob_scope,
+    upload_service,
+)
+
+router = APIRouter()
+
+SHA256_PATTERN = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+class BlobResponse(BaseModel):
+    sha256: str
+    size: int
+    object_name: str
+    deduplicated: bool
+
+
+class UploadSessionCreate(BaseModel):
+    sha256: str = Field(pattern=SHA256_PATTERN.pattern)
+    size: int = Field(gt=0)
+    content_type: str = "application/octet-stream"
+
+
+class UploadSessionResponse(BaseModel):
+    id: Optional[str]
+    sha256: str
+    size: int
+    received: int
+    complete: bool
+    blob: Optional[BlobResponse]
+
+
+def _scope(principal: Principal) -> str:
+    return blob_scope(principal.org_id, principal.id)
+
+
+def _upload_http_error(exc: UploadError) -> HTTPException:
+    if isinstance(exc, UploadTooLargeError):
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    if isinstance(exc, OffsetConflictError):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+            headers={"Upload-Offset": str(exc.expected)}
+        )
+    if isinstance(exc, SessionNotFoundError):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    if isinstance(exc, HashMismatchError):
+        return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
+
+
+@router.get("/{sha256}", response_model=BlobResponse)
+async def get_blob(sha256: str, principal: Principal = Depends(get_current_principal)):
+    """Check whether a file is already stored for the caller's organization (clients skip the upload if so)"""
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid SHA-256")
+    blob = await upload_service.find(_scope(principal), sha256)
+    if blob is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not stored")
+    return blob
+
+
+@router.post("", response_model=BlobResponse, status_code=status.HTTP_201_CREATED)
+async def upload_file(
+    request: Request,
+    content_sha256: Optional[str] = Header(None, alias="X-Content-SHA256"),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Upload a file as the raw request body.
+    
+    The body is streamed to object storage without buffering. Send
+    X-Content-SHA256 to skip the transfer when the caller's organization
+    already stored the file.
+    """
+    if content_sha256 and not SHA256_PATTERN.match(content_sha256):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid X-Content-SHA256")
+    declared_length = int(request.headers.get("content-length") or 0)
+    if declared_length > settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB"
+        )
+    try:
+        return await upload_service.store_stream(
+            _scope(principal),
+            request.stream(),
+            content_type=request.headers.get("content-type", "application/octet-stream"),
+            expected_sha256=content_sha256,
+        )
+    except UploadError as exc:
+        raise _upload_http_error(exc)
+
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    principal: Principal = Depends(get_current_principal)
+):
+    """Start a resumable upload; returns complete=true if the file is already stored"""
+    try:
+        return await upload_service.create_session(
+            principal.id, _scope(principal), body.sha256, body.size, body.content_type
+        )
+    except UploadError as exc:
+        raise _upload_http_error(exc)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(session_id: str, principal: Principal = Depends(get_current_principal)):
+    """Current offset of a resumable upload (resume from `received`)"""
+    try:
+        return await upload_service.get_session(session_id, principal.id)
+    except UploadError as exc:
+        raise _upload_http_error(exc)
+
+
+@router.patch("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def append_upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    principal: Principal = Depends(get_current_principal)
+):
+    """Append the request body at Upload-Offset (409 with the expected offset on mismatch)"""
+    max_bytes = settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunks are limited to {settings.UPLOAD_CHUNK_MAX_MB} MB"
+            )
+    if not data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty chunk")
+    try:
+        return await upload_service.append_chunk(session_id, principal.id, upload_offset, bytes(data))
+    except UploadError as exc:
+        raise _upload_http_error(exc)
+
+
+@router.post("/sessions/{session_id}/complete", response_model=UploadSessionResponse)
+async def complete_upload_session(session_id: str, principal: Principal = Depends(get_current_principal)):
+    """Retry assembling a session that has every byte (after a failed last PATCH)"""
+    try:
+        return await upload_service.complete_session(session_id, principal.id)
+    except UploadError as exc:
+        raise _upload_http_error(exc)
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload_session(session_id: str, principal: Principal = Depends(get_current_principal)):
+    try:
+        await upload_service.cancel_session(session_id, principal.id)
+    except UploadError as exc:
+        raise _upload_http_error(exc)
@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, organizations, invoices, customers
+from app.api.v1.endpoints import auth, invoices, scores, forecast, tranches, uploads, jobs
 
 api_router = APIRouter()
 
 # Include endpoint routers
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-api_router.include_router(users.router, prefix="/users", tags=["Users"])
-api_router.include_router(organizations.router, prefix="/organizations", tags=["Organizations"])
 api_router.include_router(invoices.router, prefix="/invoices", tags=["Invoices"])
-api_router.include_router(customers.router, prefix="/customers", tags=["Customers"])
+api_router.include_router(scores.router, prefix="/score", tags=["Credit Scoring"])
+api_router.include_router(forecast.router, prefix="/forecast", tags=["Cashflow Forecasting"])
+api_router.include_router(tranches.router, prefix="/tranches", tags=["Tranches"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
@@ -0,0 +1,107 @@
+from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu import Queue
+
+from app.core.config import settings
+import app.db.models  # noqa: F401 - register all models before tasks run
+
+# One queue per workload, each consumed by its own worker (see docker-compose.yml),
+# so a nightly rescore or forecast fit never delays OCR a user is waiting on
+OCR_QUEUE = "ocr"
+SCORING_QUEUE = "scoring"
+FORECASTING_QUEUE = "forecasting"
+HOUSEKEEPING_QUEUE = "housekeeping"
+
+# Redis priorities: 0 is served first within a queue
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BULK = 9
+
+celery_app = Celery(
+    "commons_ledger",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.tasks.housekeeping",
+        "app.tasks.scoring",
+        "app.tasks.features",
+        "app.tasks.forecasting",
+        "app.tasks.ocr",
+    ],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    enable_utc=True,
+    task_queues=[Queue(name) for name in (OCR_QUEUE, SCORING_QUEUE, FORECASTING_QUEUE, HOUSEKEEPING_QUEUE)],
+    task_routes={
+        "ocr.*": {"queue": OCR_QUEUE},
+        "scoring.*": {"queue": SCORING_QUEUE},
+        "features.*": {"queue": SCORING_QUEUE},
+        "forecasting.*": {"queue": FORECASTING_QUEUE},
+        "housekeeping.*": {"queue": HOUSEKEEPING_QUEUE},
+    },
+    # Anything unrouted lands with the low-urgency maintenance work
+    task_default_queue=HOUSEKEEPING_QUEUE,
+    task_default_priority=PRIORITY_DEFAULT,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    },
+    # Long CPU tasks: reserve one task at a time, and acknowledge only once
+    # it finished so a lost worker's task is redelivered. Every task is
+    # idempotent (upserts, checkpoints, content-addressed caches).
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    task_track_started=True,
+    result_expires=settings.JOB_RESULT_TTL_SECONDS,
+)
+
+# Periodic jobs (run with: celery -A app.celery_app beat)
+celery_app.conf.beat_schedule = {
+    "audit-ensure-partitions": {
+        "task": "housekeeping.audit_ensure_partitions",
+        "schedule": crontab(minute=0, hour=1),
+    },
+    "audit-enforce-retention": {
+        "task": "housekeeping.audit_enforce_retention",
+        "schedule": crontab(minute=30, hour=1),
+    },
+    "invoices-sweep-overdue": {
+        "task": "housekeeping.sweep_overdue_invoices",
+        "schedule": crontab(minute=15),
+    },
+    "uploads-remove-orphaned-parts": {
+        "task": "housekeeping.remove_orphaned_upload_parts",
+        "schedule": crontab(minute=45),
+    },
+    "features-refresh-all": {
+        "task": "features.refresh_all",
+        "schedule": crontab(minute=0, hour=2),
+        "options": {"priority": PRIORITY_BULK},
+    },
+    "forecasting-fit-all": {
+        "task": "forecasting.fit_all",
+        "schedule": crontab(minute=0, hour=3),
+        "options": {"priority": PRIORITY_BULK},
+    },
+}
+
+
+@worker_process_init.connect
+def _start_worker_services(**kwargs):
+    from app.services.audit import audit_sink
+    audit_sink.start()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_services(**kwargs):
+    from app.services.audit import audit_sink
+    audit_sink.stop()
@@ -0,0 +1,31 @@
+"""Fit cashflow forecasts for every organization whose payments changed.
+
+Usage (from backend/):
+    python -m app.cli.fit_forecasts --workers 8
+    python -m app.cli.fit_forecasts --force   # refit everything, e.g. after a Prophet upgrade
+"""
+import argparse
+import json
+import logging
+import sys
+
+import app.db.models  # noqa: F401 - resolve relationship() targets
+from app.ml.forecasting import fit_all
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fit and store cashflow forecasts")
+    parser.add_argument("--workers", type=int, help="Processes / shards (default FORECAST_WORKERS)")
+    parser.add_argument("--batch-size", type=int, help="Organizations per batch (default FORECAST_BATCH_SIZE)")
+    parser.add_argument("--force", action="store_true", help="Refit even when the watermark has not moved")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    summary = fit_all(workers=args.workers, batch_size=args.batch_size, force=args.force)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
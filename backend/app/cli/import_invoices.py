@@ -0,0 +1,51 @@
+"""Bulk import invoices from the command line.
+
+Usage (from backend/):
+    python -m app.cli.import_invoices invoices.csv --org-id 1 --creator-id 1
+    python -m app.cli.import_invoices book.jsonl --org-id 1 --creator-id 1 --method insert
+"""
+import argparse
+import json
+import sys
+
+from app.core.database import SessionLocal
+import app.db.models  # noqa: F401 - resolve relationship() targets
+from app.services.invoice_import import (
+    DEFAULT_CHUNK_SIZE,
+    InvoiceImporter,
+    detect_format,
+    iter_records,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import invoices from CSV or JSON lines")
+    parser.add_argument("path", help="CSV or JSON-lines file ('-' for stdin)")
+    parser.add_argument("--org-id", type=int, required=True)
+    parser.add_argument("--creator-id", type=int, required=True, help="User recorded as invoice creator")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.path == "-":
+        if not args.format:
+            parser.error("--format is required when reading from stdin")
+        stream = sys.stdin.buffer
+    else:
+        stream = open(args.path, "rb")
+    fmt = args.format or detect_format(args.path)
+
+    with stream, SessionLocal() as db:
+        importer = InvoiceImporter(
+            db, args.org_id, args.creator_id, method=args.method, chunk_size=args.chunk_size
+        )
+        report = importer.run(iter_records(stream, fmt))
+
+    json.dump(report.as_dict(), sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if report.invalid == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
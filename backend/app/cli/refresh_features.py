@@ -0,0 +1,33 @@
+"""Backfill or fully recompute the feature store.
+
+Usage (from backend/):
+    python -m app.cli.refresh_features
+    python -m app.cli.refresh_features --entity-type customer --batch-size 5000
+"""
+import argparse
+import json
+import logging
+import sys
+
+import app.db.models  # noqa: F401 - resolve relationship() targets
+from app.core.database import engine
+from app.ml.scoring import ENTITY_TYPES
+from app.services.feature_store import refresh_all
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute entity_features rows")
+    parser.add_argument("--entity-type", choices=ENTITY_TYPES, help="Only this entity type (default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Entities per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    entity_types = [args.entity_type] if args.entity_type else ENTITY_TYPES
+    counts = refresh_all(engine, entity_types, batch_size=args.batch_size)
+    json.dump(counts, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Rescore the whole portfolio, e.g. after a model upgrade.
+
+Usage (from backend/):
+    python -m app.cli.rescore --entity-type customer --workers 8
+    python -m app.cli.rescore --entity-type customer --run-id <id>   # resume
+"""
+import argparse
+import json
+import logging
+import sys
+import uuid
+
+import app.db.models  # noqa: F401 - resolve relationship() targets
+from app.ml.batch_scoring import ShardCountMismatchError, rescore_portfolio
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch rescore organizations or customers")
+    parser.add_argument("--entity-type", choices=["organization", "customer"], required=True)
+    parser.add_argument("--run-id", help="Resume a previous run (default: start a new one)")
+    parser.add_argument("--workers", type=int, help="Processes / shards (default SCORING_WORKERS; a resume keeps the run's count)")
+    parser.add_argument("--batch-size", type=int, help="Entities per batch (default SCORING_BATCH_SIZE)")
+    parser.add_argument("--no-explain", action="store_true", help="Skip SHAP values")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    run_id = args.run_id or uuid.uuid4().hex
+    try:
+        summary = rescore_portfolio(
+            args.entity_type,
+            run_id,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            explain=not args.no_explain,
+        )
+    except ShardCountMismatchError as exc:
+        sys.stderr.write(f"{exc}\n")
+        return 2
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
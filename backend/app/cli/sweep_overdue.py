@@ -0,0 +1,37 @@
+"""Move invoices still awaiting payment past their due date to OVERDUE.
+
+Usage (from backend/):
+    python -m app.cli.sweep_overdue
+    python -m app.cli.sweep_overdue --chunk-size 20000 --grace-hours 24
+"""
+import argparse
+import json
+import logging
+import sys
+
+import app.db.models  # noqa: F401 - resolve relationship() targets
+from app.core.database import engine
+from app.services.audit import audit_sink
+from app.services.overdue import sweep
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mark invoices past their due date overdue")
+    parser.add_argument("--chunk-size", type=int, help="Invoices per transaction (default OVERDUE_SWEEP_CHUNK_SIZE)")
+    parser.add_argument("--grace-hours", type=int, help="Hours past due_date before an invoice counts (default OVERDUE_GRACE_HOURS)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    audit_sink.start()
+    try:
+        summary = sweep(engine, chunk_size=args.chunk_size, grace_hours=args.grace_hours)
+    finally:
+        # Flush the per-chunk audit records before exiting
+        audit_sink.stop()
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""In-process caching helpers and shared Redis clients"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+                    return value
+                del self._data[key]
+        CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_redis: Optional[aioredis.Redis] = None
+_sync_redis: Optional[redis.Redis] = None
+
+
+def _pool_options() -> dict:
+    return {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT_SECONDS,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        "socket_connect_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        "health_check_interval": 30,
+        "decode_responses": True,
+    }
+
+
+def init_redis() -> aioredis.Redis:
+    """Create the shared asyncio client (called from the app lifespan).
+
+    Callers wait up to REDIS_POOL_TIMEOUT_SECONDS for a free connection once
+    REDIS_MAX_CONNECTIONS are in use, instead of opening more.
+    """
+    global _redis
+    if _redis is None:
+        pool = aioredis.BlockingConnectionPool.from_url(settings.REDIS_URL, **_pool_options())
+        _redis = aioredis.Redis(connection_pool=pool)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        client, _redis = _redis, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
+
+
+def get_redis() -> aioredis.Redis:
+    """Shared asyncio Redis client; usable directly or as a FastAPI dependency"""
+    return _redis if _redis is not None else init_redis()
+
+
+def get_sync_redis() -> redis.Redis:
+    """Shared blocking Redis client for Celery workers and ORM event hooks"""
+    global _sync_redis
+    if _sync_redis is None:
+        pool = redis.BlockingConnectionPool.from_url(settings.REDIS_URL, **_pool_options())
+        _sync_redis = redis.Redis(connection_pool=pool)
+    return _sync_redis
+
+
+def close_sync_redis() -> None:
+    global _sync_redis
+    if _sync_redis is not None:
+        client, _sync_redis = _sync_redis, None
+        client.close()
+        client.connection_pool.disconnect()
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     # Project
     PROJECT_NAME: str = "Commons Ledger"
     API_V1_PREFIX: str = "/api/v1"
+    ENVIRONMENT: str = "development"  # development, staging or production
     DEBUG: bool = False
     RELOAD: bool = False
     LOG_LEVEL: str = "INFO"
@@ -20,11 +21,17 @@ class Settings(BaseSettings):
     DATABASE_NAME: str = "commons_ledger"
     DATABASE_USER: str = "commons"
     DATABASE_PASSWORD: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL if unset
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
     
     # Redis
     REDIS_URL: str
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    REDIS_MAX_CONNECTIONS: int = 50  # Per process
+    REDIS_POOL_TIMEOUT_SECONDS: float = 2.0  # Wait for a free connection before failing
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5.0
     
     # MinIO
     MINIO_ENDPOINT: str
@@ -32,36 +39,120 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str
     MINIO_BUCKET: str = "commons-ledger"
     MINIO_USE_SSL: bool = False
+    MINIO_MAX_POOL_SIZE: int = 20  # Per process
+    MINIO_TIMEOUT_SECONDS: float = 30.0
+    
+    # Health checks
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    READINESS_CHECK_INTERVAL_SECONDS: float = 2.0
+    READINESS_REQUIRE_SCHEMA_HEAD: bool = True  # Not ready until `alembic upgrade head` has run
+    
+    # Query profiling (slow-query log always on; per-request profiles via X-Query-Profile outside production)
+    SLOW_QUERY_MS: int = 250  # 0 disables the slow-query log
+    SLOW_QUERY_EXPLAIN: bool = True  # Log EXPLAIN output with slow SELECTs
+    QUERY_PROFILE_ALL_REQUESTS: bool = False  # Profile every request, not just those sending the header
+    QUERY_REPEAT_THRESHOLD: int = 5  # Same statement shape this many times in one request is flagged as N+1
     
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password hashing pool
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread or process
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = one worker per CPU core
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # Jobs allowed to wait before returning 503
+    
+    # Principal cache (authenticated users by JWT sub)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_USE_REDIS: bool = False
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = 300
+    
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
     # ML Models
     MODEL_PATH: str = "/app/models"
     ENABLE_ML_FEATURES: bool = True
+    CREDIT_MODEL_FILE: str = "credit_model.txt"  # LightGBM booster, relative to MODEL_PATH
+    
+    # Credit score cache (LRU -> Redis -> score_cache table)
+    SCORE_TTL_SECONDS: int = 86400  # A computed score is fresh for this long
+    SCORE_MAX_STALE_SECONDS: int = 604800  # Older than this, callers wait for a recompute
+    SCORE_LOCAL_CACHE_SIZE: int = 10000
+    SCORE_LOCAL_CACHE_TTL_SECONDS: int = 30
+    SCORE_REDIS_TTL_SECONDS: int = 3600
+    SCORE_MAX_CONCURRENT_COMPUTES: int = 4  # Per worker
+    SCORE_LOCK_SECONDS: int = 60
+    SCORE_LOCK_WAIT_SECONDS: float = 2.0
+    
+    # Batch rescoring
+    SCORING_BATCH_SIZE: int = 5000
+    SCORING_WORKERS: int = 0  # 0 = one process per CPU core
+    
+    # Feature store (non-additive columns are recomputed in the background)
+    FEATURE_REFRESH_DELAY_SECONDS: int = 30  # Coalescing window after an invoice write
+    FEATURE_REFRESH_BATCH_SIZE: int = 500  # Entities per recompute transaction
+    
+    # Cashflow forecasting (fitted nightly, served from cashflow_forecasts)
+    FORECAST_HORIZON_DAYS: int = 90
+    FORECAST_HISTORY_DAYS: int = 730  # Training window, counted back from the last payment
+    FORECAST_MIN_HISTORY_DAYS: int = 60  # Shorter series are not fitted
+    FORECAST_BATCH_SIZE: int = 100  # Organizations per payments query
+    FORECAST_WORKERS: int = 0  # 0 = one process per CPU core
+    FORECAST_CACHE_MAX_SIZE: int = 1000
+    FORECAST_CACHE_TTL_SECONDS: int = 3600
+    FORECAST_REFIT_LOCK_SECONDS: int = 900  # One queued refit per organization
     
     # OCR
     TESSERACT_PATH: str = "/usr/bin/tesseract"
     OCR_LANGUAGE: str = "eng"
     OCR_TIMEOUT: int = 30
+    OCR_WORKERS: int = 0  # 0 = one process per CPU core
+    OCR_CACHE_DIR: str = "/app/uploads/ocr-cache"  # Preprocessed pages by file hash
+    OCR_RESULT_TTL_SECONDS: int = 604800
+    OCR_PDF_DPI: int = 300
+    
+    # Transformer field extraction (token classification over OCR text)
+    ENABLE_TRANSFORMER_EXTRACTION: bool = False
+    EXTRACTION_MODEL: str = ""  # Hugging Face id or local path
+    EXTRACTION_BACKEND: str = "int8"  # torch, int8 (dynamic quantization) or onnx (needs onnxruntime)
+    EXTRACTION_MAX_BATCH: int = 16  # Documents per forward pass
+    EXTRACTION_MAX_WAIT_MS: float = 10.0  # How long a request waits for others to batch with
+    EXTRACTION_MAX_LENGTH: int = 512  # Tokens per window; longer texts are split into windows
+    EXTRACTION_STRIDE: int = 64  # Tokens shared by neighbouring windows
+    EXTRACTION_MIN_SCORE: float = 0.5
+    EXTRACTION_THREADS: int = 0  # Intra-op threads; 0 = runtime default (all cores)
+    EXTRACTION_WARMUP: bool = True  # Load the model at startup instead of on first use
+    
+    # Marketplace browse (per-process page cache)
+    MARKETPLACE_CACHE_TTL_SECONDS: float = 5.0
+    MARKETPLACE_CACHE_MAX_SIZE: int = 1000
+    
+    # Overdue sweep (hourly; moves unpaid invoices past due_date to OVERDUE)
+    OVERDUE_SWEEP_CHUNK_SIZE: int = 5000  # Invoices per UPDATE / transaction
+    OVERDUE_GRACE_HOURS: int = 0  # How long past due_date an invoice stays in its status
     
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    CELERY_VISIBILITY_TIMEOUT_SECONDS: int = 21600  # Must exceed the longest task (acks_late redelivery)
+    JOB_RESULT_TTL_SECONDS: int = 86400  # How long job status can be polled
+    OCR_TASK_TIME_LIMIT_SECONDS: int = 300
     
     # File Upload
     MAX_UPLOAD_SIZE_MB: int = 10
+    UPLOAD_PART_SIZE_MB: int = 10  # MinIO multipart part size (min 5)
+    UPLOAD_CHUNK_MAX_MB: int = 8  # Largest chunk accepted by a resumable session
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400
     ALLOWED_FILE_TYPES: List[str] = ["pdf", "jpg", "jpeg", "png"]
     
     # Feature Flags
     ENABLE_INVOICE_FINANCING: bool = True
     ENABLE_CREDIT_SCORING: bool = True
     ENABLE_CASHFLOW_FORECASTING: bool = True
+    ENABLE_OCR: bool = True
     ENABLE_ATTESTATIONS: bool = True
     ENABLE_KYC_LITE: bool = True
     
@@ -84,10 +175,23 @@ class Settings(BaseSettings):
     # Audit
     ENABLE_AUDIT_LOGGING: bool = True
     AUDIT_LOG_RETENTION_DAYS: int = 365
-    
-    # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_BUFFER_MAX: int = 10000  # Beyond this, records spill to disk
+    AUDIT_SPILL_DIR: str = "/app/uploads/audit-spill"
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3
+    AUDIT_ARCHIVE_BACKEND: str = "local"  # local or minio
+    AUDIT_ARCHIVE_DIR: str = "/app/uploads/audit-archive"
+    
+    # Rate Limiting (token buckets in Redis, shared by all workers)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60  # Per user (or per IP when unauthenticated)
     RATE_LIMIT_BURST: int = 10
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 10  # Login/register, per IP
+    RATE_LIMIT_AUTH_BURST: int = 5
+    RATE_LIMIT_LEASE_TOKENS: int = 5  # Tokens a worker takes per Redis call; 0 = one call per request
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0
+    RATE_LIMIT_COOLDOWN_SECONDS: float = 10.0  # Skip Redis this long after an error (fail open)
     
     class Config:
         env_file = ".env"
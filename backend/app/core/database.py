@@ -1,27 +1,108 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT_SECONDS,
+    DB_POOL_OPEN,
+)
+from app.core.query_profiler import instrument as instrument_statements
+
+
+def _async_database_url(url: str) -> str:
+    """Derive the asyncpg URL from the (sync) DATABASE_URL"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+class _CheckoutTimingMixin:
+    """Record how long each pool checkout waits (the pool's _do_get)"""
+    metrics_label: str
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(pool=self.metrics_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.labels(pool=self.metrics_label).observe(
+                time.perf_counter() - started
+            )
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
 
-# Create SQLAlchemy engine
+
+# Create SQLAlchemy engine (sync - used by Celery workers, scripts and migrations)
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW
 )
 
+# Create async engine (used by the API request handlers)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_pre_ping=True,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW
+)
+
+# Pool usage is read at scrape time; look the pool up each time since
+# dispose() replaces it
+for _label, _engine in (("sync", engine), ("async", async_engine.sync_engine)):
+    DB_POOL_CHECKED_OUT.labels(pool=_label).set_function(lambda e=_engine: e.pool.checkedout())
+    DB_POOL_OPEN.labels(pool=_label).set_function(lambda e=_engine: e.pool.checkedin() + e.pool.checkedout())
+    instrument_statements(_engine, _label)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class
+# expire_on_commit=False so ORM objects stay usable after commit without
+# triggering an implicit (and illegal in async) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
 
 def get_db():
-    """Database session dependency"""
+    """Database session dependency (sync)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Database session dependency (async)"""
+    async with AsyncSessionLocal() as db:
+        yield db
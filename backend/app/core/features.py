@@ -0,0 +1,39 @@
+"""Feature flags for the optional ML and OCR subsystems.
+
+Each subsystem imports its heavy libraries on first use, never at module
+import: LightGBM/SHAP scoring, Prophet forecasting, Transformers
+extraction, OpenCV/Tesseract OCR, and Celery for queued jobs. An API worker
+therefore only pays the import time and memory of the features it actually
+serves. Disabled features answer 404 and never load anything.
+``python -m benchmarks.startup --check`` fails if one of these libraries is
+imported at startup.
+"""
+from typing import Callable
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+def scoring_enabled() -> bool:
+    return settings.ENABLE_ML_FEATURES and settings.ENABLE_CREDIT_SCORING
+
+
+def forecasting_enabled() -> bool:
+    return settings.ENABLE_ML_FEATURES and settings.ENABLE_CASHFLOW_FORECASTING
+
+
+def extraction_enabled() -> bool:
+    return settings.ENABLE_ML_FEATURES and settings.ENABLE_TRANSFORMER_EXTRACTION and bool(settings.EXTRACTION_MODEL)
+
+
+def ocr_enabled() -> bool:
+    return settings.ENABLE_OCR
+
+
+def require_feature(enabled: Callable[[], bool], name: str) -> Callable[[], None]:
+    """FastAPI dependency answering 404 while a feature is switched off"""
+    def dependency() -> None:
+        if not enabled():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{name} is disabled")
+    return dependency
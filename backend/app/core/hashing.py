@@ -0,0 +1,117 @@
+"""Bounded worker pool for CPU-heavy password hashing.
+
+bcrypt takes 100-300 ms of CPU per call. Running it inline in an async
+handler stalls the event loop, so hashing jobs are shipped to a dedicated
+thread (or process) pool instead. The number of pending jobs is capped;
+once the cap is reached callers get a 503 rather than an unbounded queue.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import (
+    PASSWORD_HASH_PENDING,
+    PASSWORD_HASH_QUEUE_WAIT_SECONDS,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+)
+
+
+def _timed_call(fn: Callable, args: tuple) -> tuple:
+    """Run fn in the worker and report when it started and how long it took.
+
+    time.monotonic() is system-wide on Linux, so the start timestamp is
+    comparable with the submit timestamp even when run in a child process.
+    """
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic() - started
+
+
+class HashingPool:
+    """Executor wrapper with a queue-depth cap and latency metrics"""
+
+    def __init__(self, max_workers: int, max_queue: int, kind: str = "thread"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs running or waiting at once"""
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="password-hash",
+                        )
+        return self._executor
+
+    def _acquire(self, operation: str) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                PASSWORD_HASH_REJECTED.labels(operation=operation).inc()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        PASSWORD_HASH_PENDING.inc()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        PASSWORD_HASH_PENDING.dec()
+
+    async def run(self, operation: str, fn: Callable, *args: Any) -> Any:
+        """Run fn(*args) on the pool, raising 503 if the pool is saturated"""
+        self._acquire(operation)
+        submitted = time.monotonic()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the job itself finishes (or is cancelled
+        # before it starts), not until this request stops waiting for it: a
+        # client that disconnects mid-login must not free capacity the job
+        # still uses.
+        future.add_done_callback(lambda _: self._release())
+        result, started, elapsed = await asyncio.wrap_future(future)
+
+        PASSWORD_HASH_QUEUE_WAIT_SECONDS.labels(operation=operation).observe(
+            max(started - submitted, 0.0)
+        )
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(elapsed)
+        return result
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (called on application shutdown)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hash_pool = HashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS or (os.cpu_count() or 1),
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+)
@@ -0,0 +1,67 @@
+"""Dependency health checks for /health"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.storage import get_minio
+
+
+async def _ping_database() -> None:
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _ping_redis() -> None:
+    await get_redis().ping()
+
+
+def _minio_bucket_exists() -> bool:
+    return get_minio().bucket_exists(settings.MINIO_BUCKET)
+
+
+async def _ping_minio() -> None:
+    # Runs on a thread; the timeout below bounds the wait, urllib3's own
+    # timeouts bound the thread
+    await asyncio.to_thread(_minio_bucket_exists)
+
+
+CHECKS: dict[str, Callable[[], Awaitable[None]]] = {
+    "database": _ping_database,
+    "redis": _ping_redis,
+    "minio": _ping_minio,
+}
+
+
+def _discard_result(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run_check(check: Callable[[], Awaitable[None]], timeout: float) -> dict:
+    started = time.perf_counter()
+    task = asyncio.ensure_future(check())
+    # asyncio.wait (unlike wait_for) returns at the deadline even if the
+    # client is slow to honour cancellation, e.g. during DNS or connect
+    done, _ = await asyncio.wait({task}, timeout=timeout)
+    if not done:
+        task.cancel()
+        task.add_done_callback(_discard_result)
+        result = {"status": "timeout"}
+    elif task.exception() is not None:
+        result = {"status": "error", "error": type(task.exception()).__name__}
+    else:
+        result = {"status": "ok"}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def check_dependencies(timeout: Optional[float] = None) -> dict[str, dict]:
+    """Ping every dependency concurrently, each bounded by `timeout` seconds"""
+    timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS if timeout is None else timeout
+    results = await asyncio.gather(*(_run_check(check, timeout) for check in CHECKS.values()))
+    return dict(zip(CHECKS, results))
@@ -0,0 +1,170 @@
+"""Prometheus metrics shared across the application"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# HTTP - see app.core.middleware.PrometheusMiddleware
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a timer was due and when the event loop ran it",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# Database connection pools - see app.core.database
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a connection from the pool (includes connecting when the pool grows)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a free connection",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_open_connections",
+    "Connections currently open in the pool (idle plus checked out)",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+# Statement profiling - see app.core.query_profiler
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "Statements slower than SLOW_QUERY_MS",
+    ["pool"],
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Statements executed by a profiled request",
+    ["route"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250, 500),
+)
+DB_REPEATED_STATEMENTS = Counter(
+    "db_repeated_statement_requests_total",
+    "Profiled requests that ran one statement shape QUERY_REPEAT_THRESHOLD times or more (likely N+1)",
+    ["route"],
+)
+
+# Rate limiting - see app.core.rate_limit
+RATE_LIMIT_CHECKS = Counter(
+    "rate_limit_checks_total",
+    "Rate limit decisions by policy, result and where they were made (local lease, redis, error)",
+    ["policy", "result", "source"],
+)
+
+# Tranche pledging - see app.services.pledging
+PLEDGE_ATTEMPTS = Counter(
+    "tranche_pledges_total",
+    "Pledge attempts by outcome (accepted, replayed, or the rejection reason)",
+    ["result"],
+)
+
+# Password hashing (bcrypt) - see app.core.hashing
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent computing a bcrypt hash or verification",
+    ["operation"],
+    buckets=(0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+PASSWORD_HASH_QUEUE_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a hashing job waited for a free pool worker",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Hashing jobs currently queued or running",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Hashing jobs rejected because the pool queue was full",
+    ["operation"],
+)
+
+# Caches - see app.core.cache.TTLCache
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+
+# Audit sink - see app.services.audit
+AUDIT_EVENTS = Counter(
+    "audit_events_total",
+    "Audit records by outcome (buffered/flushed/spilled/quarantined/dropped)",
+    ["outcome"],
+)
+AUDIT_BUFFERED = Gauge(
+    "audit_buffered",
+    "Audit records waiting in memory to be flushed",
+)
+AUDIT_FLUSH_SECONDS = Histogram(
+    "audit_flush_seconds",
+    "Time to write one batch of audit records",
+)
+
+# OCR engine - see app.ocr.engine
+OCR_PAGE_SECONDS = Histogram(
+    "ocr_page_seconds",
+    "Wall time per page of an OCR extraction (cache misses only)",
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0),
+)
+
+# Transformer field extraction - see app.ocr.extraction
+EXTRACTION_BATCH_DOCUMENTS = Histogram(
+    "extraction_batch_documents",
+    "Documents merged into one forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+EXTRACTION_BATCH_SECONDS = Histogram(
+    "extraction_batch_seconds",
+    "Tokenize + forward + decode time of one extraction batch",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition payload for /metrics.
+    
+    With several worker processes, set PROMETHEUS_MULTIPROC_DIR so samples
+    from every worker are aggregated instead of only the one that answered.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,165 @@
+"""Request instrumentation and rate limiting middleware"""
+import asyncio
+import math
+import time
+from typing import Iterable, Optional
+
+from jose import JWTError, jwt
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    EVENT_LOOP_LAG_SECONDS,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+)
+from app.core.query_profiler import PROFILE_HEADER, profile_queries, report_profile
+from app.core.rate_limit import limits_for, rate_limiter
+
+
+def _route_template(scope: Scope) -> str:
+    # The router stores the matched route in the scope it was given
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class PrometheusMiddleware:
+    """Per-route request count, latency and in-flight gauges.
+
+    Requests are labelled by the matched route template (``/api/v1/invoices/{invoice_id}/ocr``),
+    never the raw path, so label cardinality stays bounded. Unmatched
+    paths share the ``unmatched`` label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels(method=method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.labels(method=method).dec()
+            template = _route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(method=method, route=template).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method=method, route=template, status=str(status_code)).inc()
+
+
+class QueryProfilerMiddleware:
+    """Per-request SQL statement profile (see app.core.query_profiler).
+
+    Outside production a request opts in by sending ``X-Query-Profile: 1``.
+    QUERY_PROFILE_ALL_REQUESTS profiles every request. The response then
+    carries X-Query-Count, X-Query-Time-Ms and X-Query-Max-Repeat, and
+    repeated statement shapes are logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _wants_profile(scope: Scope) -> bool:
+        if settings.QUERY_PROFILE_ALL_REQUESTS:
+            return True
+        if settings.ENVIRONMENT == "production":
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return value.strip().lower() in (b"1", b"true", b"yes")
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(profile.statements)
+                    headers["X-Query-Time-Ms"] = f"{profile.seconds * 1000:.1f}"
+                    headers["X-Query-Max-Repeat"] = str(max(profile.shapes.values(), default=0))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                report_profile(profile, scope["method"], _route_template(scope))
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting (see app.core.rate_limit).
+
+    Requests over the limit get a 429 with Retry-After before any handler,
+    dependency or database session runs.
+    """
+
+    def __init__(self, app: ASGIApp, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+
+    @staticmethod
+    def _subject(scope: Scope) -> Optional[str]:
+        """Subject of a valid bearer token; forged or expired tokens count as anonymous"""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token.strip():
+                    return None
+                try:
+                    payload = jwt.decode(token.strip(), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                except JWTError:
+                    return None
+                subject = payload.get("sub")
+                return str(subject) if subject is not None else None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        for key, limit in limits_for(scope["path"], self._subject(scope), client_ip):
+            retry_after = await rate_limiter.hit(key, limit)
+            if retry_after > 0:
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Rate limit exceeded"},
+                    headers={
+                        "Retry-After": str(max(math.ceil(retry_after), 1)),
+                        "X-RateLimit-Limit": f"{limit.per_minute}/minute; burst={limit.burst}",
+                    }
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Sample how late the loop runs a timer; sustained lag means CPU-bound handlers"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - expected, 0.0))
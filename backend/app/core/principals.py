@@ -0,0 +1,190 @@
+"""Cache of authenticated principals keyed by the JWT ``sub`` claim.
+
+Authorizing a request only needs a user's id, role and active flag, so these
+are cached in process (TTL + LRU) and optionally in Redis. Committed changes
+to ``User.is_active`` or ``User.role`` evict the entry locally, delete it from
+Redis and broadcast the eviction to the other workers.
+"""
+import asyncio
+import json
+import logging
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, get_redis, get_sync_redis
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.db.models.user import User
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+INVALIDATION_CHANNEL = "principal-invalidations"
+_PENDING_KEY = "principal_invalidations"
+_background_tasks: set = set()
+# Invalidation listener reconnect backoff (doubles per failed attempt)
+LISTENER_RETRY_INITIAL_SECONDS = 1.0
+LISTENER_RETRY_MAX_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The subset of a user needed to authenticate and authorize a request"""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    org_id: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        role = user.role.value if hasattr(user.role, "value") else user.role
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=role,
+            is_active=bool(user.is_active),
+            org_id=user.org_id,
+        )
+
+
+class PrincipalCache:
+    """Two-tier (process memory, then Redis) principal cache"""
+
+    def __init__(self):
+        self.local = TTLCache(
+            "principal",
+            maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+            ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+        self.use_redis = settings.PRINCIPAL_CACHE_USE_REDIS
+
+    async def get(self, sub: str) -> Optional[Principal]:
+        principal = self.local.get(sub)
+        if principal is not None or not self.use_redis:
+            return principal
+
+        try:
+            raw = await get_redis().get(REDIS_KEY_PREFIX + sub)
+        except Exception as exc:  # Redis is an optimization, never a hard dependency
+            logger.warning(f"Principal cache Redis lookup failed: {exc}")
+            return None
+        CACHE_REQUESTS.labels(cache="principal_redis", result="hit" if raw else "miss").inc()
+        if raw is None:
+            return None
+
+        principal = Principal(**json.loads(raw))
+        self.local.set(sub, principal)
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        sub = str(principal.id)
+        self.local.set(sub, principal)
+        if not self.use_redis:
+            return
+        try:
+            await get_redis().set(
+                REDIS_KEY_PREFIX + sub,
+                json.dumps(asdict(principal)),
+                ex=settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+            )
+        except Exception as exc:
+            logger.warning(f"Principal cache Redis write failed: {exc}")
+
+    def evict_local(self, subs: Iterable[str]) -> None:
+        for sub in subs:
+            self.local.delete(sub)
+
+    async def invalidate(self, subs: Iterable[str]) -> None:
+        """Evict principals everywhere (this process, Redis, other workers)"""
+        subs = list(subs)
+        self.evict_local(subs)
+        if not self.use_redis or not subs:
+            return
+        try:
+            client = get_redis()
+            await client.delete(*[REDIS_KEY_PREFIX + sub for sub in subs])
+            await client.publish(INVALIDATION_CHANNEL, json.dumps(subs))
+        except Exception as exc:
+            logger.warning(f"Principal cache Redis invalidation failed: {exc}")
+
+    def invalidate_sync(self, subs: Iterable[str]) -> None:
+        """Blocking variant of invalidate() for Celery workers and scripts"""
+        subs = list(subs)
+        self.evict_local(subs)
+        if not self.use_redis or not subs:
+            return
+        try:
+            client = get_sync_redis()
+            client.delete(*[REDIS_KEY_PREFIX + sub for sub in subs])
+            client.publish(INVALIDATION_CHANNEL, json.dumps(subs))
+        except Exception as exc:
+            logger.warning(f"Principal cache Redis invalidation failed: {exc}")
+
+    async def listen_for_invalidations(self) -> None:
+        """Evict entries invalidated by other workers (run as a background task)"""
+        if not self.use_redis:
+            return
+        delay = LISTENER_RETRY_INITIAL_SECONDS
+        reconnecting = False
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnecting:
+                    # Evictions broadcast while disconnected were missed
+                    self.local.clear()
+                    logger.info("Principal invalidation listener reconnected")
+                delay = LISTENER_RETRY_INITIAL_SECONDS
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.evict_local(json.loads(message["data"]))
+            except Exception as exc:
+                # Local TTLs still bound staleness until the broadcast is back
+                logger.warning(f"Principal invalidation listener failed, retrying in {delay:.0f}s: {exc}")
+            finally:
+                with suppress(Exception):
+                    await pubsub.close()
+            reconnecting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTENER_RETRY_MAX_SECONDS)
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+def _track_principal_changes(mapper, connection, target):
+    """Remember users whose auth-relevant fields changed in this flush"""
+    state = inspect(target)
+    if state.attrs.is_active.history.has_changes() or state.attrs.role.history.has_changes():
+        session = state.session
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(str(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    subs = session.info.pop(_PENDING_KEY, None)
+    if not subs:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        principal_cache.invalidate_sync(subs)
+    else:
+        # AsyncSession commits run inside the event loop: evict locally now and
+        # let Redis catch up without blocking the loop.
+        principal_cache.evict_local(subs)
+        task = loop.create_task(principal_cache.invalidate(subs))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_principal_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,181 @@
+"""SQL statement profiling.
+
+Every statement on both engines is timed. Statements slower than
+SLOW_QUERY_MS are logged whether or not a profile is active. Slow SELECTs
+also get their EXPLAIN plan, at most once per statement shape every few
+minutes.
+
+A profile collects every statement run inside ``profile_queries()``.
+QueryProfilerMiddleware opens one per request, when the request asks for it
+with the X-Query-Profile header (outside production), or for every request
+when QUERY_PROFILE_ALL_REQUESTS is set. Statements are grouped by shape:
+the SQL with its parameters and IN-list lengths folded away. A shape that
+repeats QUERY_REPEAT_THRESHOLD times in one request is almost always a lazy
+``relationship()`` load inside a loop (N+1). The fix is one of the option
+sets in app.db.loading.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import DB_REPEATED_STATEMENTS, DB_SLOW_QUERIES, DB_STATEMENTS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-query-profile"
+EXPLAIN_INTERVAL_SECONDS = 300  # Per statement shape
+MAX_LOGGED_STATEMENT_CHARS = 2000
+
+_PLACEHOLDER = r"(?:\$\d+|%\(\w+\)s|%s|\?)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_PLACEHOLDERS = re.compile(_PLACEHOLDER)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with its parameters and IN-list lengths folded away"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _PLACEHOLDERS.sub("?", shape)
+
+
+@dataclass
+class QueryProfile:
+    """Statements run while a profile is active"""
+    statements: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    shape_seconds: Counter = field(default_factory=Counter)
+
+    def record(self, shape: str, elapsed: float) -> None:
+        self.statements += 1
+        self.seconds += elapsed
+        self.shapes[shape] += 1
+        self.shape_seconds[shape] += elapsed
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Shapes run at least ``threshold`` times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Profile the statements run in this context.
+
+    Also covers tasks, threadpool calls and AsyncSession greenlets started
+    from it, since they all inherit the context.
+    """
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def report_profile(profile: QueryProfile, method: str, route: str) -> None:
+    """Export and log a finished request profile"""
+    DB_STATEMENTS_PER_REQUEST.labels(route=route).observe(profile.statements)
+    repeated = profile.repeated(settings.QUERY_REPEAT_THRESHOLD)
+    if repeated:
+        DB_REPEATED_STATEMENTS.labels(route=route).inc()
+        details = "\n".join(
+            f"  {count}x, {profile.shape_seconds[shape] * 1000:.1f} ms total: {shape[:MAX_LOGGED_STATEMENT_CHARS]}"
+            for shape, count in repeated
+        )
+        logger.warning(
+            f"Repeated statements in {method} {route} (likely N+1; eager-load with app.db.loading): "
+            f"{profile.statements} statements, {profile.seconds * 1000:.1f} ms\n{details}"
+        )
+    else:
+        logger.info(f"Query profile {method} {route}: {profile.statements} statements, {profile.seconds * 1000:.1f} ms")
+
+
+_explained: dict[str, float] = {}
+_explained_lock = threading.Lock()
+
+
+def _should_explain(shape: str) -> bool:
+    if not settings.SLOW_QUERY_EXPLAIN or shape[:4].upper() not in ("SELE", "WITH"):
+        return False
+    now = time.monotonic()
+    with _explained_lock:
+        if now - _explained.get(shape, -EXPLAIN_INTERVAL_SECONDS) < EXPLAIN_INTERVAL_SECONDS:
+            return False
+        if len(_explained) > 1000:
+            _explained.clear()
+        _explained[shape] = now
+    return True
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """Plan for a statement that just ran, fetched on the same connection.
+
+    Plain EXPLAIN (no ANALYZE) so nothing runs twice. It goes straight
+    through the DBAPI cursor, so it is not itself profiled, and inside a
+    savepoint, so a failure cannot abort the caller's transaction.
+    """
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                plan = "\n".join(str(row[0]) for row in cursor.fetchall())
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        finally:
+            cursor.close()
+    except Exception as exc:
+        logger.debug(f"Could not EXPLAIN slow query: {exc}")
+        return None
+
+
+def instrument(engine: Engine, label: str) -> None:
+    """Time every statement on a (sync) engine; pass ``async_engine.sync_engine`` for the async one"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiler_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profiler_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        profile = _current.get()
+        slow = settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS
+        if profile is None and not slow:
+            return
+
+        shape = statement_shape(statement)
+        if profile is not None:
+            profile.record(shape, elapsed)
+        if slow:
+            DB_SLOW_QUERIES.labels(pool=label).inc()
+            plan = None
+            # Server-side cursors are still open on the connection; leave them be
+            if not executemany and not context.execution_options.get("stream_results") and _should_explain(shape):
+                plan = _explain(conn, statement, parameters)
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.0f} ms, {label}): {shape[:MAX_LOGGED_STATEMENT_CHARS]}"
+                + (f"\n{plan}" if plan else "")
+            )
@@ -0,0 +1,189 @@
+"""Distributed token-bucket rate limiting.
+
+Buckets live in Redis and are updated by one Lua script, so every uvicorn
+worker on every node draws from the same bucket and the refill clock is
+Redis' own (TIME), not each node's. A bucket refills at ``per_minute / 60``
+tokens per second up to ``burst`` tokens.
+
+Most checks never reach Redis. Each worker takes a small lease of tokens per
+key (RATE_LIMIT_LEASE_TOKENS). It spends the lease locally until the lease
+is used up or RATE_LIMIT_LEASE_SECONDS pass. Leased tokens are already
+debited in Redis, so a key can never exceed its global rate. An unused lease
+is forfeited when it expires, so the error is always on the strict side. A
+denial is cached locally until the bucket's retry-after, so a client
+hammering a drained bucket is turned away without a Redis call per request.
+
+If Redis is unavailable the limiter fails open: requests are allowed and
+the error is counted. After an error, Redis is not tried again for
+RATE_LIMIT_COOLDOWN_SECONDS (a circuit breaker). Requests are served from
+existing local leases and denials, and otherwise allowed, so an unreachable
+Redis never adds its timeout to every request.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import TTLCache, get_redis
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_CHECKS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+ERROR_LOG_INTERVAL_SECONDS = 30
+
+# KEYS[1] bucket hash; ARGV: refill rate (tokens/s), capacity, tokens wanted.
+# Grants up to the wanted number of whole tokens (possibly 0) and returns
+# {granted, retry_after_ms}
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+local retry_after_ms = 0
+if granted == 0 then
+    retry_after_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {granted, retry_after_ms}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A bucket policy: sustained rate and burst size"""
+    name: str
+    per_minute: int
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass
+class _Lease:
+    tokens: int = 0
+    expires_at: float = 0.0
+    blocked_until: float = 0.0
+
+
+class RateLimiter:
+    """Token buckets in Redis with a per-worker lease fast path"""
+
+    def __init__(self, lease_tokens: int, lease_seconds: float, cooldown_seconds: float):
+        self.lease_tokens = lease_tokens
+        self.lease_seconds = lease_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._redis_retry_at = 0.0
+        self._leases = TTLCache("rate_limit_lease", maxsize=100000, ttl=lease_seconds)
+        self._script = None
+        self._last_error_log = 0.0
+
+    def _lease_size(self, limit: RateLimit) -> int:
+        # Never lease more than a quarter of a bucket, so workers share it
+        return max(1, min(self.lease_tokens, limit.burst // 4))
+
+    def _get_script(self):
+        client = get_redis()
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        """Take one token for ``key``; returns 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None:
+            if lease.blocked_until > now:
+                RATE_LIMIT_CHECKS.labels(policy=limit.name, result="limited", source="local").inc()
+                return lease.blocked_until - now
+            if lease.tokens > 0 and lease.expires_at > now:
+                lease.tokens -= 1
+                RATE_LIMIT_CHECKS.labels(policy=limit.name, result="allowed", source="local").inc()
+                return 0.0
+
+        if now < self._redis_retry_at:
+            RATE_LIMIT_CHECKS.labels(policy=limit.name, result="allowed", source="error").inc()
+            return 0.0
+
+        wanted = self._lease_size(limit) if self.lease_tokens > 0 else 1
+        try:
+            granted, retry_after_ms = await self._get_script()(
+                keys=[f"{KEY_PREFIX}{limit.name}:{key}"],
+                args=[limit.rate, limit.burst, wanted],
+            )
+        except Exception as exc:
+            RATE_LIMIT_CHECKS.labels(policy=limit.name, result="allowed", source="error").inc()
+            self._redis_retry_at = time.monotonic() + self.cooldown_seconds
+            if now - self._last_error_log > ERROR_LOG_INTERVAL_SECONDS:
+                self._last_error_log = now
+                logger.warning(
+                    f"Rate limiter unavailable, allowing requests for {self.cooldown_seconds:.0f}s: {exc}"
+                )
+            return 0.0
+
+        now = time.monotonic()
+        if int(granted) == 0:
+            retry_after = int(retry_after_ms) / 1000
+            self._leases.set(key, _Lease(blocked_until=now + retry_after), ttl=retry_after)
+            RATE_LIMIT_CHECKS.labels(policy=limit.name, result="limited", source="redis").inc()
+            return retry_after
+
+        if int(granted) > 1:
+            # Merge with tokens other in-flight requests may have leased meanwhile
+            current = self._leases.get(key)
+            spare = int(granted) - 1
+            if current is not None and current.expires_at > now and current.blocked_until <= now:
+                spare += current.tokens
+            self._leases.set(key, _Lease(tokens=spare, expires_at=now + self.lease_seconds))
+        RATE_LIMIT_CHECKS.labels(policy=limit.name, result="allowed", source="redis").inc()
+        return 0.0
+
+
+DEFAULT_LIMIT = RateLimit("default", settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+AUTH_LIMIT = RateLimit("auth", settings.RATE_LIMIT_AUTH_PER_MINUTE, settings.RATE_LIMIT_AUTH_BURST)
+
+# Unauthenticated endpoints that do expensive work (bcrypt) get their own,
+# stricter per-IP bucket on top of the default one
+ROUTE_LIMITS: dict[str, RateLimit] = {
+    f"{settings.API_V1_PREFIX}/auth/login": AUTH_LIMIT,
+    f"{settings.API_V1_PREFIX}/auth/register": AUTH_LIMIT,
+}
+
+
+def limits_for(path: str, subject: Optional[str], client_ip: str) -> list[tuple[str, RateLimit]]:
+    """The (bucket key, policy) pairs a request must pass.
+
+    Authenticated requests are keyed by token subject, so many users behind
+    one NAT do not share a bucket. Everything else is keyed by client IP.
+    """
+    identity = f"user:{subject}" if subject else f"ip:{client_ip}"
+    checks = [(identity, DEFAULT_LIMIT)]
+    route_limit = ROUTE_LIMITS.get(path)
+    if route_limit is not None:
+        checks.append((f"{path}:ip:{client_ip}", route_limit))
+    return checks
+
+
+rate_limiter = RateLimiter(
+    lease_tokens=settings.RATE_LIMIT_LEASE_TOKENS,
+    lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS,
+    cooldown_seconds=settings.RATE_LIMIT_COOLDOWN_SECONDS,
+)
@@ -0,0 +1,95 @@
+"""Readiness gate.
+
+Importing the application touches no external service. Readiness is worked
+out after startup, and again on demand. The app is ready once the database
+answers and its schema is at the Alembic head revision. Until then, API
+requests get a 503 with Retry-After, and /ready tells the load balancer
+to hold traffic.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def expected_revision() -> Optional[str]:
+    """Head revision of the migration scripts shipped with this build"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+class ReadinessGate:
+    """Tracks whether the app can serve traffic; checks are rate-limited"""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.ready = False
+        self.reason = "starting"
+        self._head: Optional[str] = None
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> bool:
+        """Re-check readiness unless ready already or checked very recently"""
+        if self.ready or time.monotonic() - self._last_check < self.check_interval:
+            return self.ready
+        async with self._lock:
+            if self.ready or time.monotonic() - self._last_check < self.check_interval:
+                return self.ready
+            self._last_check = time.monotonic()
+            self.reason = await self._probe()
+            self.ready = self.reason is None
+            if self.ready:
+                logger.info("Application is ready")
+        return self.ready
+
+    async def _probe(self) -> Optional[str]:
+        """None when ready, otherwise why not"""
+        try:
+            async with async_engine.connect() as conn:
+                current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+        except Exception as exc:
+            return f"database unavailable or not migrated ({type(exc).__name__})"
+        if not settings.READINESS_REQUIRE_SCHEMA_HEAD:
+            return None
+        if self._head is None:
+            self._head = await asyncio.to_thread(expected_revision)
+        if current != self._head:
+            return f"schema at revision {current}, expected {self._head}; run 'alembic upgrade head'"
+        return None
+
+    async def wait_until_ready(self) -> None:
+        """Background warm-up: poll until ready, then run one-off maintenance"""
+        while not await self.check():
+            logger.info(f"Not ready yet: {self.reason}")
+            await asyncio.sleep(self.check_interval)
+        await asyncio.to_thread(_ensure_audit_partitions)
+
+
+def _ensure_audit_partitions() -> None:
+    # Normally kept ahead by the housekeeping beat job; covers deployments
+    # where beat has not run for a while
+    from app.services.audit_retention import ensure_partitions
+
+    try:
+        with engine.begin() as conn:
+            ensure_partitions(conn)
+    except Exception as exc:
+        logger.warning(f"Could not ensure audit log partitions: {exc}")
+
+
+readiness_gate = ReadinessGate(check_interval=settings.READINESS_CHECK_INTERVAL_SECONDS)
@@ -4,10 +4,13 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.hashing import password_hash_pool
+from app.core.principals import Principal, principal_cache
 from app.db.models.user import User
 
 # Password hashing
@@ -27,6 +30,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run("hash", get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -54,37 +67,75 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+def _subject_from_credentials(credentials: HTTPAuthorizationCredentials) -> str:
+    """Decode the bearer token and return its (numeric) subject"""
+    payload = decode_access_token(credentials.credentials)
     
     user_id: str = payload.get("sub")
-    if user_id is None:
+    if user_id is None or not str(user_id).isdigit():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+    return str(user_id)
+
+
+def _ensure_active(principal: Principal) -> Principal:
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    return principal
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user"""
+    user_id = _subject_from_credentials(credentials)
     
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == int(user_id)))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
     
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user"
-        )
+    principal = Principal.from_user(user)
+    await principal_cache.set(principal)
+    _ensure_active(principal)
     
     return user
 
 
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """Get the current authenticated principal, from cache when possible.
+    
+    Unlike get_current_user this only opens a database session on a cache miss.
+    """
+    user_id = _subject_from_credentials(credentials)
+    
+    principal = await principal_cache.get(user_id)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).where(User.id == int(user_id)))
+            user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        principal = Principal.from_user(user)
+        await principal_cache.set(principal)
+    
+    return _ensure_active(principal)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -95,12 +146,14 @@ async def get_current_active_user(
 
 
 def require_role(allowed_roles: list[str]):
-    """Dependency to require specific roles"""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        if current_user.role not in allowed_roles:
+    """Dependency to require specific roles (authorizes from the principal cache)"""
+    allowed = {getattr(role, "value", role) for role in allowed_roles}
+    
+    async def role_checker(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if principal.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Role '{current_user.role}' not authorized for this action"
+                detail=f"Role '{principal.role}' not authorized for this action"
             )
-        return current_user
+        return principal
     return role_checker
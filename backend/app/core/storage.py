@@ -0,0 +1,64 @@
+"""Shared MinIO (S3) client"""
+import threading
+from typing import Optional
+
+import urllib3
+from minio import Minio
+
+from app.core.config import settings
+
+_client: Optional[Minio] = None
+_http: Optional[urllib3.PoolManager] = None
+_bucket_ready = False
+_lock = threading.Lock()
+
+
+def _http_client() -> urllib3.PoolManager:
+    """Keep-alive connection pool shared by every MinIO call in this process"""
+    return urllib3.PoolManager(
+        maxsize=settings.MINIO_MAX_POOL_SIZE,
+        block=True,  # wait for a pooled connection rather than open extra ones
+        timeout=urllib3.Timeout(connect=5.0, read=settings.MINIO_TIMEOUT_SECONDS),
+        retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        cert_reqs="CERT_REQUIRED" if settings.MINIO_USE_SSL else "CERT_NONE",
+    )
+
+
+def init_minio() -> Minio:
+    """Create the shared client and make sure the bucket exists (called from the app lifespan)"""
+    global _client, _http, _bucket_ready
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _http = _http_client()
+                _client = Minio(
+                    settings.MINIO_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_USE_SSL,
+                    http_client=_http,
+                )
+    if not _bucket_ready:
+        with _lock:
+            if not _bucket_ready:
+                if not _client.bucket_exists(settings.MINIO_BUCKET):
+                    _client.make_bucket(settings.MINIO_BUCKET)
+                _bucket_ready = True
+    return _client
+
+
+def close_minio() -> None:
+    global _client, _http, _bucket_ready
+    with _lock:
+        if _http is not None:
+            _http.clear()
+        _client = None
+        _http = None
+        _bucket_ready = False
+
+
+def get_minio() -> Minio:
+    """Shared MinIO client; usable directly or as a FastAPI dependency"""
+    if _client is not None and _bucket_ready:
+        return _client
+    return init_minio()
@@ -0,0 +1,25 @@
+"""Loader option sets for list views.
+
+Every model relationship is a plain lazy ``relationship()``. Touching one
+while serializing a list issues one query per row (N+1). Synchronously that
+is just slow. On an AsyncSession it fails with MissingGreenlet. List
+queries apply one of these sets with ``.options(*SET)`` so each related
+table is read once per page. A set for a view that serializes relationships
+plans each of them:
+
+- ``joinedload`` for many-to-one parents that are mostly distinct per row
+  (a tranche's invoice). The parent rides along in the same statement.
+- ``selectinload`` for parents shared by many rows (the agent behind a batch
+  of attestations). One ``IN`` query fetches each distinct parent once.
+- ``raiseload("*")`` closes every set, so any relationship the set did not
+  plan for raises instead of quietly lazy-loading.
+
+A request sent with ``X-Query-Profile: 1`` reports its statement count and
+any repeated statement shapes (see app.core.query_profiler).
+"""
+from sqlalchemy.orm import raiseload
+
+# Invoice rows serialize their own columns only
+INVOICE_LIST = (
+    raiseload("*"),
+)
@@ -4,9 +4,13 @@ from app.db.models.organization import Organization
 from app.db.models.customer import Customer
 from app.db.models.invoice import Invoice, InvoiceStatus
 from app.db.models.tranche import Tranche, TrancheStatus
+from app.db.models.pledge import Pledge, PledgeStatus
+from app.db.models.marketplace_listing import MarketplaceListing
 from app.db.models.attestation import Attestation
 from app.db.models.score_cache import ScoreCache
 from app.db.models.audit_log import AuditLog
+from app.db.models.entity_features import EntityFeatures
+from app.db.models.cashflow_forecast import CashflowForecast
 
 __all__ = [
     "User",
@@ -17,7 +21,12 @@ __all__ = [
     "InvoiceStatus",
     "Tranche",
     "TrancheStatus",
+    "Pledge",
+    "PledgeStatus",
+    "MarketplaceListing",
     "Attestation",
     "ScoreCache",
     "AuditLog",
+    "EntityFeatures",
+    "CashflowForecast",
 ]
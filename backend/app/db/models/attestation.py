@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -59,6 +59,3 @@ class Attestation(Base):
     
     def __repr__(self):
         return f"<Attestation {self.id} for Invoice {self.invoice_id}>"
-
-
-from sqlalchemy import Boolean
@@ -1,14 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
 
 class AuditLog(Base):
-    """Audit log model - track all important actions"""
+    """Audit log model - track all important actions
+    
+    Range-partitioned by month on created_at (see alembic revision 0003 and
+    app.services.audit_retention), so created_at is part of the primary key.
+    """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_org_created", "org_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Actor
     actor_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
@@ -36,7 +44,7 @@ class AuditLog(Base):
     error_message = Column(Text, nullable=True)
     
     # Timestamp
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
     
     def __repr__(self):
         return f"<AuditLog {self.action} by {self.actor_name}>"
@@ -0,0 +1,47 @@
+from sqlalchemy import Boolean, Column, Integer, String, Numeric, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class CashflowForecast(Base):
+    """Fitted cashflow model and its forecast for one organization.
+
+    Keyed by (org_id, data_watermark): the watermark summarizes the paid
+    invoices the model was fitted on, so a row stays current until new
+    payments move it. Maintained by app.ml.forecasting.
+    """
+    __tablename__ = "cashflow_forecasts"
+    __table_args__ = (
+        Index("uq_cashflow_forecasts_org_watermark", "org_id", "data_watermark", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    data_watermark = Column(String, nullable=False)  # "<payments>:<total paid>:<last payment>"
+    
+    # Training window (daily series)
+    history_start = Column(DateTime(timezone=True), nullable=False)
+    history_end = Column(DateTime(timezone=True), nullable=False)
+    history_days = Column(Integer, nullable=False)
+    total_paid = Column(Numeric(18, 2), nullable=False)
+    
+    # Model
+    model_type = Column(String, nullable=False)  # prophet
+    model_version = Column(String, nullable=False)
+    model_json = deferred(Column(Text, nullable=False))  # prophet.serialize.model_to_json
+    warm_started = Column(Boolean, nullable=False, default=False)  # initialized from the previous fit
+    fit_seconds = Column(Numeric(10, 3), nullable=True)
+    
+    # Forecast: JSON list of {"date", "yhat", "yhat_lower", "yhat_upper"}
+    horizon_days = Column(Integer, nullable=False)
+    forecast_json = Column(Text, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Relationships
+    organization = relationship("Organization")
+    
+    def __repr__(self):
+        return f"<CashflowForecast org={self.org_id} @ {self.data_watermark}>"
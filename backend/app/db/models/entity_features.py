@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class EntityFeatures(Base):
+    """Precomputed invoice aggregates per organization / customer (feature store)"""
+    __tablename__ = "entity_features"
+    __table_args__ = (
+        Index("uq_entity_features_entity", "entity_type", "entity_id", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Entity (organization or customer)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    
+    # Credit model features (see app.ml.scoring.FEATURE_NAMES)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total_invoiced = Column(Numeric(18, 2), nullable=False, default=0)
+    paid_ratio = Column(Numeric(10, 6), nullable=True)
+    overdue_ratio = Column(Numeric(10, 6), nullable=True)
+    avg_days_to_pay = Column(Numeric(10, 2), nullable=True)
+    avg_days_past_due = Column(Numeric(10, 2), nullable=True)
+    
+    # Open receivables and days-past-due distribution
+    open_count = Column(Integer, nullable=False, default=0)
+    outstanding_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    dpd_current = Column(Integer, nullable=False, default=0)
+    dpd_1_30 = Column(Integer, nullable=False, default=0)
+    dpd_31_60 = Column(Integer, nullable=False, default=0)
+    dpd_61_90 = Column(Integer, nullable=False, default=0)
+    dpd_over_90 = Column(Integer, nullable=False, default=0)
+    
+    # Rolling turnover (total invoiced by issue date)
+    turnover_30d = Column(Numeric(18, 2), nullable=False, default=0)
+    turnover_90d = Column(Numeric(18, 2), nullable=False, default=0)
+    turnover_365d = Column(Numeric(18, 2), nullable=False, default=0)
+    
+    # Customer concentration (organizations only)
+    customer_count = Column(Integer, nullable=True)
+    top_customer_share = Column(Numeric(10, 6), nullable=True)  # 0-1
+    
+    # Time-dependent columns (dpd, turnover) are as of this timestamp
+    computed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<EntityFeatures {self.entity_type}:{self.entity_id}>"
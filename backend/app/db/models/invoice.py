@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Numeric, DateTime, Text, Enum as SQLEnum, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,9 +17,23 @@ class InvoiceStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# Unpaid invoices that become OVERDUE once due_date passes (SQLEnum stores the names)
+AWAITING_PAYMENT_PREDICATE = text("status IN ('ISSUED', 'PAYMENT_PENDING', 'PARTIALLY_PAID')")
+
+
 class Invoice(Base):
     """Invoice model"""
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Keyset pagination: WHERE org_id = ? [AND status = ?] ORDER BY ..., id
+        Index("ix_invoices_org_status_due_id", "org_id", "status", "due_date", "id"),
+        Index("ix_invoices_org_due_id", "org_id", "due_date", "id"),
+        # Cashflow series and forecast watermarks (index-only over payments)
+        Index("ix_invoices_org_payment_date", "org_id", "payment_date",
+              postgresql_include=["amount_paid"], postgresql_where=text("payment_date IS NOT NULL")),
+        # Overdue sweep (app.services.overdue): only invoices still awaiting payment
+        Index("ix_invoices_awaiting_due", "due_date", "id", postgresql_where=AWAITING_PAYMENT_PREDICATE),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -72,6 +86,3 @@ class Invoice(Base):
     
     def __repr__(self):
         return f"<Invoice {self.invoice_number} - {self.total_amount} {self.currency}>"
-
-
-from sqlalchemy import Boolean
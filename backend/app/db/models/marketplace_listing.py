@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum as SQLEnum, ForeignKey, Index, text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.db.models.tranche import TrancheStatus
+
+# Statuses an investor can still pledge to (SQLEnum stores the names)
+LISTED_PREDICATE = text("status IN ('OPEN', 'FUNDING')")
+
+# Sort keys are NOT NULL so keyset pagination is a plain row comparison:
+# no deadline sorts last, no stated return sorts below any real one
+NO_DEADLINE = datetime(9999, 12, 31, tzinfo=timezone.utc)
+NO_RETURN = -1
+
+
+class MarketplaceListing(Base):
+    """Denormalized, read-optimized copy of each tranche for marketplace browsing.
+
+    Maintained by app.services.marketplace. Browse queries only touch this
+    table, through partial indexes over pledgeable rows.
+    """
+    __tablename__ = "marketplace_listings"
+    __table_args__ = (
+        # Descending sorts scan these backwards
+        Index("ix_marketplace_listed_deadline", "sort_deadline", "tranche_id",
+              postgresql_where=LISTED_PREDICATE),
+        Index("ix_marketplace_listed_return", "sort_return", "tranche_id",
+              postgresql_where=LISTED_PREDICATE),
+        Index("ix_marketplace_listed_remaining", "remaining_amount", "tranche_id",
+              postgresql_where=LISTED_PREDICATE),
+        Index("ix_marketplace_listed_band_return", "risk_band", "sort_return", "tranche_id",
+              postgresql_where=LISTED_PREDICATE),
+    )
+
+    tranche_id = Column(Integer, ForeignKey("tranches.id", ondelete="CASCADE"), primary_key=True)
+    invoice_id = Column(Integer, nullable=False)
+    org_id = Column(Integer, nullable=False)
+    tranche_number = Column(String, nullable=False)
+    currency = Column(String, nullable=True)
+
+    # Browse filters / sort keys
+    status = Column(SQLEnum(TrancheStatus), nullable=False)
+    risk_band = Column(String, nullable=True)
+    risk_score = Column(Numeric(5, 2), nullable=True)
+    return_percentage = Column(Numeric(5, 2), nullable=True)
+    funding_deadline = Column(DateTime(timezone=True), nullable=True)
+    maturity_date = Column(DateTime(timezone=True), nullable=True)
+    invoice_due_date = Column(DateTime(timezone=True), nullable=True)
+    sort_deadline = Column(DateTime(timezone=True), nullable=False)  # funding_deadline or NO_DEADLINE
+    sort_return = Column(Numeric(5, 2), nullable=False)  # return_percentage or NO_RETURN
+
+    # Funding progress
+    target_amount = Column(Numeric(15, 2), nullable=False)
+    pledged_amount = Column(Numeric(15, 2), nullable=False)
+    remaining_amount = Column(Numeric(15, 2), nullable=False)
+    minimum_investment = Column(Numeric(15, 2), nullable=True)
+    maximum_investment = Column(Numeric(15, 2), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<MarketplaceListing {self.tranche_number} - {self.remaining_amount} left>"
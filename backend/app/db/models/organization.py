@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -48,6 +48,3 @@ class Organization(Base):
     
     def __repr__(self):
         return f"<Organization {self.name}>"
-
-
-from sqlalchemy import Boolean
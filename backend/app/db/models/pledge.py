@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum as SQLEnum, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from app.core.database import Base
+
+
+class PledgeStatus(str, enum.Enum):
+    """Pledge status enum"""
+    PLEDGED = "pledged"
+    SETTLED = "settled"
+    CANCELLED = "cancelled"
+
+
+class Pledge(Base):
+    """Pledge model - an investor's commitment to part of a tranche"""
+    __tablename__ = "pledges"
+    __table_args__ = (
+        # A client retrying a pledge (same Idempotency-Key) gets the original back
+        Index("uq_pledges_investor_idempotency_key", "investor_id", "idempotency_key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    tranche_id = Column(Integer, ForeignKey("tranches.id"), nullable=False, index=True)
+    investor_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    amount = Column(Numeric(15, 2), nullable=False)
+    status = Column(SQLEnum(PledgeStatus), default=PledgeStatus.PLEDGED, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    tranche = relationship("Tranche")
+    investor = relationship("User")
+
+    def __repr__(self):
+        return f"<Pledge {self.id} - {self.amount} on Tranche {self.tranche_id}>"
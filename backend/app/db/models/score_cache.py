@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -8,6 +8,10 @@ from app.core.database import Base
 class ScoreCache(Base):
     """Credit score cache model"""
     __tablename__ = "score_cache"
+    __table_args__ = (
+        # One current score per entity; upserted on recompute
+        Index("uq_score_cache_entity", "entity_type", "entity_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -45,4 +49,3 @@ class ScoreCache(Base):
     
     def __repr__(self):
         return f"<ScoreCache {self.entity_type}:{self.entity_id} = {self.score}>"
-
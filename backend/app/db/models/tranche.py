@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, Enum as SQLEnum, ForeignKey
+from sqlalchemy import CheckConstraint, Column, Integer, String, Numeric, DateTime, Text, Enum as SQLEnum, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,6 +21,10 @@ class TrancheStatus(str, enum.Enum):
 class Tranche(Base):
     """Tranche model - invoice financing micro-shares"""
     __tablename__ = "tranches"
+    __table_args__ = (
+        # Last line of defence behind the conditional UPDATE in app.services.pledging
+        CheckConstraint("pledged_amount <= target_amount", name="ck_tranches_not_overfunded"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -33,7 +37,7 @@ class Tranche(Base):
     price = Column(Numeric(15, 2), nullable=False)  # Purchase price (may include discount)
     
     # Funding
-    pledged_amount = Column(Numeric(15, 2), default=0)
+    pledged_amount = Column(Numeric(15, 2), default=0, server_default="0", nullable=False)
     funded_amount = Column(Numeric(15, 2), default=0)
     target_amount = Column(Numeric(15, 2), nullable=False)
     
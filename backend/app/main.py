@@ -1,11 +1,29 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
 
+from app.core.cache import close_redis, close_sync_redis, init_redis
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine
+from app.core.health import check_dependencies
+from app.core.hashing import password_hash_pool
+from app.core.metrics import render_metrics
+from app.core.middleware import (
+    PrometheusMiddleware,
+    QueryProfilerMiddleware,
+    RateLimitMiddleware,
+    monitor_event_loop_lag,
+)
+from app.core.principals import principal_cache
+from app.core.readiness import readiness_gate
+from app.core.storage import close_minio, init_minio
+from app.ocr.engine import ocr_engine
+from app.ocr.extraction import field_extractor
+from app.services.audit import audit_sink
 from app.api.v1.router import api_router
 
 # Configure logging
@@ -15,8 +33,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Paths served even before the app is ready (probes, docs)
+READINESS_EXEMPT_PATHS = {"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+
+async def _init_storage():
+    try:
+        await asyncio.to_thread(init_minio)
+    except Exception as exc:
+        # Retried on first use; /health reports it meanwhile
+        logger.warning(f"MinIO not reachable at startup: {exc}")
+
+
+async def _warm_field_extractor():
+    try:
+        await field_extractor.start()
+    except Exception as exc:
+        # Retried on the first extraction; OCR falls back to the regex fields
+        logger.warning(f"Extraction model not loaded at startup: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown"""
+    init_redis()
+    audit_sink.start()
+    # Nothing below blocks startup on a network round-trip
+    background = [
+        asyncio.create_task(_init_storage()),
+        asyncio.create_task(principal_cache.listen_for_invalidations()),
+        asyncio.create_task(readiness_gate.wait_until_ready()),
+        asyncio.create_task(monitor_event_loop_lag()),
+    ]
+    if field_extractor.enabled and settings.EXTRACTION_WARMUP:
+        background.append(asyncio.create_task(_warm_field_extractor()))
+    yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hash_pool.shutdown()
+    ocr_engine.shutdown()
+    await field_extractor.stop()
+    audit_sink.stop()
+    await close_redis()
+    close_sync_redis()
+    close_minio()
+    await async_engine.dispose()
+    engine.dispose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -25,9 +90,14 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
+# Rate limiting; added before CORS so it sits inside it: CORS answers
+# preflights itself and 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware, exempt_paths=READINESS_EXEMPT_PATHS)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -37,6 +107,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+
+@app.middleware("http")
+async def readiness_middleware(request: Request, call_next):
+    """Hold API traffic with a 503 until the database is reachable and migrated"""
+    if request.url.path not in READINESS_EXEMPT_PATHS and not await readiness_gate.check():
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is starting", "reason": readiness_gate.reason},
+            headers={"Retry-After": str(max(int(settings.READINESS_CHECK_INTERVAL_SECONDS), 1))}
+        )
+    return await call_next(request)
+
+# Opt-in statement profiles (X-Query-Profile header outside production)
+app.add_middleware(QueryProfilerMiddleware)
+
+# Outermost, so latency covers the other middleware too
+app.add_middleware(PrometheusMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -54,12 +143,38 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring"""
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "redis": "connected"
-    }
+    """Health check endpoint for monitoring.
+    
+    Pings the database, Redis and MinIO concurrently, each bounded by
+    HEALTH_CHECK_TIMEOUT_SECONDS; returns 503 if any of them fails.
+    """
+    checks = await check_dependencies()
+    healthy = all(check["status"] == "ok" for check in checks.values())
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            **{name: "connected" if check["status"] == "ok" else check["status"] for name, check in checks.items()},
+            "checks": checks,
+        }
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the database is reachable and at the migration head"""
+    ready = await readiness_gate.check()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "reason": readiness_gate.reason}
+    )
 
 
 @app.exception_handler(Exception)
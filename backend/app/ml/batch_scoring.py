@@ -0,0 +1,208 @@
+"""Portfolio-wide batch rescoring.
+
+Entities are split into shards (``entity_id % shards``). Each shard walks its
+entities in id order, in batches of SCORING_BATCH_SIZE. For each batch it
+reads the precomputed feature vectors from the feature store (aggregating
+the invoices, in one grouped query, for entities it has no row for), builds
+a pandas feature matrix, runs one LightGBM predict and one SHAP call, and
+bulk-upserts the score_cache rows. After every batch the shard saves a checkpoint (last
+entity id) in Redis, so an interrupted run resumes where it stopped when
+started again with the same run id. The checkpoint also records the shard
+count, since checkpoints are only meaningful for the same ``id % shards``
+split: a resume without an explicit count reuses it, and one with a different
+count is refused. Shards run in parallel across processes
+(ProcessPoolExecutor here, or one Celery task per shard).
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.cache import get_sync_redis
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.db.models.customer import Customer
+from app.db.models.organization import Organization
+from app.ml.scoring import FEATURE_NAMES, entity_filter, feature_query, score_features
+from app.services.feature_store import get_feature_vectors
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "rescore:{run_id}:{entity_type}"
+CHECKPOINT_TTL_SECONDS = 7 * 86400
+SHARDS_FIELD = "shards"
+
+
+class ShardCountMismatchError(ValueError):
+    """A run is being resumed with a different shard count than it started with"""
+
+
+@dataclass
+class ShardResult:
+    shard: int
+    entities: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    resumed_from: int = 0
+
+    @property
+    def entities_per_second(self) -> float:
+        return self.entities / self.seconds if self.seconds else 0.0
+
+
+def _entity_table(entity_type: str):
+    if entity_type == "organization":
+        return Organization
+    if entity_type == "customer":
+        return Customer
+    raise ValueError(f"Unsupported entity type: {entity_type}")
+
+
+def _checkpoint_key(run_id: str, entity_type: str) -> str:
+    return CHECKPOINT_KEY.format(run_id=run_id, entity_type=entity_type)
+
+
+def claim_shards(run_id: str, entity_type: str, shards: Optional[int], default: Optional[int] = None) -> int:
+    """Shard count for a run: recorded on first use, enforced on resume.
+
+    With shards=None a resumed run keeps its recorded count and a new run
+    uses default (SCORING_WORKERS, or the CPU count, when not given).
+    """
+    redis = get_sync_redis()
+    checkpoint_key = _checkpoint_key(run_id, entity_type)
+    recorded = redis.hget(checkpoint_key, SHARDS_FIELD)
+    if recorded is None:
+        shards = shards or default or settings.SCORING_WORKERS or (os.cpu_count() or 1)
+        if redis.hsetnx(checkpoint_key, SHARDS_FIELD, shards):
+            redis.expire(checkpoint_key, CHECKPOINT_TTL_SECONDS)
+            return shards
+        recorded = redis.hget(checkpoint_key, SHARDS_FIELD)
+    recorded = int(recorded)
+    if shards is not None and shards != recorded:
+        raise ShardCountMismatchError(
+            f"Rescore {run_id} was started with {recorded} shards; resume it with {recorded}, not {shards}"
+        )
+    return recorded
+
+
+def load_features(db, entity_type: str, entity_ids: list[int]):
+    """Feature matrix (DataFrame indexed by entity id) for a batch of entities"""
+    import pandas as pd
+
+    vectors = get_feature_vectors(db, entity_type, entity_ids)
+    missing = [entity_id for entity_id in entity_ids if entity_id not in vectors]
+    if missing:
+        # Entities the store has not seen yet (e.g. not backfilled after an
+        # upgrade): aggregate their invoices, as compute_features does
+        rows = db.execute(
+            feature_query(entity_type).where(entity_filter(entity_type).in_(missing))
+        ).mappings()
+        for row in rows:
+            vectors[row["entity_id"]] = {name: float(row[name] or 0) for name in FEATURE_NAMES}
+    frame = pd.DataFrame.from_dict(vectors, orient="index", columns=list(FEATURE_NAMES))
+    # Entities without (non-draft) invoices have no aggregates: all-zero features
+    return frame.astype(float).reindex(entity_ids, fill_value=0.0)
+
+
+def rescore_shard(
+    entity_type: str,
+    shard: int,
+    shards: int,
+    run_id: str,
+    batch_size: Optional[int] = None,
+    explain: bool = True,
+) -> dict:
+    """Rescore every entity in one shard, resuming from its checkpoint"""
+    from app.services.score_service import score_service, upsert_scores
+
+    # Never reuse pooled connections inherited from a forking parent
+    engine.dispose(close=False)
+
+    batch_size = batch_size or settings.SCORING_BATCH_SIZE
+    table = _entity_table(entity_type)
+    redis = get_sync_redis()
+    checkpoint_key = _checkpoint_key(run_id, entity_type)
+    claim_shards(run_id, entity_type, shards)
+    last_id = int(redis.hget(checkpoint_key, str(shard)) or 0)
+    result = ShardResult(shard=shard, resumed_from=last_id)
+    started = time.perf_counter()
+
+    with SessionLocal() as db:
+        while True:
+            query = (
+                select(table.id, table.org_id if entity_type == "customer" else table.id.label("org_id"))
+                .where(table.id > last_id)
+                .order_by(table.id)
+                .limit(batch_size)
+            )
+            if shards > 1:
+                query = query.where(table.id % shards == shard)
+            batch = db.execute(query).all()
+            if not batch:
+                break
+
+            entity_ids = [row[0] for row in batch]
+            org_ids = {row[0]: row[1] for row in batch}
+            frame = load_features(db, entity_type, entity_ids)
+            scores = score_features(frame, explain=explain)
+
+            rows = []
+            for entity_id, score in zip(entity_ids, scores):
+                score.update({"entity_type": entity_type, "entity_id": entity_id, "org_id": org_ids[entity_id]})
+                rows.append(score)
+            upsert_scores(db, rows)
+            db.commit()
+
+            score_service.invalidate_sync((entity_type, entity_id) for entity_id in entity_ids)
+            last_id = entity_ids[-1]
+            redis.hset(checkpoint_key, str(shard), last_id)
+            redis.expire(checkpoint_key, CHECKPOINT_TTL_SECONDS)
+
+            result.entities += len(entity_ids)
+            result.batches += 1
+            result.seconds = time.perf_counter() - started
+            logger.info(
+                f"Rescore {run_id} shard {shard}/{shards}: {result.entities} {entity_type}s "
+                f"({result.entities_per_second:.0f}/s), checkpoint {last_id}"
+            )
+
+    result.seconds = time.perf_counter() - started
+    return {**asdict(result), "entities_per_second": round(result.entities_per_second, 1)}
+
+
+def summarize(entity_type: str, run_id: str, shard_results: list[dict], wall_seconds: float) -> dict:
+    entities = sum(r["entities"] for r in shard_results)
+    return {
+        "run_id": run_id,
+        "entity_type": entity_type,
+        "entities": entities,
+        "wall_seconds": round(wall_seconds, 3),
+        "entities_per_second": round(entities / wall_seconds, 1) if wall_seconds else 0.0,
+        "shards": sorted(shard_results, key=lambda r: r["shard"]),
+    }
+
+
+def rescore_portfolio(
+    entity_type: str,
+    run_id: str,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    explain: bool = True,
+) -> dict:
+    """Rescore all entities of a type using one process per shard"""
+    workers = claim_shards(run_id, entity_type, workers)
+    started = time.perf_counter()
+    if workers == 1:
+        results = [rescore_shard(entity_type, 0, 1, run_id, batch_size, explain)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(rescore_shard, entity_type, shard, workers, run_id, batch_size, explain)
+                for shard in range(workers)
+            ]
+            results = [future.result() for future in futures]
+    return summarize(entity_type, run_id, results, time.perf_counter() - started)
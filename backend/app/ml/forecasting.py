@@ -0,0 +1,313 @@
+"""Cashflow forecasting with Prophet, fitted offline and served from a store.
+
+An organization's cashflow series is the daily sum of ``amount_paid`` over
+its invoices, bucketed by ``payment_date``. The series for a whole batch of
+organizations is built at once with a grouped pandas resample, with days
+without payments filled with zero.
+
+Fitting takes seconds per organization, so it never happens on a request.
+``fit_all`` fits every organization nightly, one process per shard. Each fit
+is stored in ``cashflow_forecasts`` keyed by (org_id, data_watermark). The
+watermark summarizes the paid invoices (count, total paid, last payment), so
+an organization whose payments have not changed keeps its stored forecast
+and is skipped. One that has changed is refit, warm-started from its
+previous parameters when the model shape allows.
+
+pandas and Prophet are only imported when a series is built or fitted.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.db.models.cashflow_forecast import CashflowForecast
+from app.db.models.invoice import Invoice
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPE = "prophet"
+
+FORECAST_COLUMNS = ("ds", "yhat", "yhat_lower", "yhat_upper")
+
+
+def watermark_query():
+    """Per-organization summary of paid invoices; a change means the series changed"""
+    return (
+        select(
+            Invoice.org_id,
+            func.count(Invoice.id).label("payments"),
+            func.coalesce(func.sum(Invoice.amount_paid), 0).label("total_paid"),
+            func.max(Invoice.payment_date).label("last_payment"),
+        )
+        .where(Invoice.payment_date.is_not(None))
+        .group_by(Invoice.org_id)
+    )
+
+
+def format_watermark(payments: int, total_paid, last_payment) -> str:
+    total = Decimal(total_paid).quantize(Decimal("0.01"))
+    return f"{payments}:{total}:{last_payment.astimezone(timezone.utc).isoformat()}"
+
+
+def load_payments(db: Session, org_ids: Iterable[int]):
+    """Paid invoices of the given organizations as a DataFrame"""
+    import pandas as pd
+
+    rows = db.execute(
+        select(Invoice.org_id, Invoice.payment_date, Invoice.amount_paid)
+        .where(
+            Invoice.org_id.in_(list(org_ids)),
+            Invoice.payment_date.is_not(None),
+            Invoice.amount_paid > 0,
+        )
+    ).all()
+    return pd.DataFrame(rows, columns=["org_id", "payment_date", "amount_paid"])
+
+
+def build_daily_series(payments, history_days: Optional[int] = None):
+    """Daily cashflow per organization: columns org_id, ds (naive UTC date), y.
+
+    Each organization's series runs from its first payment in the window to
+    its last payment, with zero on days without payments. The window is the
+    ``history_days`` before the last payment, not before today, so the series
+    only changes when payments do.
+    """
+    import pandas as pd
+
+    history_days = history_days or settings.FORECAST_HISTORY_DAYS
+    if payments.empty:
+        return pd.DataFrame({"org_id": [], "ds": [], "y": []})
+
+    frame = pd.DataFrame({
+        "org_id": payments["org_id"],
+        "ds": pd.to_datetime(payments["payment_date"], utc=True).dt.tz_localize(None).dt.normalize(),
+        "y": payments["amount_paid"].astype(float),
+    })
+    last = frame.groupby("org_id")["ds"].transform("max")
+    frame = frame[frame["ds"] > last - pd.Timedelta(days=history_days)]
+    daily = frame.set_index("ds").groupby("org_id")["y"].resample("D").sum()
+    return daily.reset_index()
+
+
+def _warm_start_params(model) -> dict:
+    """MAP parameters of a fitted model, as Stan initial values for the next fit"""
+    import numpy as np
+
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        params[name] = float(np.mean(model.params[name]))
+    for name in ("delta", "beta"):
+        params[name] = np.mean(model.params[name], axis=0)
+    return params
+
+
+def _new_model():
+    from prophet import Prophet
+
+    return Prophet(
+        weekly_seasonality=True,
+        yearly_seasonality="auto",
+        daily_seasonality=False,
+        interval_width=0.8,
+    )
+
+
+def fit_forecast(series, horizon_days: Optional[int] = None, previous_model_json: Optional[str] = None) -> dict:
+    """Fit one organization's series and forecast ``horizon_days`` past its end"""
+    import prophet
+    from prophet.serialize import model_from_json, model_to_json
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    horizon_days = horizon_days or settings.FORECAST_HORIZON_DAYS
+    history = series[["ds", "y"]]
+    started = time.perf_counter()
+
+    model = None
+    warm_started = False
+    if previous_model_json:
+        try:
+            init = _warm_start_params(model_from_json(previous_model_json))
+            model = _new_model().fit(history, init=init)
+            warm_started = True
+        except Exception as exc:
+            # Changepoint or seasonality terms changed shape; fit from scratch
+            logger.debug(f"Warm start not possible, fitting cold: {exc}")
+            model = None
+    if model is None:
+        model = _new_model().fit(history)
+
+    future = model.make_future_dataframe(periods=horizon_days, include_history=False)
+    predicted = model.predict(future)[list(FORECAST_COLUMNS)].copy()
+    # Cash received is never negative
+    predicted[["yhat", "yhat_lower", "yhat_upper"]] = predicted[["yhat", "yhat_lower", "yhat_upper"]].clip(lower=0)
+    points = [
+        {
+            "date": ds.date().isoformat(),
+            "yhat": round(float(yhat), 2),
+            "yhat_lower": round(float(lower), 2),
+            "yhat_upper": round(float(upper), 2),
+        }
+        for ds, yhat, lower, upper in predicted.itertuples(index=False)
+    ]
+    return {
+        "history_start": history["ds"].iloc[0].to_pydatetime().replace(tzinfo=timezone.utc),
+        "history_end": history["ds"].iloc[-1].to_pydatetime().replace(tzinfo=timezone.utc),
+        "history_days": len(history),
+        "total_paid": round(float(history["y"].sum()), 2),
+        "model_type": MODEL_TYPE,
+        "model_version": prophet.__version__,
+        "model_json": model_to_json(model),
+        "warm_started": warm_started,
+        "fit_seconds": round(time.perf_counter() - started, 3),
+        "horizon_days": horizon_days,
+        "forecast_json": json.dumps(points),
+    }
+
+
+def store_forecast(db: Session, org_id: int, data_watermark: str, fitted: dict) -> None:
+    """Upsert the fit for (org_id, data_watermark) and drop the organization's older fits"""
+    statement = pg_insert(CashflowForecast).values(org_id=org_id, data_watermark=data_watermark, **fitted)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["org_id", "data_watermark"],
+            set_={**{name: statement.excluded[name] for name in fitted}, "created_at": func.now()},
+        )
+    )
+    db.execute(
+        delete(CashflowForecast).where(
+            CashflowForecast.org_id == org_id,
+            CashflowForecast.data_watermark != data_watermark,
+        )
+    )
+
+
+@dataclass
+class ForecastShardResult:
+    shard: int
+    organizations: int = 0
+    fitted: int = 0
+    warm_started: int = 0
+    unchanged: int = 0
+    insufficient_history: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+def fit_organizations(
+    db: Session,
+    watermarks: dict[int, str],
+    result: ForecastShardResult,
+    force: bool = False,
+) -> None:
+    """Refit the organizations whose stored forecast is not at their current watermark"""
+    result.organizations += len(watermarks)
+    stored = set(db.execute(
+        select(CashflowForecast.org_id, CashflowForecast.data_watermark)
+        .where(CashflowForecast.org_id.in_(list(watermarks)))
+    ).tuples().all())
+    stale = [org_id for org_id, watermark in watermarks.items() if force or (org_id, watermark) not in stored]
+    result.unchanged += len(watermarks) - len(stale)
+    if not stale:
+        return
+
+    series = build_daily_series(load_payments(db, stale))
+    for org_id, org_series in series.groupby("org_id"):
+        if len(org_series) < settings.FORECAST_MIN_HISTORY_DAYS:
+            result.insufficient_history += 1
+            continue
+        previous = db.execute(
+            select(CashflowForecast.model_json)
+            .where(CashflowForecast.org_id == org_id)
+            .order_by(CashflowForecast.created_at.desc())
+            .limit(1)
+        ).scalar()
+        try:
+            fitted = fit_forecast(org_series, previous_model_json=previous)
+        except Exception:
+            logger.exception(f"Cashflow forecast for organization {org_id} failed")
+            result.failed += 1
+            continue
+        store_forecast(db, int(org_id), watermarks[org_id], fitted)
+        db.commit()
+        result.fitted += 1
+        result.warm_started += fitted["warm_started"]
+
+
+def fit_shard(shard: int, shards: int, batch_size: Optional[int] = None, force: bool = False) -> dict:
+    """Fit the stale organizations in one shard (org_id % shards == shard)"""
+    # Never reuse pooled connections inherited from a forking parent
+    engine.dispose(close=False)
+
+    batch_size = batch_size or settings.FORECAST_BATCH_SIZE
+    result = ForecastShardResult(shard=shard)
+    started = time.perf_counter()
+    last_org_id = 0
+
+    with SessionLocal() as db:
+        while True:
+            query = watermark_query().where(Invoice.org_id > last_org_id).order_by(Invoice.org_id).limit(batch_size)
+            if shards > 1:
+                query = query.where(Invoice.org_id % shards == shard)
+            batch = db.execute(query).all()
+            if not batch:
+                break
+            watermarks = {row.org_id: format_watermark(row.payments, row.total_paid, row.last_payment) for row in batch}
+            fit_organizations(db, watermarks, result, force=force)
+            db.commit()
+            last_org_id = batch[-1].org_id
+            result.seconds = time.perf_counter() - started
+            logger.info(
+                f"Forecast shard {shard}/{shards}: {result.organizations} organizations, "
+                f"{result.fitted} fitted, {result.unchanged} unchanged"
+            )
+
+    result.seconds = round(time.perf_counter() - started, 3)
+    return asdict(result)
+
+
+def fit_organization(org_id: int, force: bool = False) -> dict:
+    """Refit one organization if its watermark moved (e.g. requested by the API)"""
+    result = ForecastShardResult(shard=0)
+    with SessionLocal() as db:
+        row = db.execute(watermark_query().where(Invoice.org_id == org_id)).first()
+        if row is not None:
+            watermark = format_watermark(row.payments, row.total_paid, row.last_payment)
+            fit_organizations(db, {org_id: watermark}, result, force=force)
+            db.commit()
+    return asdict(result)
+
+
+def summarize(shard_results: list[dict], wall_seconds: float) -> dict:
+    totals = {
+        name: sum(r[name] for r in shard_results)
+        for name in ("organizations", "fitted", "warm_started", "unchanged", "insufficient_history", "failed")
+    }
+    return {
+        **totals,
+        "wall_seconds": round(wall_seconds, 3),
+        "shards": sorted(shard_results, key=lambda r: r["shard"]),
+    }
+
+
+def fit_all(workers: Optional[int] = None, batch_size: Optional[int] = None, force: bool = False) -> dict:
+    """Fit every organization whose payments changed, using one process per shard"""
+    workers = workers or settings.FORECAST_WORKERS or (os.cpu_count() or 1)
+    started = time.perf_counter()
+    if workers == 1:
+        results = [fit_shard(0, 1, batch_size, force)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fit_shard, shard, workers, batch_size, force) for shard in range(workers)]
+            results = [future.result() for future in futures]
+    return summarize(results, time.perf_counter() - started)
@@ -0,0 +1,172 @@
+"""Credit scoring with LightGBM and SHAP explanations.
+
+The model predicts the probability that an entity's invoices go unpaid; the
+credit score is ``100 * (1 - p_default)``. LightGBM, SHAP and NumPy are only
+imported when a score is actually computed.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.invoice import Invoice, InvoiceStatus
+
+ENTITY_TYPES = ("organization", "customer")
+
+FEATURE_NAMES = (
+    "invoice_count",
+    "total_invoiced",
+    "paid_ratio",
+    "overdue_ratio",
+    "avg_days_to_pay",
+    "avg_days_past_due",
+)
+
+SCORE_BANDS = ((80, "A"), (65, "B"), (50, "C"), (0, "D"))
+
+
+class ModelUnavailableError(RuntimeError):
+    """The credit model file is missing or could not be loaded"""
+
+
+@lru_cache(maxsize=1)
+def load_model():
+    """Load the LightGBM booster once per process"""
+    import lightgbm as lgb
+
+    path = os.path.join(settings.MODEL_PATH, settings.CREDIT_MODEL_FILE)
+    if not os.path.exists(path):
+        raise ModelUnavailableError(f"Credit model not found at {path}")
+    booster = lgb.Booster(model_file=path)
+    version = booster.attr("version") or datetime.fromtimestamp(
+        os.path.getmtime(path), tz=timezone.utc
+    ).strftime("%Y%m%d%H%M%S")
+    return booster, version
+
+
+@lru_cache(maxsize=1)
+def load_explainer():
+    import shap
+
+    booster, _ = load_model()
+    return shap.TreeExplainer(booster)
+
+
+def entity_filter(entity_type: str):
+    if entity_type == "organization":
+        return Invoice.org_id
+    if entity_type == "customer":
+        return Invoice.customer_id
+    raise ValueError(f"Unsupported entity type: {entity_type}")
+
+
+def feature_query(entity_type: str):
+    """Aggregate scoring features per entity straight from the invoices table"""
+    key = entity_filter(entity_type)
+    excluded_statuses = (InvoiceStatus.DRAFT, InvoiceStatus.CANCELLED)
+    days_to_pay = func.extract("epoch", Invoice.payment_date - Invoice.issued_date) / 86400
+    days_past_due = func.greatest(
+        func.extract("epoch", func.coalesce(Invoice.payment_date, func.now()) - Invoice.due_date) / 86400,
+        0,
+    )
+    return (
+        select(
+            key.label("entity_id"),
+            func.count(Invoice.id).label("invoice_count"),
+            func.coalesce(func.sum(Invoice.total_amount), 0).label("total_invoiced"),
+            (
+                func.coalesce(func.sum(Invoice.amount_paid), 0)
+                / func.nullif(func.sum(Invoice.total_amount), 0)
+            ).label("paid_ratio"),
+            func.avg(
+                case((Invoice.status == InvoiceStatus.OVERDUE, 1.0), else_=0.0)
+            ).label("overdue_ratio"),
+            func.avg(days_to_pay).label("avg_days_to_pay"),
+            func.avg(days_past_due).label("avg_days_past_due"),
+        )
+        .where(Invoice.status.notin_(excluded_statuses))
+        .group_by(key)
+    )
+
+
+def compute_features(db: Session, entity_type: str, entity_id: int) -> dict:
+    """Feature vector for one entity: a feature store lookup, aggregating
+    the invoices only for entities the store has not seen yet"""
+    from app.services.feature_store import get_feature_vector
+
+    vector = get_feature_vector(db, entity_type, entity_id)
+    if vector is not None:
+        return vector
+    row = db.execute(
+        feature_query(entity_type).where(entity_filter(entity_type) == entity_id)
+    ).mappings().first()
+    if row is None:
+        return {name: 0.0 for name in FEATURE_NAMES}
+    return {name: float(row[name] or 0) for name in FEATURE_NAMES}
+
+
+def score_band(score: float) -> str:
+    for threshold, band in SCORE_BANDS:
+        if score >= threshold:
+            return band
+    return SCORE_BANDS[-1][1]
+
+
+def score_features(features, explain: bool = True) -> list[dict]:
+    """Score a batch with one predict (and one SHAP) call.
+    
+    `features` is a list of feature dicts or a pandas DataFrame with one
+    column per FEATURE_NAMES entry.
+    """
+    import numpy as np
+
+    booster, version = load_model()
+    if hasattr(features, "to_numpy"):
+        matrix = features[list(FEATURE_NAMES)].to_numpy(dtype=float)
+        features = features[list(FEATURE_NAMES)].to_dict("records")
+    else:
+        matrix = np.array([[f[name] for name in FEATURE_NAMES] for f in features], dtype=float)
+    p_default = booster.predict(matrix)
+
+    shap_rows = None
+    if explain:
+        shap_rows = load_explainer().shap_values(matrix)
+        if isinstance(shap_rows, list):  # binary classifiers may return [neg, pos]
+            shap_rows = shap_rows[-1]
+
+    valid_until = datetime.now(timezone.utc) + timedelta(seconds=settings.SCORE_TTL_SECONDS)
+    results = []
+    for i, feature_row in enumerate(features):
+        score = round(float(100 * (1 - p_default[i])), 2)
+        result = {
+            "score": score,
+            "score_band": score_band(score),
+            "confidence": round(float(100 * abs(p_default[i] - 0.5) * 2), 2),
+            "model_version": version,
+            "model_type": "lightgbm",
+            "features_json": json.dumps(feature_row),
+            "shap_values": None,
+            "top_features": None,
+            "valid_until": valid_until,
+            "is_valid": True,
+        }
+        if shap_rows is not None:
+            contributions = dict(zip(FEATURE_NAMES, (float(v) for v in shap_rows[i])))
+            top = sorted(contributions.items(), key=lambda kv: abs(kv[1]), reverse=True)[:3]
+            result["shap_values"] = json.dumps(contributions)
+            result["top_features"] = json.dumps([name for name, _ in top])
+        results.append(result)
+    return results
+
+
+def score_entity(db: Session, entity_type: str, entity_id: int, org_id: Optional[int] = None) -> dict:
+    """Compute a single entity's score (features, inference and SHAP)"""
+    features = compute_features(db, entity_type, entity_id)
+    result = score_features([features])[0]
+    result.update({"entity_type": entity_type, "entity_id": entity_id, "org_id": org_id})
+    return result
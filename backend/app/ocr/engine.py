@@ -0,0 +1,260 @@
+"""Concurrent OCR engine.
+
+Pages are OCR'd on a process pool with one worker per CPU core (OCR_WORKERS).
+A multi-page PDF is rasterized once and its pages are read in parallel.
+Preprocessed pages (deskewed, binarized, resized) are cached on disk under the
+document's SHA-256. The final extraction is cached in Redis under the same
+hash, so a re-upload of the same file (e.g. an offline PWA retry) is answered
+without touching OpenCV or Tesseract. Concurrent requests for one document in
+the same worker share a single extraction. ``extract_sync`` is the blocking
+variant used by the OCR Celery queue (app.tasks.ocr).
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from app.core.cache import get_redis, get_sync_redis
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, OCR_PAGE_SECONDS
+from app.ocr.extraction import field_extractor
+from app.ocr.pipeline import OCRError, ocr_page, page_path, parse_fields, render_pdf
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "ocr:"
+PAGE_COUNT_FILE = "pages"
+
+PDF_CONTENT_TYPES = ("application/pdf",)
+IMAGE_CONTENT_TYPES = ("image/jpeg", "image/png", "image/tiff", "image/webp", "image/bmp")
+
+
+def is_pdf(data: bytes, content_type: Optional[str]) -> bool:
+    return content_type in PDF_CONTENT_TYPES or data[:5] == b"%PDF-"
+
+
+def record_result(invoice, file_hash: str, result: dict) -> bool:
+    """Store an extraction on the invoice; False if it was already recorded for this file"""
+    if invoice.ocr_extracted and invoice.file_hash == file_hash:
+        return False
+    metadata = json.loads(invoice.metadata_json) if invoice.metadata_json else {}
+    metadata["ocr"] = {"pages": result["pages"], "fields": result["fields"]}
+    invoice.file_hash = file_hash
+    invoice.ocr_extracted = True
+    invoice.ocr_confidence = result["confidence"]
+    invoice.metadata_json = json.dumps(metadata)
+    return True
+
+
+class OCREngine:
+    """Process-pool OCR with preprocessing and result caches keyed by file hash"""
+
+    def __init__(self, max_workers: int, cache_dir: str, language: str, timeout: int):
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.language = language
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: never fork the threaded API process
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _redis_key(self, file_hash: str) -> str:
+        return f"{REDIS_KEY_PREFIX}{file_hash}:{self.language}"
+
+    async def cached(self, file_hash: str) -> Optional[dict]:
+        """Previously extracted result for this document, if any"""
+        try:
+            raw = await get_redis().get(self._redis_key(file_hash))
+        except Exception as exc:
+            logger.warning(f"OCR result cache unavailable: {exc}")
+            raw = None
+        CACHE_REQUESTS.labels(cache="ocr", result="hit" if raw else "miss").inc()
+        if raw is None:
+            return None
+        return {**json.loads(raw), "cached": True}
+
+    async def extract(self, data: bytes, file_hash: str, content_type: Optional[str] = None) -> dict:
+        """OCR a document, returning {pages, text, confidence, fields, cached}"""
+        result = await self.cached(file_hash)
+        if result is not None:
+            return result
+
+        # Single-flight: duplicate uploads arriving together share one run
+        future = self._inflight.get(file_hash)
+        if future is not None:
+            return {**await asyncio.shield(future), "cached": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[file_hash] = future
+        try:
+            result = await self._extract(data, file_hash, content_type)
+            future.set_result(result)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(file_hash, None)
+
+        try:
+            await get_redis().set(
+                self._redis_key(file_hash), json.dumps(result), ex=settings.OCR_RESULT_TTL_SECONDS
+            )
+        except Exception as exc:
+            logger.warning(f"Could not cache OCR result for {file_hash}: {exc}")
+        return {**result, "cached": False}
+
+    async def _extract(self, data: bytes, file_hash: str, content_type: Optional[str]) -> dict:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+
+        page_count = self._cached_page_count(file_hash)
+        if page_count:
+            pages = [None] * page_count
+        elif is_pdf(data, content_type):
+            pages = await loop.run_in_executor(executor, render_pdf, data, settings.OCR_PDF_DPI)
+            if not pages:
+                raise OCRError("PDF has no pages")
+        else:
+            pages = [data]
+
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor,
+                ocr_page,
+                file_hash,
+                number,
+                page,
+                self.cache_dir,
+                self.language,
+                self.timeout,
+                settings.TESSERACT_PATH,
+            )
+            for number, page in enumerate(pages, start=1)
+        ))
+        if not page_count:
+            self._store_page_count(file_hash, len(pages))
+
+        elapsed = time.perf_counter() - started
+        result = self._combine(file_hash, results, elapsed)
+        if field_extractor.enabled:
+            try:
+                result["fields"].update(await field_extractor.extract(result["text"]))
+            except Exception as exc:
+                # The regex fields still stand on their own
+                logger.warning(f"Field extraction for {file_hash[:12]} failed: {exc}")
+        return result
+
+    def extract_sync(
+        self,
+        data: bytes,
+        file_hash: str,
+        content_type: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> dict:
+        """Blocking extraction in the calling process, one page at a time.
+
+        For Celery workers: their pool processes cannot start a process pool
+        of their own, and parallelism comes from worker concurrency instead.
+        Shares the page and result caches with ``extract``. ``progress`` is
+        called with (pages done, total pages).
+        """
+        redis = get_sync_redis()
+        try:
+            raw = redis.get(self._redis_key(file_hash))
+        except Exception as exc:
+            logger.warning(f"OCR result cache unavailable: {exc}")
+            raw = None
+        CACHE_REQUESTS.labels(cache="ocr", result="hit" if raw else "miss").inc()
+        if raw is not None:
+            return {**json.loads(raw), "cached": True}
+
+        started = time.perf_counter()
+        pages = render_pdf(data, settings.OCR_PDF_DPI) if is_pdf(data, content_type) else [data]
+        if not pages:
+            raise OCRError("PDF has no pages")
+        results = []
+        for number, page in enumerate(pages, start=1):
+            results.append(ocr_page(
+                file_hash, number, page, self.cache_dir, self.language, self.timeout, settings.TESSERACT_PATH
+            ))
+            if progress is not None:
+                progress(number, len(pages))
+
+        result = self._combine(file_hash, results, time.perf_counter() - started)
+        if field_extractor.enabled:
+            try:
+                result["fields"].update(field_extractor.extract_sync(result["text"]))
+            except Exception as exc:
+                logger.warning(f"Field extraction for {file_hash[:12]} failed: {exc}")
+        try:
+            redis.set(self._redis_key(file_hash), json.dumps(result), ex=settings.OCR_RESULT_TTL_SECONDS)
+        except Exception as exc:
+            logger.warning(f"Could not cache OCR result for {file_hash}: {exc}")
+        return {**result, "cached": False}
+
+    def _combine(self, file_hash: str, results: list[dict], elapsed: float) -> dict:
+        OCR_PAGE_SECONDS.observe(elapsed / len(results))
+        text = "\n\n".join(page["text"] for page in results)
+        confidences = [page["confidence"] for page in results if page["confidence"] is not None]
+        logger.info(f"OCR {file_hash[:12]}: {len(results)} page(s) in {elapsed:.2f}s")
+        return {
+            "pages": len(results),
+            "text": text,
+            "confidence": round(sum(confidences) / len(confidences), 2) if confidences else None,
+            "fields": parse_fields(text),
+        }
+
+    def _page_count_path(self, file_hash: str) -> str:
+        return os.path.join(page_path(self.cache_dir, file_hash, 1).parent, PAGE_COUNT_FILE)
+
+    def _cached_page_count(self, file_hash: str) -> int:
+        """Pages preprocessed earlier for this document (0 if not all are cached)"""
+        try:
+            with open(self._page_count_path(file_hash)) as handle:
+                count = int(handle.read().strip())
+        except (OSError, ValueError):
+            return 0
+        if all(page_path(self.cache_dir, file_hash, page).exists() for page in range(1, count + 1)):
+            return count
+        return 0
+
+    def _store_page_count(self, file_hash: str, count: int) -> None:
+        try:
+            with open(self._page_count_path(file_hash), "w") as handle:
+                handle.write(str(count))
+        except OSError as exc:
+            logger.warning(f"Could not record OCR page count for {file_hash}: {exc}")
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (called on application shutdown)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+ocr_engine = OCREngine(
+    max_workers=settings.OCR_WORKERS or (os.cpu_count() or 1),
+    cache_dir=settings.OCR_CACHE_DIR,
+    language=settings.OCR_LANGUAGE,
+    timeout=settings.OCR_TIMEOUT,
+)
@@ -0,0 +1,339 @@
+"""Invoice field extraction with a Hugging Face token-classification model.
+
+The model runs in the API process, loaded once per worker and kept warm.
+Cold-loading it per request takes seconds. A CPU forward pass over one short
+document leaves most cores idle. So concurrent requests are merged: each one
+queues its OCR text, and a single collector takes everything queued within
+EXTRACTION_MAX_WAIT_MS (up to EXTRACTION_MAX_BATCH documents). It pads them
+into one batch and runs one forward pass on a dedicated thread.
+
+Backends (EXTRACTION_BACKEND):
+- torch: the model as published, in fp32
+- int8: torch dynamic quantization of the Linear layers (no extra dependency)
+- onnx: exported once to MODEL_PATH/onnx and run with ONNX Runtime, which
+  has to be installed separately
+
+Texts longer than EXTRACTION_MAX_LENGTH tokens are split into overlapping
+windows. Entity labels (``B-TOTAL_AMOUNT``, ``I-TOTAL_AMOUNT``, ...) map to
+lower-cased field names (``total_amount``), the same keys
+app.ocr.pipeline.parse_fields produces. Torch, Transformers and ONNX Runtime
+are only imported when the model is loaded.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+from app.core.features import extraction_enabled
+from app.core.metrics import EXTRACTION_BATCH_DOCUMENTS, EXTRACTION_BATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+WARMUP_TEXT = "Invoice No: INV-0001\nDate: 2024-01-31\nTotal due: 1,250.00"
+
+
+class ExtractionUnavailableError(RuntimeError):
+    """No extraction model is configured, or it could not be loaded"""
+
+
+def _field_name(label: str) -> Optional[str]:
+    if label == "O":
+        return None
+    return re.sub(r"^[BI]-", "", label).lower()
+
+
+class FieldModel:
+    """Tokenizer plus a CPU model in one of the supported backends"""
+
+    def __init__(self, tokenizer, id2label: dict, forward, backend: str, max_length: int, stride: int):
+        self.tokenizer = tokenizer
+        self.id2label = id2label
+        self._forward = forward
+        self.backend = backend
+        self.max_length = max_length
+        self.stride = stride
+
+    @classmethod
+    def load(
+        cls,
+        name: str,
+        backend: str,
+        max_length: int,
+        stride: int,
+        threads: int = 0,
+        onnx_dir: Optional[str] = None,
+    ) -> "FieldModel":
+        if not name:
+            raise ExtractionUnavailableError("EXTRACTION_MODEL is not set")
+        if backend not in BACKENDS:
+            raise ExtractionUnavailableError(f"Unknown extraction backend: {backend}")
+
+        import torch
+        from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        tokenizer = AutoTokenizer.from_pretrained(name, use_fast=True)
+        model = AutoModelForTokenClassification.from_pretrained(name).eval()
+        id2label = {int(i): label for i, label in model.config.id2label.items()}
+
+        if backend == "onnx":
+            forward = _onnx_forward(model, tokenizer, name, onnx_dir or os.path.join(settings.MODEL_PATH, "onnx"), threads)
+        else:
+            if backend == "int8":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+            def forward(inputs: dict):
+                with torch.inference_mode():
+                    return model(**{key: torch.from_numpy(value) for key, value in inputs.items()}).logits.numpy()
+
+        return cls(tokenizer, id2label, forward, backend, max_length, stride)
+
+    def predict(self, texts: list[str], min_score: float = 0.0) -> list[dict]:
+        """Fields found in each text, as {field: value}, in one padded forward pass"""
+        import numpy as np
+
+        encoded = self.tokenizer(
+            texts,
+            padding="longest",
+            truncation=True,
+            max_length=self.max_length,
+            stride=self.stride,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+            return_tensors="np",
+        )
+        offsets = encoded.pop("offset_mapping")
+        windows_to_text = encoded.pop("overflow_to_sample_mapping")
+        logits = self._forward(dict(encoded))
+
+        # Softmax over labels, then the best label per token
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        labels = probabilities.argmax(axis=-1)
+        scores = probabilities.max(axis=-1)
+
+        best: list[dict[str, tuple[float, str]]] = [{} for _ in texts]
+        for window, text_index in enumerate(windows_to_text):
+            text = texts[text_index]
+            for field, start, end, score in self._spans(labels[window], scores[window], offsets[window]):
+                if score >= min_score and score > best[text_index].get(field, (0.0, ""))[0]:
+                    best[text_index][field] = (score, text[start:end].strip())
+        return [{field: value for field, (_, value) in found.items() if value} for found in best]
+
+    def _spans(self, labels, scores, offsets):
+        """(field, start, end, mean score) for each run of B-/I- tokens"""
+        current = None
+        for label_id, score, (start, end) in zip(labels, scores, offsets):
+            if start == end:  # special and padding tokens
+                continue
+            label = self.id2label[int(label_id)]
+            field = _field_name(label)
+            if current is not None and (field != current[0] or label.startswith("B-")):
+                yield current[0], current[1], current[2], sum(current[3]) / len(current[3])
+                current = None
+            if field is None:
+                continue
+            if current is None:
+                current = [field, int(start), int(end), [float(score)]]
+            else:
+                current[2] = int(end)
+                current[3].append(float(score))
+        if current is not None:
+            yield current[0], current[1], current[2], sum(current[3]) / len(current[3])
+
+
+def _onnx_forward(model, tokenizer, name: str, onnx_dir: str, threads: int):
+    """Export the model to ONNX once, then run it with ONNX Runtime"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ExtractionUnavailableError("EXTRACTION_BACKEND=onnx needs the onnxruntime package")
+    import torch
+
+    path = os.path.join(onnx_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", name) + ".onnx")
+    if not os.path.exists(path):
+        os.makedirs(onnx_dir, exist_ok=True)
+        sample = dict(tokenizer([WARMUP_TEXT], return_tensors="pt"))
+        # ONNX inputs are positional: name them in forward() argument order
+        names = [arg for arg in inspect.signature(model.forward).parameters if arg in sample]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.onnx.export(
+            model,
+            (sample,),
+            tmp_path,
+            input_names=names,
+            output_names=["logits"],
+            dynamic_axes={key: {0: "batch", 1: "sequence"} for key in names + ["logits"]},
+            opset_version=14,
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"Exported extraction model to {path}")
+
+    options = ort.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+    input_names = {item.name for item in session.get_inputs()}
+
+    def forward(inputs: dict):
+        feed = {key: value.astype("int64") for key, value in inputs.items() if key in input_names}
+        return session.run(["logits"], feed)[0]
+
+    return forward
+
+
+class FieldExtractor:
+    """Warm per-process model with dynamic batching of concurrent requests"""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str,
+        max_batch: int,
+        max_wait_ms: float,
+        max_length: int = 512,
+        stride: int = 64,
+        min_score: float = 0.5,
+        threads: int = 0,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_length = max_length
+        self.stride = stride
+        self.min_score = min_score
+        self.threads = threads
+        self.model: Optional[FieldModel] = None
+        self.load_seconds: Optional[float] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._load_lock = threading.Lock()
+        # One forward pass at a time; the runtime spreads it over the cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction")
+
+    @property
+    def enabled(self) -> bool:
+        return extraction_enabled() and bool(self.model_name)
+
+    def _load(self) -> FieldModel:
+        with self._load_lock:
+            if self.model is None:
+                started = time.perf_counter()
+                model = FieldModel.load(
+                    self.model_name, self.backend, self.max_length, self.stride, self.threads
+                )
+                model.predict([WARMUP_TEXT])
+                self.load_seconds = time.perf_counter() - started
+                self.model = model
+                logger.info(
+                    f"Extraction model {self.model_name} ({self.backend}) ready in {self.load_seconds:.1f}s"
+                )
+        return self.model
+
+    async def start(self) -> None:
+        """Load and warm the model, then start collecting batches"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._collector is not None:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._load)
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+    async def extract(self, text: str) -> dict:
+        """Fields found in one OCR text, batched with concurrent requests"""
+        if self._collector is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def extract_unbatched(self, text: str) -> dict:
+        """One document per forward pass (the baseline the batcher is measured against)"""
+        if self.model is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        return (await loop.run_in_executor(self._executor, self._predict, [text]))[0]
+
+    def extract_sync(self, text: str) -> dict:
+        """One document on the calling thread, unbatched (Celery workers)"""
+        self._load()
+        return self._predict([text])[0]
+
+    def _predict(self, texts: list[str]) -> list[dict]:
+        started = time.perf_counter()
+        results = self.model.predict(texts, self.min_score)
+        EXTRACTION_BATCH_SECONDS.observe(time.perf_counter() - started)
+        EXTRACTION_BATCH_DOCUMENTS.observe(len(texts))
+        return results
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up (client disconnected) don't need a slot
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(self._executor, self._predict, [text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self) -> None:
+        """Stop the collector and the inference thread (called on application shutdown)"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+field_extractor = FieldExtractor(
+    model_name=settings.EXTRACTION_MODEL,
+    backend=settings.EXTRACTION_BACKEND,
+    max_batch=settings.EXTRACTION_MAX_BATCH,
+    max_wait_ms=settings.EXTRACTION_MAX_WAIT_MS,
+    max_length=settings.EXTRACTION_MAX_LENGTH,
+    stride=settings.EXTRACTION_STRIDE,
+    min_score=settings.EXTRACTION_MIN_SCORE,
+    threads=settings.EXTRACTION_THREADS,
+)
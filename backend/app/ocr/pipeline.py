@@ -0,0 +1,171 @@
+"""OCR work that runs inside the engine's worker processes.
+
+Everything here is a plain module-level function so it can be pickled into a
+spawned worker. OpenCV, NumPy, Tesseract and pdf2image are imported on first
+use inside the worker, never by the API process.
+"""
+import io
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+# Longest side of a preprocessed page; larger photos are shrunk, small
+# thumbnails enlarged (up to 2x) towards it
+MAX_SIDE_PIXELS = 2500
+# Skew corrections beyond this are almost always a misread of the layout
+MAX_DESKEW_DEGREES = 15.0
+
+PAGE_FILE = "page-{page:04d}.png"
+# pytesseract raises a plain RuntimeError with this message when `timeout` expires
+TESSERACT_TIMEOUT_MESSAGE = "Tesseract process timeout"
+
+
+class OCRError(RuntimeError):
+    """A document could not be read"""
+
+
+class OCRTimeoutError(OCRError):
+    """Tesseract exceeded OCR_TIMEOUT on a page"""
+
+
+def page_path(cache_dir: str, file_hash: str, page: int) -> Path:
+    return Path(cache_dir) / file_hash[:2] / file_hash / PAGE_FILE.format(page=page)
+
+
+def render_pdf(data: bytes, dpi: int) -> list[bytes]:
+    """Rasterize every PDF page to PNG"""
+    from pdf2image import convert_from_bytes
+
+    pages = []
+    for image in convert_from_bytes(data, dpi=dpi, fmt="png"):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        pages.append(buffer.getvalue())
+    return pages
+
+
+def preprocess(data: bytes) -> bytes:
+    """Grayscale, resize, deskew and binarize an image; returns PNG bytes"""
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise OCRError("Unsupported or corrupt image")
+
+    height, width = image.shape
+    scale = min(MAX_SIDE_PIXELS / max(height, width), 2.0)
+    if abs(scale - 1.0) > 0.05:
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    # Deskew on the angle of the minimum box around the ink
+    _, ink = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    points = cv2.findNonZero(ink)
+    if points is not None:
+        angle = cv2.minAreaRect(points)[-1]
+        if angle > 45:
+            angle -= 90
+        elif angle < -45:
+            angle += 90
+        if 0.5 <= abs(angle) <= MAX_DESKEW_DEGREES:
+            height, width = image.shape
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+            image = cv2.warpAffine(
+                image, matrix, (width, height),
+                flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE,
+            )
+
+    # Adaptive threshold copes with the uneven lighting of phone photos
+    image = cv2.medianBlur(image, 3)
+    image = cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15
+    )
+    ok, encoded = cv2.imencode(".png", image)
+    if not ok:
+        raise OCRError("Could not encode preprocessed image")
+    return encoded.tobytes()
+
+
+def ocr_page(
+    file_hash: str,
+    page: int,
+    data: Optional[bytes],
+    cache_dir: str,
+    language: str,
+    timeout: int,
+    tesseract_path: str,
+) -> dict:
+    """Preprocess one page (or reuse the cached result) and run Tesseract on it"""
+    import pytesseract
+    from PIL import Image
+
+    path = page_path(cache_dir, file_hash, page)
+    if path.exists():
+        processed = path.read_bytes()
+        preprocess_cached = True
+    else:
+        if data is None:
+            raise OCRError(f"Preprocessed page {page} missing from cache")
+        processed = preprocess(data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(processed)
+        os.replace(tmp_path, path)
+        preprocess_cached = False
+
+    pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    try:
+        words = pytesseract.image_to_data(
+            Image.open(io.BytesIO(processed)),
+            lang=language,
+            timeout=timeout,
+            output_type=pytesseract.Output.DICT,
+        )
+    except pytesseract.TesseractError as exc:
+        # A subclass of RuntimeError: Tesseract ran and rejected the page
+        raise OCRError(f"Page {page}: {exc}") from exc
+    except RuntimeError as exc:
+        if str(exc) == TESSERACT_TIMEOUT_MESSAGE:
+            raise OCRTimeoutError(f"Page {page}: {exc}") from exc
+        raise OCRError(f"Page {page}: {exc}") from exc
+
+    lines: dict[tuple, list[str]] = {}
+    confidences = []
+    for i, word in enumerate(words["text"]):
+        confidence = float(words["conf"][i])
+        if not word.strip() or confidence < 0:
+            continue
+        key = (words["block_num"][i], words["par_num"][i], words["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        confidences.append(confidence)
+
+    return {
+        "page": page,
+        "text": "\n".join(" ".join(line) for _, line in sorted(lines.items())),
+        "confidence": round(sum(confidences) / len(confidences), 2) if confidences else None,
+        "preprocess_cached": preprocess_cached,
+    }
+
+
+_INVOICE_NUMBER = re.compile(
+    r"\b(?:invoice|inv|receipt)\s*(?:no\.?|number|#)?\s*[:#]?\s*([A-Z0-9][A-Z0-9/-]{2,})", re.IGNORECASE
+)
+_TOTAL = re.compile(r"\b(?:grand\s+)?total(?:\s+due)?\b[^\d\n]{0,20}([\d,]+\.\d{2})", re.IGNORECASE)
+_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2}|\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})\b")
+
+
+def parse_fields(text: str) -> dict:
+    """Best-effort invoice fields from OCR text (values are left as strings)"""
+    fields = {}
+    if match := _INVOICE_NUMBER.search(text):
+        fields["invoice_number"] = match.group(1)
+    totals = _TOTAL.findall(text)
+    if totals:
+        # The last "total" on a receipt is normally the amount payable
+        fields["total_amount"] = totals[-1].replace(",", "")
+    dates = _DATE.findall(text)
+    if dates:
+        fields["dates"] = dates[:3]
+    return fields
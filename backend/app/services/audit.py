@@ -0,0 +1,294 @@
+"""Write-behind audit logging.
+
+emit() only appends a record to an in-memory buffer; a background thread
+writes buffered records to ``audit_logs`` in multi-row batches whenever
+AUDIT_BATCH_SIZE records are waiting or AUDIT_FLUSH_INTERVAL_SECONDS has
+passed. When the buffer is full, or the database is unreachable at shutdown,
+records are appended to a JSON-lines spill file instead of being dropped;
+spill files are replayed by the flusher thread the next time a sink starts.
+
+Only connection failures (OperationalError, InterfaceError) are retried. A
+batch the database rejects (IntegrityError, DataError, ...) is bisected until
+the offending records are isolated; those go to a quarantine file in the
+spill directory, which is never replayed, and the rest are written. One bad
+record therefore never blocks the records behind it.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import AUDIT_BUFFERED, AUDIT_EVENTS, AUDIT_FLUSH_SECONDS
+from app.db.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Failures worth retrying: the database, not the records, is the problem
+RETRYABLE_ERRORS = (OperationalError, InterfaceError)
+# Cap of the flusher's exponential backoff while the database is unavailable
+MAX_RETRY_BACKOFF_SECONDS = 60.0
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, RETRYABLE_ERRORS):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+
+class AuditSink:
+    """Buffer audit records in memory and flush them to the database in batches"""
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_buffer: int,
+        spill_dir: str,
+        enabled: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spill_dir = Path(spill_dir)
+        self.enabled = enabled
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def emit(
+        self,
+        action: str,
+        resource_type: str,
+        status: str = "success",
+        *,
+        actor_id: Optional[int] = None,
+        actor_type: str = "user",
+        actor_name: Optional[str] = None,
+        resource_id: Optional[int] = None,
+        org_id: Optional[int] = None,
+        details: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        request_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """Record an audit event without touching the database"""
+        if not self.enabled:
+            return
+        record = {
+            "actor_id": actor_id,
+            "actor_type": actor_type,
+            "actor_name": actor_name,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "org_id": org_id,
+            "details_json": json.dumps(details, default=str) if details is not None else None,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "request_id": request_id,
+            "status": status,
+            "error_message": error_message,
+            "created_at": datetime.now(timezone.utc),
+        }
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                # Back-pressure: never block the caller, divert to disk instead
+                overflow = True
+            else:
+                overflow = False
+                self._buffer.append(record)
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            self._spill([record])
+        else:
+            AUDIT_EVENTS.labels(outcome="buffered").inc()
+            AUDIT_BUFFERED.inc()
+
+    def start(self) -> None:
+        """Start the background flusher, which first replays any spilled records"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is buffered; spill to disk anything that cannot be written"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+        remaining = self._take(len(self._buffer))
+        unwritten = self._write(remaining) if remaining else []
+        if unwritten:
+            self._spill(unwritten)
+
+    def _run(self) -> None:
+        try:
+            self._replay_spill_files()
+        except Exception as exc:
+            logger.error(f"Replaying spilled audit records failed: {exc}")
+        backoff = None
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    if backoff is not None:
+                        # The database is unavailable: wait out the backoff however
+                        # full the buffer gets (emit() keeps notifying)
+                        deadline = time.monotonic() + backoff
+                        while not self._stopping and time.monotonic() < deadline:
+                            self._cond.wait(deadline - time.monotonic())
+                    elif len(self._buffer) < self.batch_size:
+                        self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            if self.flush():
+                backoff = None
+            else:
+                backoff = min(2 * backoff if backoff else self.flush_interval, MAX_RETRY_BACKOFF_SECONDS)
+            if stopping:
+                return
+
+    def flush(self) -> bool:
+        """Write everything currently buffered, one batch at a time.
+
+        Returns False if a retryable failure left records buffered.
+        """
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return True
+            unwritten = self._write(batch)
+            if unwritten:
+                # Keep the records (oldest first) and retry on the next tick
+                with self._cond:
+                    room = max(self.max_buffer - len(self._buffer), 0)
+                    self._buffer.extendleft(reversed(unwritten[:room]))
+                if unwritten[room:]:
+                    self._spill(unwritten[room:])
+                AUDIT_BUFFERED.inc(min(room, len(unwritten)))
+                return False
+
+    def _take(self, count: int) -> list:
+        with self._cond:
+            batch = [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+        AUDIT_BUFFERED.dec(len(batch))
+        return batch
+
+    def _write(self, batch: list) -> list:
+        """Write a batch; returns the records left unwritten by a retryable failure.
+
+        Records the database rejects are isolated by bisection and quarantined.
+        """
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(AuditLog), batch)
+        except Exception as exc:
+            if _is_retryable(exc):
+                logger.warning(f"Audit flush of {len(batch)} records failed: {exc}")
+                return batch
+            if len(batch) == 1:
+                self._quarantine(batch[0], exc)
+                return []
+            middle = len(batch) // 2
+            unwritten = self._write(batch[:middle])
+            if unwritten:
+                return unwritten + batch[middle:]
+            return self._write(batch[middle:])
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        AUDIT_EVENTS.labels(outcome="flushed").inc(len(batch))
+        return []
+
+    def _spill_path(self) -> Path:
+        return self.spill_dir / f"audit-spill-{os.getpid()}.jsonl"
+
+    def _quarantine(self, record: dict, exc: Exception) -> None:
+        """Set aside a record the database rejects; it is kept for inspection, never replayed"""
+        reason = (str(exc).splitlines() or [type(exc).__name__])[0]
+        logger.error(f"Quarantined audit record {record['action']} {record['resource_type']}: {reason}")
+        entry = {**record, "quarantine_error": reason}
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spill_dir / f"audit-quarantine-{os.getpid()}.jsonl"
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry, default=_json_default) + "\n")
+        except OSError as spill_exc:
+            logger.error(f"Could not quarantine audit record: {spill_exc}")
+            AUDIT_EVENTS.labels(outcome="dropped").inc()
+            return
+        AUDIT_EVENTS.labels(outcome="quarantined").inc()
+
+    def _spill(self, records: list) -> None:
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._spill_path(), "a", encoding="utf-8") as handle:
+                for record in records:
+                    handle.write(json.dumps(record, default=_json_default) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+        except OSError as exc:
+            logger.error(f"Could not spill {len(records)} audit records: {exc}")
+            AUDIT_EVENTS.labels(outcome="dropped").inc(len(records))
+            return
+        AUDIT_EVENTS.labels(outcome="spilled").inc(len(records))
+
+    def _replay_spill_files(self) -> None:
+        if not self.spill_dir.is_dir():
+            return
+        for path in sorted(self.spill_dir.glob("audit-spill-*.jsonl")):
+            # Claim the file so concurrently starting workers don't replay it twice
+            claimed = path.with_suffix(f".replaying-{os.getpid()}")
+            try:
+                path.rename(claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding="utf-8") as handle:
+                records = [_load_spilled(line) for line in handle if line.strip()]
+            for start in range(0, len(records), self.batch_size):
+                end = start + self.batch_size
+                unwritten = self._write(records[start:end])
+                if unwritten:
+                    # Keep only what was not written for the next attempt
+                    self._spill(unwritten + records[end:])
+                    claimed.unlink()
+                    return
+            claimed.unlink()
+            logger.info(f"Replayed {len(records)} spilled audit records from {path.name}")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _load_spilled(line: str) -> dict:
+    record = json.loads(line)
+    record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+audit_sink = AuditSink(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_buffer=settings.AUDIT_BUFFER_MAX,
+    spill_dir=settings.AUDIT_SPILL_DIR,
+    enabled=settings.ENABLE_AUDIT_LOGGING,
+)
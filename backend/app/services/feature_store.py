@@ -0,0 +1,433 @@
+"""Feature store: precomputed invoice aggregates per organization and customer.
+
+``entity_features`` holds one row per (entity_type, entity_id). These are the
+credit model inputs plus the wider aggregates used by forecasting: the
+days-past-due distribution, rolling turnover and customer concentration.
+
+Rows are maintained incrementally, in two steps:
+- Additive columns (counts, sums, days-past-due buckets, turnover) are
+  updated in the writer's transaction by adding each changed invoice's
+  contribution (new state minus old state) to the row. That is one upsert
+  per affected entity, however many invoices the organization has.
+- Non-additive columns (ratios, averages, customer concentration) are
+  recomputed by ``refresh_features``, a GROUP BY over the entity's invoices.
+  Writers only queue the entity in Redis after commit. One deferred
+  ``features.refresh_pending`` task per FEATURE_REFRESH_DELAY_SECONDS window
+  recomputes everything queued meanwhile, so a burst of writes (an import, an
+  overdue sweep) costs one recompute per entity, outside the writer's
+  transaction.
+
+Readers fetch a ready vector by unique key instead of aggregating the
+invoices table. Columns that depend on the current date (days past due,
+rolling turnover) drift while nothing changes. ``refresh_all`` recomputes
+every entity in keyset batches and runs nightly.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, Numeric, cast, delete, event, func, inspect, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_sync_redis
+from app.core.config import settings
+from app.db.models.customer import Customer
+from app.db.models.entity_features import EntityFeatures
+from app.db.models.invoice import Invoice, InvoiceStatus
+from app.db.models.organization import Organization
+from app.ml.scoring import ENTITY_TYPES, FEATURE_NAMES, entity_filter, feature_query
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "feature_deltas"
+_DIRTY_KEY = "feature_refreshes"
+
+# Redis: entities awaiting a recompute, and the flag set while one is scheduled
+REFRESH_QUEUE_KEY = "features:pending"
+REFRESH_SCHEDULED_KEY = "features:refresh-scheduled"
+# A scheduled run that was lost (worker down) is rescheduled after this long
+REFRESH_SCHEDULED_TTL_SECONDS = 600
+
+# Invoice columns that feed the aggregates
+FEATURE_INPUT_COLUMNS = (
+    "status", "amount_paid", "payment_date", "total_amount", "issued_date", "due_date",
+    "org_id", "customer_id",
+)
+
+OPEN_STATUSES = (
+    InvoiceStatus.ISSUED,
+    InvoiceStatus.PAYMENT_PENDING,
+    InvoiceStatus.PARTIALLY_PAID,
+    InvoiceStatus.OVERDUE,
+)
+EXCLUDED_STATUSES = (InvoiceStatus.DRAFT, InvoiceStatus.CANCELLED)
+
+STORE_COLUMNS = (
+    "entity_type", "entity_id", "org_id", *FEATURE_NAMES,
+    "open_count", "outstanding_amount",
+    "dpd_current", "dpd_1_30", "dpd_31_60", "dpd_61_90", "dpd_over_90",
+    "turnover_30d", "turnover_90d", "turnover_365d",
+    "customer_count", "top_customer_share", "computed_at",
+)
+
+# Maintained by adding per-invoice contributions (see invoice_contribution)
+ADDITIVE_COLUMNS = (
+    "invoice_count", "total_invoiced", "open_count", "outstanding_amount",
+    "dpd_current", "dpd_1_30", "dpd_31_60", "dpd_61_90", "dpd_over_90",
+    "turnover_30d", "turnover_90d", "turnover_365d",
+)
+
+EntityKey = tuple[str, int]
+
+
+def _concentration(entity_ids: list[int]):
+    """Per organization: customer count and the largest customer's share of invoicing"""
+    per_customer = (
+        select(
+            Invoice.org_id,
+            Invoice.customer_id,
+            func.sum(Invoice.total_amount).label("amount"),
+        )
+        .where(Invoice.status.notin_(EXCLUDED_STATUSES))
+        .where(Invoice.org_id.in_(entity_ids))
+        .group_by(Invoice.org_id, Invoice.customer_id)
+        .subquery()
+    )
+    return (
+        select(
+            per_customer.c.org_id,
+            func.count().label("customer_count"),
+            (
+                func.max(per_customer.c.amount) / func.nullif(func.sum(per_customer.c.amount), 0)
+            ).label("top_customer_share"),
+        )
+        .group_by(per_customer.c.org_id)
+        .subquery()
+    )
+
+
+def store_query(entity_type: str, entity_ids: list[int]):
+    """One entity_features row per entity that has (non-draft) invoices"""
+    key = entity_filter(entity_type)
+    is_open = Invoice.status.in_(OPEN_STATUSES)
+    now = func.now()
+
+    def dpd_count(*conditions):
+        return func.count(Invoice.id).filter(is_open, *conditions)
+
+    def turnover(days: int):
+        return func.coalesce(
+            func.sum(Invoice.total_amount).filter(Invoice.issued_date >= now - timedelta(days=days)), 0
+        )
+
+    query = (
+        feature_query(entity_type)
+        .where(key.in_(entity_ids))
+        .add_columns(
+            literal(entity_type).label("entity_type"),
+            (Invoice.org_id if entity_type == "organization" else func.max(Invoice.org_id)).label("org_id"),
+            func.count(Invoice.id).filter(is_open).label("open_count"),
+            func.coalesce(
+                func.sum(Invoice.total_amount - func.coalesce(Invoice.amount_paid, 0)).filter(is_open), 0
+            ).label("outstanding_amount"),
+            dpd_count(Invoice.due_date >= now).label("dpd_current"),
+            dpd_count(Invoice.due_date < now, Invoice.due_date >= now - timedelta(days=30)).label("dpd_1_30"),
+            dpd_count(
+                Invoice.due_date < now - timedelta(days=30), Invoice.due_date >= now - timedelta(days=60)
+            ).label("dpd_31_60"),
+            dpd_count(
+                Invoice.due_date < now - timedelta(days=60), Invoice.due_date >= now - timedelta(days=90)
+            ).label("dpd_61_90"),
+            dpd_count(Invoice.due_date < now - timedelta(days=90)).label("dpd_over_90"),
+            turnover(30).label("turnover_30d"),
+            turnover(90).label("turnover_90d"),
+            turnover(365).label("turnover_365d"),
+            now.label("computed_at"),
+        )
+    )
+    if entity_type == "organization":
+        concentration = _concentration(entity_ids)
+        query = query.outerjoin(concentration, concentration.c.org_id == Invoice.org_id).add_columns(
+            func.max(concentration.c.customer_count).label("customer_count"),
+            func.max(concentration.c.top_customer_share).label("top_customer_share"),
+        )
+    else:
+        query = query.add_columns(
+            cast(None, Integer).label("customer_count"),
+            cast(None, Numeric).label("top_customer_share"),
+        )
+
+    selected = {column.name: column for column in query.selected_columns}
+    return query.with_only_columns(*(selected[name] for name in STORE_COLUMNS))
+
+
+def refresh_features(conn, keys: Iterable[EntityKey]) -> None:
+    """Recompute the store rows for the given entities on `conn` (a Connection or Session)"""
+    by_type: dict[str, set[int]] = {}
+    for entity_type, entity_id in keys:
+        if entity_id is not None:
+            by_type.setdefault(entity_type, set()).add(entity_id)
+
+    for entity_type, ids in by_type.items():
+        entity_ids = sorted(ids)
+        # Entities left without invoices keep no row (they read as all-zero)
+        conn.execute(
+            delete(EntityFeatures)
+            .where(EntityFeatures.entity_type == entity_type)
+            .where(EntityFeatures.entity_id.in_(entity_ids))
+        )
+        statement = pg_insert(EntityFeatures).from_select(
+            list(STORE_COLUMNS), store_query(entity_type, entity_ids)
+        )
+        conn.execute(
+            statement.on_conflict_do_update(
+                index_elements=["entity_type", "entity_id"],
+                set_={name: statement.excluded[name] for name in STORE_COLUMNS[2:]},
+            )
+        )
+
+
+def invoice_contribution(invoice: dict, now: Optional[datetime] = None) -> dict:
+    """What one invoice adds to the additive columns of its entities (mirrors store_query)"""
+    if invoice["status"] in EXCLUDED_STATUSES:
+        return {}
+    now = now or datetime.now(timezone.utc)
+    total = Decimal(invoice["total_amount"] or 0)
+    contribution = {"invoice_count": 1, "total_invoiced": total}
+
+    def since(value, days: int) -> bool:
+        if value is None:
+            return False
+        reference = now if value.tzinfo is not None else now.replace(tzinfo=None)
+        return value >= reference - timedelta(days=days)
+
+    if invoice["status"] in OPEN_STATUSES:
+        contribution["open_count"] = 1
+        contribution["outstanding_amount"] = total - Decimal(invoice["amount_paid"] or 0)
+        due_date = invoice["due_date"]
+        if since(due_date, 0):
+            bucket = "dpd_current"
+        elif since(due_date, 30):
+            bucket = "dpd_1_30"
+        elif since(due_date, 60):
+            bucket = "dpd_31_60"
+        elif since(due_date, 90):
+            bucket = "dpd_61_90"
+        else:
+            bucket = "dpd_over_90"
+        contribution[bucket] = 1
+    for days in (30, 90, 365):
+        if since(invoice["issued_date"], days):
+            contribution[f"turnover_{days}d"] = total
+    return contribution
+
+
+def add_invoice_deltas(
+    deltas: dict[EntityKey, dict], invoice: dict, sign: int = 1, now: Optional[datetime] = None
+) -> None:
+    """Accumulate an invoice's contribution (sign=-1 to withdraw it) into deltas, per entity"""
+    contribution = invoice_contribution(invoice, now)
+    if not contribution:
+        return
+    for key in (("organization", invoice["org_id"]), ("customer", invoice["customer_id"])):
+        if key[1] is None:
+            continue
+        entry = deltas.setdefault(key, {"org_id": invoice["org_id"]})
+        for name, value in contribution.items():
+            entry[name] = entry.get(name, 0) + sign * value
+
+
+def apply_deltas(conn, deltas: dict[EntityKey, dict]) -> None:
+    """Add accumulated contributions to the store rows on `conn` (a Connection or Session).
+
+    Entities without a row get one holding just the additive columns; the
+    deferred recompute fills in the rest.
+    """
+    rows = []
+    for (entity_type, entity_id), entry in sorted(deltas.items()):
+        changes = {name: entry.get(name, 0) for name in ADDITIVE_COLUMNS}
+        if not any(changes.values()):
+            continue
+        rows.append({"entity_type": entity_type, "entity_id": entity_id, "org_id": entry["org_id"], **changes})
+    if not rows:
+        return
+    statement = pg_insert(EntityFeatures).values(rows)
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=["entity_type", "entity_id"],
+        set_={
+            name: getattr(EntityFeatures, name) + statement.excluded[name]
+            for name in ADDITIVE_COLUMNS
+        },
+    ))
+
+
+def schedule_refresh(keys: Iterable[EntityKey]) -> None:
+    """Queue entities for the deferred recompute (call after commit)"""
+    members = sorted({f"{entity_type}:{entity_id}" for entity_type, entity_id in keys if entity_id is not None})
+    if not members:
+        return
+    try:
+        redis = get_sync_redis()
+        redis.sadd(REFRESH_QUEUE_KEY, *members)
+        scheduled = redis.set(REFRESH_SCHEDULED_KEY, "1", nx=True, ex=REFRESH_SCHEDULED_TTL_SECONDS)
+    except Exception as exc:
+        logger.warning(f"Could not queue feature refresh of {len(members)} entities: {exc}")
+        return
+    if not scheduled:
+        return
+
+    from app.tasks.features import refresh_pending
+
+    refresh_pending.apply_async(countdown=settings.FEATURE_REFRESH_DELAY_SECONDS)
+
+
+def refresh_pending(engine: Engine, batch_size: Optional[int] = None) -> int:
+    """Recompute every queued entity, one transaction per batch; returns how many"""
+    from app.services.score_service import mark_stale, score_service
+
+    batch_size = batch_size or settings.FEATURE_REFRESH_BATCH_SIZE
+    redis = get_sync_redis()
+    # Entities queued from here on schedule the next run
+    redis.delete(REFRESH_SCHEDULED_KEY)
+    refreshed = 0
+    while True:
+        members = redis.spop(REFRESH_QUEUE_KEY, batch_size)
+        if not members:
+            break
+        keys = []
+        for member in members:
+            entity_type, entity_id = (member.decode() if isinstance(member, bytes) else member).split(":")
+            keys.append((entity_type, int(entity_id)))
+        try:
+            with engine.begin() as conn:
+                refresh_features(conn, keys)
+                # Scores computed since the write saw the old ratios
+                mark_stale(conn, keys)
+        except Exception:
+            redis.sadd(REFRESH_QUEUE_KEY, *members)
+            raise
+        score_service.invalidate_sync(keys)
+        refreshed += len(keys)
+    if refreshed:
+        logger.info(f"Recomputed features for {refreshed} entities")
+    return refreshed
+
+
+def get_feature_vector(db: Session, entity_type: str, entity_id: int) -> Optional[dict]:
+    """Credit model features for one entity, or None if the store has no row"""
+    row = db.execute(
+        select(*(getattr(EntityFeatures, name) for name in FEATURE_NAMES))
+        .where(EntityFeatures.entity_type == entity_type)
+        .where(EntityFeatures.entity_id == entity_id)
+    ).mappings().first()
+    if row is None:
+        return None
+    return {name: float(row[name] or 0) for name in FEATURE_NAMES}
+
+
+def get_feature_vectors(db: Session, entity_type: str, entity_ids: list[int]) -> dict[int, dict]:
+    """Credit model features keyed by entity id (entities without a row are omitted)"""
+    rows = db.execute(
+        select(EntityFeatures.entity_id, *(getattr(EntityFeatures, name) for name in FEATURE_NAMES))
+        .where(EntityFeatures.entity_type == entity_type)
+        .where(EntityFeatures.entity_id.in_(entity_ids))
+    ).mappings()
+    return {
+        row["entity_id"]: {name: float(row[name] or 0) for name in FEATURE_NAMES}
+        for row in rows
+    }
+
+
+def refresh_all(engine: Engine, entity_types: Iterable[str] = ENTITY_TYPES, batch_size: int = 1000) -> dict:
+    """Recompute every entity, one transaction per batch of ids"""
+    tables = {"organization": Organization, "customer": Customer}
+    counts = {}
+    for entity_type in entity_types:
+        table = tables[entity_type]
+        started = time.perf_counter()
+        last_id = 0
+        refreshed = 0
+        while True:
+            with engine.begin() as conn:
+                entity_ids = list(conn.execute(
+                    select(table.id).where(table.id > last_id).order_by(table.id).limit(batch_size)
+                ).scalars())
+                if not entity_ids:
+                    break
+                refresh_features(conn, ((entity_type, entity_id) for entity_id in entity_ids))
+            last_id = entity_ids[-1]
+            refreshed += len(entity_ids)
+        counts[entity_type] = refreshed
+        logger.info(
+            f"Refreshed features for {refreshed} {entity_type}s in {time.perf_counter() - started:.1f}s"
+        )
+    return counts
+
+
+def _invoice_state(target: Invoice, previous: bool = False) -> dict:
+    """The invoice's aggregate inputs, as flushed now or (previous=True) before this flush"""
+    state = inspect(target)
+    values = {}
+    for name in FEATURE_INPUT_COLUMNS:
+        value = getattr(target, name)
+        if previous:
+            history = getattr(state.attrs, name).history
+            if history.deleted:
+                value = history.deleted[0]
+        values[name] = value
+    return values
+
+
+def _queue_deltas(target: Invoice, new: Optional[dict], old: Optional[dict] = None) -> None:
+    session = inspect(target).session
+    if session is None:
+        return
+    deltas = session.info.setdefault(_PENDING_KEY, {})
+    dirty = session.info.setdefault(_DIRTY_KEY, set())
+    for invoice, sign in ((new, 1), (old, -1)):
+        if invoice is not None:
+            add_invoice_deltas(deltas, invoice, sign)
+            dirty.update({("organization", invoice["org_id"]), ("customer", invoice["customer_id"])})
+
+
+@event.listens_for(Invoice, "after_insert")
+def _queue_features_for_new_invoice(mapper, connection, target):
+    _queue_deltas(target, new=_invoice_state(target))
+
+
+@event.listens_for(Invoice, "after_delete")
+def _queue_features_for_deleted_invoice(mapper, connection, target):
+    _queue_deltas(target, new=None, old=_invoice_state(target, previous=True))
+
+
+@event.listens_for(Invoice, "after_update")
+def _queue_features_for_changed_invoice(mapper, connection, target):
+    state = inspect(target)
+    if any(getattr(state.attrs, name).history.has_changes() for name in FEATURE_INPUT_COLUMNS):
+        # An invoice moved to another customer/org changes both sides
+        _queue_deltas(target, new=_invoice_state(target), old=_invoice_state(target, previous=True))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flushed_deltas(session, flush_context):
+    # Once per flush, however many invoices it wrote
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_committed_refreshes(session):
+    keys = session.info.pop(_DIRTY_KEY, None)
+    if keys:
+        schedule_refresh(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_feature_refreshes(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,104 @@
+"""Cashflow forecast read path.
+
+A request never fits a model. It computes the organization's current data
+watermark (an index-only aggregate over its paid invoices) and serves the
+stored forecast. If the stored forecast was fitted at an older watermark, it
+is still returned, flagged ``stale``, and one refit is queued on the Celery
+workers (deduplicated across API workers with a Redis lock, which is left to
+expire when the refit stored nothing, e.g. for too little history). Parsed
+forecasts are cached in process by (org_id, watermark), so a hit costs one
+aggregate query.
+"""
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache, get_redis
+from app.core.config import settings
+from app.db.models.cashflow_forecast import CashflowForecast
+from app.db.models.invoice import Invoice
+from app.ml.forecasting import format_watermark, watermark_query
+
+logger = logging.getLogger(__name__)
+
+REDIS_REFIT_LOCK_PREFIX = "forecast-refit:"
+
+forecast_cache = TTLCache(
+    "forecast",
+    maxsize=settings.FORECAST_CACHE_MAX_SIZE,
+    ttl=settings.FORECAST_CACHE_TTL_SECONDS,
+)
+
+
+def _serialize(row: CashflowForecast) -> dict:
+    return {
+        "org_id": row.org_id,
+        "data_watermark": row.data_watermark,
+        "model_type": row.model_type,
+        "model_version": row.model_version,
+        "history_start": row.history_start,
+        "history_end": row.history_end,
+        "history_days": row.history_days,
+        "horizon_days": row.horizon_days,
+        "computed_at": row.created_at,
+        "points": json.loads(row.forecast_json),
+    }
+
+
+async def current_watermark(db: AsyncSession, org_id: int) -> Optional[str]:
+    row = (await db.execute(watermark_query().where(Invoice.org_id == org_id))).first()
+    if row is None:
+        return None
+    return format_watermark(row.payments, row.total_paid, row.last_payment)
+
+
+async def schedule_refit(org_id: int) -> bool:
+    """Queue one refit per organization at a time; False if one is already queued"""
+    try:
+        queued = await get_redis().set(
+            REDIS_REFIT_LOCK_PREFIX + str(org_id), "1", nx=True, ex=settings.FORECAST_REFIT_LOCK_SECONDS
+        )
+    except Exception as exc:
+        logger.warning(f"Forecast refit lock unavailable, skipping refit of {org_id}: {exc}")
+        return False
+    if not queued:
+        return False
+
+    from app.tasks.forecasting import refit_organization
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, refit_organization.delay, org_id)
+    return True
+
+
+async def get_forecast(db: AsyncSession, org_id: int) -> Optional[dict]:
+    """Stored forecast for an organization, or None if it has never been fitted"""
+    watermark = await current_watermark(db, org_id)
+    if watermark is None:
+        return None
+
+    entry = forecast_cache.get((org_id, watermark))
+    if entry is not None:
+        return {**entry, "stale": False}
+
+    row = (await db.execute(
+        select(CashflowForecast)
+        .where(CashflowForecast.org_id == org_id)
+        .order_by(CashflowForecast.created_at.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+
+    if row is None or row.data_watermark != watermark:
+        await schedule_refit(org_id)
+    if row is None:
+        return None
+
+    entry = _serialize(row)
+    stale = row.data_watermark != watermark
+    if not stale:
+        forecast_cache.set((org_id, watermark), entry)
+    return {**entry, "stale": stale}
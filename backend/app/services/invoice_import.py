@@ -0,0 +1,354 @@
+"""Bulk invoice import.
+
+Streams CSV or JSON-lines input, validates it in chunks, resolves customers
+by (org_id, name, tax_id) and loads each chunk of invoices with a single
+PostgreSQL COPY (into a staging table) or multi-row INSERT, both ending in
+ON CONFLICT (invoice_number) DO NOTHING so re-running an import is safe.
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from itertools import islice
+from typing import IO, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models.customer import Customer
+from app.db.models.invoice import Invoice, InvoiceStatus
+from app.services.feature_store import add_invoice_deltas, apply_deltas, schedule_refresh
+from app.services.score_service import mark_stale, score_service
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_LOCK_NAMESPACE = 5001  # pg_advisory_xact_lock(namespace, org_id)
+
+# Columns written by the loader, in COPY order
+INVOICE_COLUMNS = (
+    "org_id", "customer_id", "creator_id", "invoice_number", "amount", "currency",
+    "tax_amount", "total_amount", "amount_paid", "issued_date", "due_date",
+    "payment_date", "status", "description", "ocr_extracted",
+)
+
+
+class InvoiceImportRow(BaseModel):
+    """One invoice as it appears in an import file"""
+    invoice_number: str
+    customer_name: str
+    customer_tax_id: Optional[str] = None
+    customer_email: Optional[str] = None
+    customer_phone: Optional[str] = None
+    amount: Decimal
+    tax_amount: Decimal = Decimal("0")
+    total_amount: Optional[Decimal] = None
+    amount_paid: Decimal = Decimal("0")
+    currency: str = "USD"
+    issued_date: datetime
+    due_date: datetime
+    payment_date: Optional[datetime] = None
+    status: InvoiceStatus = InvoiceStatus.ISSUED
+    description: Optional[str] = None
+
+    @field_validator("issued_date", "due_date", "payment_date", mode="before")
+    @classmethod
+    def _accept_plain_dates(cls, value):
+        # Spreadsheets usually export dates without a time component
+        if isinstance(value, str) and len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time(), tzinfo=timezone.utc)
+        if isinstance(value, datetime) and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    @field_validator("issued_date", "due_date", "payment_date", mode="after")
+    @classmethod
+    def _assume_utc(cls, value):
+        # Timestamps without an offset are UTC, so every value compares with every other
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    @model_validator(mode="after")
+    def _fill_total(self):
+        if self.total_amount is None:
+            self.total_amount = self.amount + self.tax_amount
+        if self.due_date < self.issued_date:
+            raise ValueError("due_date is before issued_date")
+        return self
+
+    @property
+    def customer_key(self) -> tuple[str, str]:
+        return self.customer_name, self.customer_tax_id or ""
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import run"""
+    rows_read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    customers_created: int = 0
+    elapsed_seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add_error(self, row: int, error: str, invoice_number: Optional[str] = None) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "invoice_number": invoice_number, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "customers_created": self.customers_created,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": self.errors,
+            "errors_truncated": len(self.errors) >= MAX_REPORTED_ERRORS,
+        }
+
+
+def detect_format(filename: str) -> str:
+    """Infer the import format from a file name"""
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    raise ValueError(f"Cannot infer import format from '{filename}' (expected .csv or .jsonl)")
+
+
+def iter_records(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, dict]]:
+    """Yield (row number, raw record) from a binary CSV or JSON-lines stream"""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for row_number, record in enumerate(csv.DictReader(text_stream), start=2):
+            # Empty CSV cells mean "not provided"
+            yield row_number, {k: (v if v != "" else None) for k, v in record.items() if k}
+    elif fmt == "jsonl":
+        for row_number, line in enumerate(text_stream, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield row_number, {"__error__": f"Invalid JSON: {exc.msg}"}
+                    continue
+                if not isinstance(record, dict):
+                    record = {"__error__": "Expected a JSON object"}
+                yield row_number, record
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _chunks(records: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class InvoiceImporter:
+    """Load invoices for one organization in validated, batched chunks"""
+
+    def __init__(
+        self,
+        db: Session,
+        org_id: int,
+        creator_id: int,
+        method: str = "copy",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if method not in ("copy", "insert"):
+            raise ValueError(f"Unsupported load method: {method}")
+        self.db = db
+        self.org_id = org_id
+        self.creator_id = creator_id
+        self.method = method
+        self.chunk_size = chunk_size
+        self.report = ImportReport()
+
+    def run(self, records: Iterable[tuple[int, dict]]) -> ImportReport:
+        started = time.perf_counter()
+        for chunk in _chunks(records, self.chunk_size):
+            self.report.rows_read += len(chunk)
+            rows = self._validate(chunk)
+            if rows:
+                self._load_chunk(rows)
+            self.report.elapsed_seconds = time.perf_counter() - started
+        self.report.elapsed_seconds = time.perf_counter() - started
+        return self.report
+
+    def _validate(self, chunk: list[tuple[int, dict]]) -> list[tuple[int, InvoiceImportRow]]:
+        valid = []
+        seen = set()
+        for row_number, record in chunk:
+            if "__error__" in record:
+                self.report.invalid += 1
+                self.report.add_error(row_number, record["__error__"])
+                continue
+            try:
+                row = InvoiceImportRow.model_validate(record)
+            except ValidationError as exc:
+                self.report.invalid += 1
+                message = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+                    for err in exc.errors()
+                )
+                self.report.add_error(row_number, message, record.get("invoice_number"))
+                continue
+            if row.invoice_number in seen:
+                self.report.duplicates += 1
+                self.report.add_error(row_number, "Duplicate invoice_number in file", row.invoice_number)
+                continue
+            seen.add(row.invoice_number)
+            valid.append((row_number, row))
+        return valid
+
+    def _load_chunk(self, rows: list[tuple[int, InvoiceImportRow]]) -> None:
+        # Serialize concurrent imports for the same organization so two runs
+        # cannot both create the same customer.
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :org_id)"),
+            {"namespace": IMPORT_LOCK_NAMESPACE, "org_id": self.org_id},
+        )
+        customer_ids = self._resolve_customers([row for _, row in rows])
+
+        values = [
+            {
+                "org_id": self.org_id,
+                "customer_id": customer_ids[row.customer_key],
+                "creator_id": self.creator_id,
+                "invoice_number": row.invoice_number,
+                "amount": row.amount,
+                "currency": row.currency,
+                "tax_amount": row.tax_amount,
+                "total_amount": row.total_amount,
+                "amount_paid": row.amount_paid,
+                "issued_date": row.issued_date,
+                "due_date": row.due_date,
+                "payment_date": row.payment_date,
+                "status": row.status,
+                "description": row.description,
+                "ocr_extracted": False,
+            }
+            for _, row in rows
+        ]
+        if self.method == "copy":
+            inserted = self._copy_invoices(values)
+        else:
+            inserted = self._insert_invoices(values)
+        deltas = {}
+        if inserted:
+            # Core inserts bypass the ORM listeners that maintain the feature
+            # store and flag scores stale, so do their work per chunk.
+            for value in values:
+                if value["invoice_number"] in inserted:
+                    add_invoice_deltas(deltas, value)
+            apply_deltas(self.db, deltas)
+            mark_stale(self.db, deltas.keys())
+        self.db.commit()
+        score_service.invalidate_sync(deltas.keys())
+        schedule_refresh(deltas.keys())
+
+        self.report.inserted += len(inserted)
+        for row_number, row in rows:
+            if row.invoice_number not in inserted:
+                self.report.duplicates += 1
+                self.report.add_error(row_number, "invoice_number already exists", row.invoice_number)
+
+    def _resolve_customers(self, rows: list[InvoiceImportRow]) -> dict[tuple[str, str], int]:
+        """Map (name, tax_id) to customer ids, creating missing customers in bulk"""
+        wanted = {row.customer_key: row for row in rows}
+        tax_key = func.coalesce(Customer.tax_id, "")
+
+        def lookup(keys) -> dict[tuple[str, str], int]:
+            result = self.db.execute(
+                select(Customer.name, tax_key, func.min(Customer.id))
+                .where(Customer.org_id == self.org_id)
+                .where(tuple_(Customer.name, tax_key).in_(list(keys)))
+                .group_by(Customer.name, tax_key)
+            )
+            return {(name, tax_id): customer_id for name, tax_id, customer_id in result}
+
+        found = lookup(wanted.keys())
+        missing = [key for key in wanted if key not in found]
+        if missing:
+            self.db.execute(
+                pg_insert(Customer),
+                [
+                    {
+                        "org_id": self.org_id,
+                        "name": wanted[key].customer_name,
+                        "tax_id": wanted[key].customer_tax_id,
+                        "email": wanted[key].customer_email,
+                        "phone": wanted[key].customer_phone,
+                    }
+                    for key in missing
+                ],
+            )
+            self.report.customers_created += len(missing)
+            found.update(lookup(missing))
+        return found
+
+    def _insert_invoices(self, values: list[dict]) -> set[str]:
+        statement = (
+            pg_insert(Invoice)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["invoice_number"])
+            .returning(Invoice.invoice_number)
+        )
+        return set(self.db.execute(statement).scalars())
+
+    def _copy_invoices(self, values: list[dict]) -> set[str]:
+        """COPY the chunk into a temp staging table, then merge it in one statement"""
+        columns = ", ".join(INVOICE_COLUMNS)
+        self.db.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS invoice_import_staging "
+            f"AS SELECT {columns} FROM invoices WITH NO DATA"
+        ))
+        self.db.execute(text("TRUNCATE invoice_import_staging"))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for value in values:
+            writer.writerow([
+                value["status"].name if column == "status" else _copy_value(value[column])
+                for column in INVOICE_COLUMNS
+            ])
+        buffer.seek(0)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY invoice_import_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+        result = self.db.execute(text(
+            f"INSERT INTO invoices ({columns}) SELECT {columns} FROM invoice_import_staging "
+            "ON CONFLICT (invoice_number) DO NOTHING RETURNING invoice_number"
+        ))
+        return set(result.scalars())
+
+
+def _copy_value(value):
+    """Render a value for COPY ... WITH (FORMAT csv); unquoted empty = NULL"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
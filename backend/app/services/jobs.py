@@ -0,0 +1,74 @@
+"""Background jobs that clients poll instead of holding a request open.
+
+``submit`` sends a Celery task with a fresh id and records who started it,
+and what kind of job it is, in Redis for JOB_RESULT_TTL_SECONDS. The Celery
+result backend is kept for the same time. ``status`` combines the two:
+the task state (PENDING, STARTED, PROGRESS, SUCCESS, FAILURE, ...), the
+progress the task reports with ``update_state``, and the result or error
+once it has finished. Only the owner's requests reach the result backend.
+Celery itself is imported on first use.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+
+from app.core.cache import get_redis
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from celery import Task
+
+REDIS_KEY_PREFIX = "job:"
+
+FINISHED_STATES = ("SUCCESS", "FAILURE", "REVOKED")
+
+
+async def submit(task: "Task", args: tuple, owner_id: int, kind: str, priority: Optional[int] = None) -> str:
+    """Queue a task as a pollable job; returns the job id"""
+    job_id = uuid.uuid4().hex
+    record = {"kind": kind, "owner_id": owner_id, "created_at": datetime.now(timezone.utc).isoformat()}
+    await get_redis().set(REDIS_KEY_PREFIX + job_id, json.dumps(record), ex=settings.JOB_RESULT_TTL_SECONDS)
+    options = {"priority": priority} if priority is not None else {}
+    loop = asyncio.get_running_loop()
+    # Publishing to the broker is a blocking call
+    await loop.run_in_executor(None, partial(task.apply_async, args=args, task_id=job_id, **options))
+    return job_id
+
+
+def _task_state(job_id: str) -> tuple[str, object]:
+    from celery.result import AsyncResult
+
+    from app.celery_app import celery_app
+
+    result = AsyncResult(job_id, app=celery_app)
+    return result.state, result.info
+
+
+async def status(job_id: str, owner_id: Optional[int] = None) -> Optional[dict]:
+    """Current state of a job, or None if it is unknown, expired or (with owner_id) someone else's.
+
+    Ownership is checked on the stored record, so the result backend is only
+    queried for the job's owner.
+    """
+    raw = await get_redis().get(REDIS_KEY_PREFIX + job_id)
+    if raw is None:
+        return None
+    record = json.loads(raw)
+    if owner_id is not None and record["owner_id"] != owner_id:
+        return None
+    loop = asyncio.get_running_loop()
+    state, info = await loop.run_in_executor(None, _task_state, job_id)
+    return {
+        "job_id": job_id,
+        "kind": record["kind"],
+        "owner_id": record["owner_id"],
+        "created_at": record["created_at"],
+        "state": state,
+        "finished": state in FINISHED_STATES,
+        "progress": info if state == "PROGRESS" and isinstance(info, dict) else None,
+        "result": info if state == "SUCCESS" else None,
+        "error": str(info) if state == "FAILURE" else None,
+    }
@@ -0,0 +1,251 @@
+"""Marketplace listings: the read side of the tranche marketplace.
+
+``marketplace_listings`` keeps one denormalized row per tranche: the
+tranche's terms and funding progress, plus the invoice fields investors
+filter on. Browse queries read only this table, through partial indexes
+covering pledgeable rows (OPEN, FUNDING). Funded or closed tranches stay in
+the table but drop out of every index used for browsing.
+
+Rows are kept current at write time:
+- pledges update their listing row in the same statement that admits them
+  (app.services.pledging);
+- ORM inserts/updates of a Tranche, and invoice changes to the copied
+  columns, queue the affected tranches. These are re-copied at flush, in
+  the writer's transaction (the same pattern as app.services.feature_store).
+
+Pages are served with keyset pagination on NOT NULL sort keys and cached
+in-process for MARKETPLACE_CACHE_TTL_SECONDS. A listing may show a remaining
+amount a few seconds stale; the pledge itself is always checked against the
+tranche row.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import DateTime, Numeric, event, func, inspect, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models.invoice import Invoice
+from app.db.models.marketplace_listing import LISTED_PREDICATE, NO_DEADLINE, NO_RETURN, MarketplaceListing
+from app.db.models.tranche import Tranche
+
+_PENDING_KEY = "listing_refreshes"
+
+# Invoice columns copied into listings
+LISTED_INVOICE_COLUMNS = ("org_id", "currency", "due_date")
+
+LISTING_COLUMNS = (
+    "tranche_id", "invoice_id", "org_id", "tranche_number", "currency", "status",
+    "risk_band", "risk_score", "return_percentage", "funding_deadline", "maturity_date",
+    "invoice_due_date", "sort_deadline", "sort_return",
+    "target_amount", "pledged_amount", "remaining_amount", "minimum_investment", "maximum_investment",
+    "updated_at",
+)
+
+# name -> (sort key column, descending)
+SORTS = {
+    "deadline": (MarketplaceListing.sort_deadline, False),
+    "return": (MarketplaceListing.sort_return, True),
+    "remaining": (MarketplaceListing.remaining_amount, False),
+}
+
+listing_cache = TTLCache(
+    "marketplace",
+    maxsize=settings.MARKETPLACE_CACHE_MAX_SIZE,
+    ttl=settings.MARKETPLACE_CACHE_TTL_SECONDS,
+)
+
+
+def listing_query():
+    """Tranche rows shaped as marketplace_listings rows"""
+    return (
+        select(
+            Tranche.id.label("tranche_id"),
+            Tranche.invoice_id,
+            Invoice.org_id,
+            Tranche.tranche_number,
+            Invoice.currency,
+            Tranche.status,
+            Tranche.risk_band,
+            Tranche.risk_score,
+            Tranche.return_percentage,
+            Tranche.funding_deadline,
+            Tranche.maturity_date,
+            Invoice.due_date.label("invoice_due_date"),
+            func.coalesce(Tranche.funding_deadline, literal(NO_DEADLINE, DateTime(timezone=True))).label("sort_deadline"),
+            func.coalesce(Tranche.return_percentage, literal(NO_RETURN, Numeric(5, 2))).label("sort_return"),
+            Tranche.target_amount,
+            Tranche.pledged_amount,
+            (Tranche.target_amount - Tranche.pledged_amount).label("remaining_amount"),
+            Tranche.minimum_investment,
+            Tranche.maximum_investment,
+            func.now().label("updated_at"),
+        )
+        .join(Invoice, Invoice.id == Tranche.invoice_id)
+    )
+
+
+def refresh_listings(conn, tranche_ids: Iterable[int] = (), invoice_ids: Iterable[int] = ()) -> None:
+    """Re-copy the listings of the given tranches (and of every tranche on the given invoices)"""
+    conditions = []
+    tranche_ids = sorted({i for i in tranche_ids if i is not None})
+    invoice_ids = sorted({i for i in invoice_ids if i is not None})
+    if tranche_ids:
+        conditions.append(Tranche.id.in_(tranche_ids))
+    if invoice_ids:
+        conditions.append(Tranche.invoice_id.in_(invoice_ids))
+    if not conditions:
+        return
+    statement = pg_insert(MarketplaceListing).from_select(
+        list(LISTING_COLUMNS), listing_query().where(or_(*conditions))
+    )
+    conn.execute(
+        statement.on_conflict_do_update(
+            index_elements=["tranche_id"],
+            set_={name: statement.excluded[name] for name in LISTING_COLUMNS[1:]},
+        )
+    )
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class BrowseFilters:
+    risk_bands: tuple[str, ...] = ()
+    min_return: Optional[Decimal] = None
+    min_remaining: Optional[Decimal] = None
+    max_remaining: Optional[Decimal] = None
+    deadline_before: Optional[datetime] = None
+    currency: Optional[str] = None
+
+
+def _encode_cursor(sort: str, row) -> str:
+    value = row[SORTS[sort][0].key]
+    raw = json.dumps({
+        "s": sort,
+        "v": value.isoformat() if isinstance(value, datetime) else str(value),
+        "i": row["tranche_id"],
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(sort: str, cursor: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if data["s"] != sort:
+            raise ValueError("cursor belongs to another sort order")
+        value = datetime.fromisoformat(data["v"]) if sort == "deadline" else Decimal(data["v"])
+        return value, int(data["i"])
+    except (ValueError, KeyError, TypeError, ArithmeticError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def browse_query(filters: BrowseFilters, sort: str, cursor: Optional[str], limit: int):
+    """Keyset page over the partial index matching ``sort``"""
+    column, descending = SORTS[sort]
+    listing = MarketplaceListing
+    # Literal predicate (not bound parameters) so the planner can match the
+    # partial indexes even under a generic prepared-statement plan
+    query = select(*listing.__table__.c).where(LISTED_PREDICATE)
+    # Listings past their funding deadline are no longer pledgeable. now() is
+    # not immutable, so it cannot join LISTED_PREDICATE in the index
+    # predicates: the deadline index serves it as a range bound, the others
+    # as a filter on rows that are still OPEN/FUNDING.
+    query = query.where(listing.sort_deadline > func.now())
+
+    if filters.risk_bands:
+        query = query.where(listing.risk_band.in_(filters.risk_bands))
+    if filters.min_return is not None:
+        query = query.where(listing.sort_return >= filters.min_return)
+    if filters.min_remaining is not None:
+        query = query.where(listing.remaining_amount >= filters.min_remaining)
+    if filters.max_remaining is not None:
+        query = query.where(listing.remaining_amount <= filters.max_remaining)
+    if filters.deadline_before is not None:
+        query = query.where(listing.sort_deadline <= filters.deadline_before)
+    if filters.currency:
+        query = query.where(listing.currency == filters.currency)
+
+    if cursor:
+        last_value, last_id = _decode_cursor(sort, cursor)
+        key = tuple_(column, listing.tranche_id)
+        last = tuple_(literal(last_value, column.type), literal(last_id, listing.tranche_id.type))
+        query = query.where(key < last if descending else key > last)
+
+    if descending:
+        query = query.order_by(column.desc(), listing.tranche_id.desc())
+    else:
+        query = query.order_by(column, listing.tranche_id)
+    return query.limit(limit + 1)
+
+
+async def browse(
+    db: AsyncSession,
+    filters: BrowseFilters,
+    sort: str = "deadline",
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> tuple[list[dict], Optional[str], bool]:
+    """One page of pledgeable listings: (rows, next_cursor, served_from_cache)"""
+    cache_key = (filters, sort, cursor, limit)
+    cached = listing_cache.get(cache_key)
+    if cached is not None:
+        return cached[0], cached[1], True
+
+    result = await db.execute(browse_query(filters, sort, cursor, limit))
+    rows = [dict(row) for row in result.mappings().all()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(sort, rows[-1])
+
+    listing_cache.set(cache_key, (rows, next_cursor))
+    return rows, next_cursor, False
+
+
+def _queue_refresh(target, key: tuple[str, int]) -> None:
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(key)
+
+
+@event.listens_for(Tranche, "after_insert")
+def _queue_listing_for_new_tranche(mapper, connection, target):
+    _queue_refresh(target, ("tranche", target.id))
+
+
+@event.listens_for(Tranche, "after_update")
+def _queue_listing_for_changed_tranche(mapper, connection, target):
+    _queue_refresh(target, ("tranche", target.id))
+
+
+@event.listens_for(Invoice, "after_update")
+def _queue_listings_for_changed_invoice(mapper, connection, target):
+    state = inspect(target)
+    if any(getattr(state.attrs, name).history.has_changes() for name in LISTED_INVOICE_COLUMNS):
+        _queue_refresh(target, ("invoice", target.id))
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_flushed_listings(session, flush_context):
+    keys = session.info.pop(_PENDING_KEY, None)
+    if keys:
+        refresh_listings(
+            session.connection(),
+            tranche_ids=[i for kind, i in keys if kind == "tranche"],
+            invoice_ids=[i for kind, i in keys if kind == "invoice"],
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_listing_refreshes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,115 @@
+"""Overdue sweep: invoices still awaiting payment after their due date become OVERDUE.
+
+The sweep is set-based. Each chunk is one UPDATE of up to
+OVERDUE_SWEEP_CHUNK_SIZE invoices, picked oldest due date first from the
+partial index ix_invoices_awaiting_due. That index holds only ISSUED,
+PAYMENT_PENDING and PARTIALLY_PAID rows, so the sweep never reads paid or
+already overdue invoices, and each chunk it moves leaves the index. Rows
+locked by a concurrent writer (a payment being recorded, say) are skipped
+and picked up by the next run. Overlapping runs split the work instead of
+blocking each other.
+
+The UPDATE bypasses the ORM hooks, so each chunk does their work itself:
+- in its own transaction, it marks the scores of the affected organizations
+  and customers stale (OPEN to OVERDUE changes none of the additive feature
+  store columns);
+- after commit, it evicts those cached scores, queues the entities for the
+  deferred feature recompute (overdue ratio) and emits one audit record for
+  the chunk.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.models.invoice import AWAITING_PAYMENT_PREDICATE, Invoice, InvoiceStatus
+from app.services.audit import audit_sink
+from app.services.feature_store import schedule_refresh
+from app.services.score_service import mark_stale, score_service
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_chunk(conn, cutoff: datetime, chunk_size: int) -> list:
+    """Mark up to chunk_size invoices due before cutoff OVERDUE; returns their (id, org_id, customer_id)"""
+    due = (
+        select(Invoice.id)
+        # Literal predicate (not bound parameters) so the planner matches the partial index
+        .where(AWAITING_PAYMENT_PREDICATE)
+        .where(Invoice.due_date < cutoff)
+        .order_by(Invoice.due_date, Invoice.id)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    return list(conn.execute(
+        update(Invoice)
+        .where(Invoice.id == due.c.id)
+        .values(status=InvoiceStatus.OVERDUE, updated_at=func.now())
+        .returning(Invoice.id, Invoice.org_id, Invoice.customer_id)
+    ))
+
+
+def sweep(
+    engine: Engine,
+    chunk_size: Optional[int] = None,
+    grace_hours: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Sweep chunk by chunk, one transaction each, until nothing is left past due"""
+    chunk_size = chunk_size or settings.OVERDUE_SWEEP_CHUNK_SIZE
+    grace_hours = settings.OVERDUE_GRACE_HOURS if grace_hours is None else grace_hours
+    # Fixed for the run, so it ends even while more invoices fall due
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=grace_hours)
+
+    started = time.perf_counter()
+    chunks = invoices = 0
+    organizations: set[int] = set()
+    while True:
+        with engine.begin() as conn:
+            rows = sweep_chunk(conn, cutoff, chunk_size)
+            if not rows:
+                break
+            org_ids = sorted({row.org_id for row in rows})
+            keys = [("organization", org_id) for org_id in org_ids]
+            keys += [("customer", customer_id) for customer_id in sorted({row.customer_id for row in rows})]
+            mark_stale(conn, keys)
+        score_service.invalidate_sync(keys)
+        schedule_refresh(keys)
+
+        chunks += 1
+        invoices += len(rows)
+        organizations.update(org_ids)
+        audit_sink.emit(
+            "mark_overdue",
+            "invoice",
+            actor_type="system",
+            actor_name="overdue_sweep",
+            details={
+                "cutoff": cutoff.isoformat(),
+                "count": len(rows),
+                "invoice_ids": sorted(row.id for row in rows),
+                "org_ids": org_ids,
+            },
+        )
+        # A short chunk means nothing unlocked is left
+        if len(rows) < chunk_size:
+            break
+
+    elapsed = time.perf_counter() - started
+    if invoices:
+        logger.info(
+            f"Marked {invoices} invoices of {len(organizations)} organizations overdue "
+            f"in {chunks} chunks ({elapsed:.1f}s)"
+        )
+    return {
+        "cutoff": cutoff.isoformat(),
+        "invoices": invoices,
+        "organizations": len(organizations),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+    }
@@ -0,0 +1,231 @@
+"""Tranche pledging.
+
+A pledge is admitted by one conditional UPDATE of the tranche row, chained
+(as a CTE) into the INSERT of the pledge row. Both happen in a single
+autocommit statement. No read-modify-write, no SELECT ... FOR UPDATE, and
+the tranche row lock is held only while that statement runs. Concurrent
+pledges on a hot tranche still queue on the row, but each holds it for
+microseconds, not for a client round trip.
+
+The WHERE clause is the admission check. The tranche must be OPEN or
+FUNDING, before its deadline, and within the investment bounds, and the
+pledge must fit in what is left of target_amount. A tranche can therefore
+never be overfunded, and ck_tranches_not_overfunded backs that up. The
+pledge that fills the tranche moves it to FUNDED. Any earlier pledge moves
+it to FUNDING.
+
+The same statement also updates the tranche's marketplace listing
+(app.services.marketplace), so browse results track pledges without a
+separate refresh.
+
+When the UPDATE matches no row, the tranche is read once to explain why.
+That read is only on the rejection path.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import async_engine
+from app.core.metrics import PLEDGE_ATTEMPTS
+from app.db.models.tranche import TrancheStatus
+
+logger = logging.getLogger(__name__)
+
+PLEDGEABLE_STATUSES = (TrancheStatus.OPEN, TrancheStatus.FUNDING)
+
+# Enum columns hold the member names (SQLEnum), hence 'FUNDED' not 'funded'
+ADMIT_PLEDGE = text("""
+    WITH admitted AS (
+        UPDATE tranches
+        SET pledged_amount = pledged_amount + CAST(:amount AS NUMERIC),
+            status = CASE WHEN pledged_amount + CAST(:amount AS NUMERIC) >= target_amount
+                          THEN 'FUNDED'::tranchestatus ELSE 'FUNDING'::tranchestatus END,
+            funded_date = CASE WHEN pledged_amount + CAST(:amount AS NUMERIC) >= target_amount
+                               THEN now() ELSE funded_date END,
+            updated_at = now()
+        WHERE id = CAST(:tranche_id AS INTEGER)
+          AND status IN ('OPEN', 'FUNDING')
+          AND pledged_amount + CAST(:amount AS NUMERIC) <= target_amount
+          AND (funding_deadline IS NULL OR funding_deadline > now())
+          AND (maximum_investment IS NULL OR CAST(:amount AS NUMERIC) <= maximum_investment)
+          AND (minimum_investment IS NULL OR CAST(:amount AS NUMERIC) >= minimum_investment
+               OR pledged_amount + CAST(:amount AS NUMERIC) = target_amount)
+        RETURNING id, pledged_amount, target_amount, status
+    ), pledged AS (
+        INSERT INTO pledges (tranche_id, investor_id, amount, status, idempotency_key, created_at)
+        SELECT id, CAST(:investor_id AS INTEGER), CAST(:amount AS NUMERIC), 'PLEDGED'::pledgestatus,
+               CAST(:idempotency_key AS VARCHAR), now()
+        FROM admitted
+        RETURNING id, created_at
+    ), listed AS (
+        UPDATE marketplace_listings
+        SET pledged_amount = admitted.pledged_amount,
+            remaining_amount = admitted.target_amount - admitted.pledged_amount,
+            status = admitted.status,
+            updated_at = now()
+        FROM admitted
+        WHERE marketplace_listings.tranche_id = admitted.id
+    )
+    SELECT pledged.id AS pledge_id, pledged.created_at,
+           admitted.pledged_amount, admitted.target_amount, admitted.status
+    FROM admitted CROSS JOIN pledged
+""")
+
+FIND_PLEDGE = text("""
+    SELECT p.id AS pledge_id, p.tranche_id, p.amount, p.created_at,
+           t.pledged_amount, t.target_amount, t.status
+    FROM pledges p JOIN tranches t ON t.id = p.tranche_id
+    WHERE p.investor_id = CAST(:investor_id AS INTEGER)
+      AND p.idempotency_key = CAST(:idempotency_key AS VARCHAR)
+""")
+
+TRANCHE_STATE = text("""
+    SELECT status, pledged_amount, target_amount, funding_deadline,
+           minimum_investment, maximum_investment
+    FROM tranches WHERE id = CAST(:tranche_id AS INTEGER)
+""")
+
+
+class PledgeError(Exception):
+    """Base class for pledge failures"""
+
+
+class TrancheNotFoundError(PledgeError):
+    pass
+
+
+class PledgeRejectedError(PledgeError):
+    """The tranche cannot take this pledge (closed, full, out of bounds)"""
+
+    def __init__(self, message: str, reason: str, remaining: Optional[Decimal] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.remaining = remaining
+
+
+class IdempotencyConflictError(PledgeError):
+    """Idempotency key already used for a different tranche or amount"""
+
+
+@dataclass
+class PledgeResult:
+    pledge_id: int
+    tranche_id: int
+    amount: Decimal
+    pledged_amount: Decimal
+    target_amount: Decimal
+    tranche_status: TrancheStatus
+    created_at: datetime
+    replayed: bool = False
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.target_amount - self.pledged_amount
+
+
+def _status(value: str) -> TrancheStatus:
+    return TrancheStatus[value]
+
+
+async def _rejection(conn, tranche_id: int, amount: Decimal) -> PledgeError:
+    """Work out why the conditional UPDATE did not match"""
+    row = (await conn.execute(TRANCHE_STATE, {"tranche_id": tranche_id})).mappings().first()
+    if row is None:
+        return TrancheNotFoundError(f"Tranche {tranche_id} not found")
+    tranche_status = _status(row["status"])
+    remaining = row["target_amount"] - row["pledged_amount"]
+    if tranche_status not in PLEDGEABLE_STATUSES:
+        return PledgeRejectedError(f"Tranche is {tranche_status.value}", "closed", remaining)
+    if row["funding_deadline"] is not None and row["funding_deadline"] <= datetime.now(timezone.utc):
+        return PledgeRejectedError("Funding deadline has passed", "deadline_passed", remaining)
+    if amount > remaining:
+        return PledgeRejectedError(f"Only {remaining} left to pledge", "exceeds_remaining", remaining)
+    if row["maximum_investment"] is not None and amount > row["maximum_investment"]:
+        return PledgeRejectedError(f"Maximum pledge is {row['maximum_investment']}", "above_maximum", remaining)
+    if row["minimum_investment"] is not None and amount < row["minimum_investment"]:
+        return PledgeRejectedError(f"Minimum pledge is {row['minimum_investment']}", "below_minimum", remaining)
+    # The tranche changed between the UPDATE and this read
+    return PledgeRejectedError("Tranche changed, retry", "conflict", remaining)
+
+
+async def _replay(conn, tranche_id: int, investor_id: int, amount: Decimal, idempotency_key: str) -> Optional[PledgeResult]:
+    row = (await conn.execute(
+        FIND_PLEDGE, {"investor_id": investor_id, "idempotency_key": idempotency_key}
+    )).mappings().first()
+    if row is None:
+        return None
+    if row["tranche_id"] != tranche_id or row["amount"] != amount:
+        raise IdempotencyConflictError("Idempotency key was already used for a different pledge")
+    return PledgeResult(
+        pledge_id=row["pledge_id"],
+        tranche_id=row["tranche_id"],
+        amount=row["amount"],
+        pledged_amount=row["pledged_amount"],
+        target_amount=row["target_amount"],
+        tranche_status=_status(row["status"]),
+        created_at=row["created_at"],
+        replayed=True,
+    )
+
+
+async def pledge(
+    tranche_id: int,
+    investor_id: int,
+    amount: Decimal,
+    idempotency_key: Optional[str] = None,
+) -> PledgeResult:
+    """Admit a pledge atomically, or raise a PledgeError saying why not.
+
+    Retrying with the same ``idempotency_key`` returns the original pledge
+    instead of pledging twice.
+    """
+    amount = Decimal(amount).quantize(Decimal("0.01"))
+    if amount <= 0:
+        raise PledgeRejectedError("Pledge amount must be positive", "invalid_amount")
+
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if idempotency_key:
+            replayed = await _replay(conn, tranche_id, investor_id, amount, idempotency_key)
+            if replayed is not None:
+                PLEDGE_ATTEMPTS.labels(result="replayed").inc()
+                return replayed
+        try:
+            row = (await conn.execute(ADMIT_PLEDGE, {
+                "tranche_id": tranche_id,
+                "investor_id": investor_id,
+                "amount": amount,
+                "idempotency_key": idempotency_key,
+            })).mappings().first()
+        except IntegrityError:
+            # A concurrent retry with the same key won; the whole statement,
+            # tranche UPDATE included, was rolled back
+            replayed = await _replay(conn, tranche_id, investor_id, amount, idempotency_key) if idempotency_key else None
+            if replayed is None:
+                raise
+            PLEDGE_ATTEMPTS.labels(result="replayed").inc()
+            return replayed
+
+        if row is None:
+            error = await _rejection(conn, tranche_id, amount)
+            PLEDGE_ATTEMPTS.labels(result=getattr(error, "reason", "not_found")).inc()
+            raise error
+
+    PLEDGE_ATTEMPTS.labels(result="accepted").inc()
+    result = PledgeResult(
+        pledge_id=row["pledge_id"],
+        tranche_id=tranche_id,
+        amount=amount,
+        pledged_amount=row["pledged_amount"],
+        target_amount=row["target_amount"],
+        tranche_status=_status(row["status"]),
+        created_at=row["created_at"],
+    )
+    if result.tranche_status == TrancheStatus.FUNDED:
+        logger.info(f"Tranche {tranche_id} fully pledged ({result.target_amount})")
+    return result
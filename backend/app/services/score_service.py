@@ -0,0 +1,367 @@
+"""Credit score read path: in-process LRU -> Redis -> score_cache table.
+
+Scores are served stale-while-revalidate. A score past ``valid_until`` (or
+invalidated by an invoice change) is still returned, flagged ``stale``, while a
+single background refresh per (entity_type, entity_id) recomputes it. The
+refresh is single-flight within a worker (shared task) and across workers
+(Redis lock). Only an entity with no score at all, or one older than
+SCORE_MAX_STALE_SECONDS, makes the caller wait for inference.
+
+Callers resolve an entity's owner with ``owners`` and authorize before asking
+for its score; nothing is computed or cached for an entity that does not exist.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache, get_redis, get_sync_redis
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.metrics import CACHE_REQUESTS
+from app.db.models.customer import Customer
+from app.db.models.invoice import Invoice
+from app.db.models.organization import Organization
+from app.db.models.score_cache import ScoreCache
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "score:"
+REDIS_LOCK_PREFIX = "score-lock:"
+_PENDING_KEY = "score_invalidations"
+_background_tasks: set = set()
+
+# Invoice columns whose change affects a score (status, repayments)
+SCORE_INPUT_COLUMNS = ("status", "amount_paid", "payment_date", "total_amount", "due_date")
+
+EntityKey = tuple[str, int]
+
+SCORE_FIELDS = (
+    "entity_type", "entity_id", "org_id", "score", "score_band", "confidence",
+    "model_version", "model_type", "top_features", "valid_until", "is_valid",
+)
+
+
+class EntityNotFoundError(LookupError):
+    """The organization or customer to score does not exist"""
+
+
+def _cache_key(key: EntityKey) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+def _serialize(row) -> dict:
+    """Score entry as stored in the cache tiers (JSON-safe).
+    
+    Accepts a ScoreCache row or a freshly computed score dict.
+    """
+    if isinstance(row, dict):
+        entry = {name: row.get(name) for name in SCORE_FIELDS}
+        computed_at = datetime.now(timezone.utc)
+    else:
+        entry = {name: getattr(row, name) for name in SCORE_FIELDS}
+        computed_at = row.updated_at or row.created_at or datetime.now(timezone.utc)
+    for name in ("score", "confidence"):
+        if entry[name] is not None:
+            entry[name] = float(entry[name])
+    if isinstance(entry["valid_until"], datetime):
+        entry["valid_until"] = entry["valid_until"].isoformat()
+    if isinstance(entry["top_features"], str):
+        entry["top_features"] = json.loads(entry["top_features"])
+    entry["computed_at"] = computed_at.isoformat()
+    return entry
+
+
+def _is_fresh(entry: dict) -> bool:
+    if not entry.get("is_valid"):
+        return False
+    valid_until = entry.get("valid_until")
+    return valid_until is None or datetime.fromisoformat(valid_until) > datetime.now(timezone.utc)
+
+
+def _too_stale(entry: dict) -> bool:
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(entry["computed_at"])
+    return age.total_seconds() > settings.SCORE_MAX_STALE_SECONDS
+
+
+class ScoreService:
+    """Tiered, stale-while-revalidate score lookups with single-flight refresh"""
+
+    def __init__(self):
+        self.local = TTLCache(
+            "score",
+            maxsize=settings.SCORE_LOCAL_CACHE_SIZE,
+            ttl=settings.SCORE_LOCAL_CACHE_TTL_SECONDS,
+        )
+        self._inflight: dict[EntityKey, asyncio.Task] = {}
+        self._compute_slots: Optional[asyncio.Semaphore] = None
+
+    # Reads
+
+    async def owners(self, entity_type: str, entity_ids: Iterable[int]) -> dict[int, int]:
+        """Owning org_id of each entity that exists (unknown ids are left out)"""
+        ids = list(dict.fromkeys(entity_ids))
+        if not ids:
+            return {}
+        if entity_type == "organization":
+            query = select(Organization.id, Organization.id).where(Organization.id.in_(ids))
+        else:
+            query = select(Customer.id, Customer.org_id).where(Customer.id.in_(ids))
+        async with AsyncSessionLocal() as db:
+            return {entity_id: org_id for entity_id, org_id in (await db.execute(query)).all()}
+
+    async def get(self, entity_type: str, entity_id: int) -> dict:
+        """Score for one entity, recomputing inline only if there is none usable"""
+        key = (entity_type, entity_id)
+        entry = (await self.get_many(entity_type, [entity_id]))[entity_id]
+        if entry is None or _too_stale(entry):
+            entry = await self.refresh(key)
+        return entry
+
+    async def get_many(self, entity_type: str, entity_ids: Iterable[int]) -> dict[int, Optional[dict]]:
+        """Scores for many entities with at most one Redis and one DB round trip.
+
+        Never runs inference inline: missing or stale entities are queued for a
+        background refresh and come back as None (missing) or stale=True.
+        """
+        ids = list(dict.fromkeys(entity_ids))
+        found: dict[int, Optional[dict]] = {}
+
+        for entity_id in ids:
+            entry = self.local.get(_cache_key((entity_type, entity_id)))
+            if entry is not None:
+                found[entity_id] = entry
+
+        missing = [i for i in ids if i not in found]
+        if missing:
+            found.update(await self._get_from_redis(entity_type, missing))
+
+        missing = [i for i in ids if i not in found]
+        if missing:
+            from_db = await self._get_from_db(entity_type, missing)
+            found.update(from_db)
+            await self._store_in_redis(from_db.values())
+
+        results: dict[int, Optional[dict]] = {}
+        for entity_id in ids:
+            entry = found.get(entity_id)
+            if entry is None or not _is_fresh(entry):
+                self.schedule_refresh((entity_type, entity_id))
+            if entry is not None:
+                self.local.set(_cache_key((entity_type, entity_id)), entry)
+                entry = {**entry, "stale": not _is_fresh(entry)}
+            results[entity_id] = entry
+        return results
+
+    async def _get_from_redis(self, entity_type: str, ids: list[int]) -> dict[int, dict]:
+        try:
+            raw = await get_redis().mget([REDIS_KEY_PREFIX + _cache_key((entity_type, i)) for i in ids])
+        except Exception as exc:
+            logger.warning(f"Score cache Redis lookup failed: {exc}")
+            return {}
+        found = {i: json.loads(value) for i, value in zip(ids, raw) if value is not None}
+        CACHE_REQUESTS.labels(cache="score_redis", result="hit").inc(len(found))
+        CACHE_REQUESTS.labels(cache="score_redis", result="miss").inc(len(ids) - len(found))
+        return found
+
+    async def _store_in_redis(self, entries: Iterable[dict]) -> None:
+        entries = list(entries)
+        if not entries:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for entry in entries:
+                    key = REDIS_KEY_PREFIX + _cache_key((entry["entity_type"], entry["entity_id"]))
+                    pipe.set(key, json.dumps(entry), ex=settings.SCORE_REDIS_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as exc:
+            logger.warning(f"Score cache Redis write failed: {exc}")
+
+    async def _get_from_db(self, entity_type: str, ids: list[int]) -> dict[int, dict]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ScoreCache)
+                .where(ScoreCache.entity_type == entity_type)
+                .where(ScoreCache.entity_id.in_(ids))
+            )
+            return {row.entity_id: _serialize(row) for row in result.scalars()}
+
+    # Refresh
+
+    def schedule_refresh(self, key: EntityKey) -> None:
+        """Start a background refresh unless one is already running"""
+        if key not in self._inflight:
+            self._start_refresh(key)
+
+    async def refresh(self, key: EntityKey) -> dict:
+        """Recompute a score, joining an in-flight refresh if there is one"""
+        task = self._inflight.get(key) or self._start_refresh(key)
+        return await asyncio.shield(task)
+
+    def _start_refresh(self, key: EntityKey) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self._refresh(key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_refresh_done(key, t))
+        return task
+
+    def _on_refresh_done(self, key: EntityKey, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Score refresh for {_cache_key(key)} failed: {task.exception()}")
+
+    async def _refresh(self, key: EntityKey) -> dict:
+        if self._compute_slots is None:
+            self._compute_slots = asyncio.Semaphore(settings.SCORE_MAX_CONCURRENT_COMPUTES)
+
+        lock_key = REDIS_LOCK_PREFIX + _cache_key(key)
+        have_lock = True
+        try:
+            have_lock = bool(await get_redis().set(lock_key, "1", nx=True, ex=settings.SCORE_LOCK_SECONDS))
+        except Exception as exc:
+            logger.warning(f"Score refresh lock unavailable, computing locally: {exc}")
+
+        if not have_lock:
+            # Another worker is recomputing; give it a moment, then read its result
+            await asyncio.sleep(settings.SCORE_LOCK_WAIT_SECONDS)
+            entry = (await self._get_from_db(key[0], [key[1]])).get(key[1])
+            if entry is not None:
+                return entry
+
+        try:
+            async with self._compute_slots:
+                loop = asyncio.get_running_loop()
+                entry = await loop.run_in_executor(None, compute_and_store, key[0], key[1])
+        finally:
+            if have_lock:
+                try:
+                    await get_redis().delete(lock_key)
+                except Exception:
+                    pass
+
+        self.local.set(_cache_key(key), entry)
+        await self._store_in_redis([entry])
+        return entry
+
+    # Invalidation
+
+    def evict(self, keys: Iterable[EntityKey]) -> None:
+        for key in keys:
+            self.local.delete(_cache_key(key))
+
+    async def invalidate(self, keys: Iterable[EntityKey]) -> None:
+        keys = list(keys)
+        self.evict(keys)
+        if not keys:
+            return
+        try:
+            await get_redis().delete(*[REDIS_KEY_PREFIX + _cache_key(k) for k in keys])
+        except Exception as exc:
+            logger.warning(f"Score cache Redis invalidation failed: {exc}")
+
+    def invalidate_sync(self, keys: Iterable[EntityKey]) -> None:
+        keys = list(keys)
+        self.evict(keys)
+        if not keys:
+            return
+        try:
+            get_sync_redis().delete(*[REDIS_KEY_PREFIX + _cache_key(k) for k in keys])
+        except Exception as exc:
+            logger.warning(f"Score cache Redis invalidation failed: {exc}")
+
+
+def upsert_scores(db: Session, rows: list[dict]) -> None:
+    """Insert or replace score_cache rows keyed by (entity_type, entity_id)"""
+    if not rows:
+        return
+    statement = pg_insert(ScoreCache).values(rows)
+    columns = {
+        name: statement.excluded[name]
+        for name in rows[0]
+        if name not in ("entity_type", "entity_id")
+    }
+    columns["updated_at"] = datetime.now(timezone.utc)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["entity_type", "entity_id"], set_=columns
+    ))
+
+
+def compute_and_store(entity_type: str, entity_id: int) -> dict:
+    """Run inference for one entity and persist it (blocking; runs off-loop)"""
+    from app.ml.scoring import score_entity
+
+    with SessionLocal() as db:
+        if entity_type == "organization":
+            org_id = db.scalar(select(Organization.id).where(Organization.id == entity_id))
+        else:
+            org_id = db.scalar(select(Customer.org_id).where(Customer.id == entity_id))
+        if org_id is None:
+            raise EntityNotFoundError(f"{entity_type} {entity_id} not found")
+        row = score_entity(db, entity_type, entity_id, org_id=org_id)
+        upsert_scores(db, [row])
+        db.commit()
+    return _serialize(row)
+
+
+def mark_stale(conn, keys: Iterable[EntityKey]) -> None:
+    """Flag score_cache rows for recompute (they keep being served meanwhile)"""
+    keys = list(keys)
+    if keys:
+        conn.execute(
+            update(ScoreCache)
+            .where(tuple_(ScoreCache.entity_type, ScoreCache.entity_id).in_(keys))
+            .values(is_valid=False)
+        )
+
+
+score_service = ScoreService()
+
+
+def _invoice_score_keys(target: Invoice) -> list[EntityKey]:
+    return [("organization", target.org_id), ("customer", target.customer_id)]
+
+
+def _queue_invalidation(connection, target: Invoice) -> None:
+    """Mark affected scores stale in the same transaction as the invoice write"""
+    keys = _invoice_score_keys(target)
+    mark_stale(connection, keys)
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+
+@event.listens_for(Invoice, "after_insert")
+def _invalidate_scores_on_new_invoice(mapper, connection, target):
+    _queue_invalidation(connection, target)
+
+
+@event.listens_for(Invoice, "after_update")
+def _invalidate_scores_on_invoice_change(mapper, connection, target):
+    state = inspect(target)
+    if any(getattr(state.attrs, name).history.has_changes() for name in SCORE_INPUT_COLUMNS):
+        _queue_invalidation(connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_scores(session):
+    keys = session.info.pop(_PENDING_KEY, None)
+    if not keys:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        score_service.invalidate_sync(keys)
+    else:
+        score_service.evict(keys)
+        task = loop.create_task(score_service.invalidate(keys))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_score_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,449 @@
+"""Content-addressed file storage in MinIO.
+
+Blobs are scoped to the uploader's organization (or, for users without one,
+to the user): every file is stored once per scope, at
+``blobs/sha256/<scope>/<aa>/<sha256>``. Callers that know the hash up front
+(``X-Content-SHA256``, or the hash declared when a session is opened) skip
+the transfer entirely when their scope already holds the blob. Knowing a
+hash therefore never reveals, or grants access to, another tenant's file.
+
+Direct uploads stream the request body to MinIO as a multipart upload while
+hashing it, so a file is never held in memory or spooled to local disk. The
+object lands under a temporary key and is then server-side copied to its
+content address, unless an identical blob already exists.
+
+Resumable sessions (for the offline PWA sync queue) accept the file as a
+series of chunks at increasing offsets, each stored as its own object. The
+current offset lives in Redis, so a client that lost its connection asks for
+the offset and continues from there. When the last byte arrives, the chunks
+are read back once to verify the declared hash (SHA-256 state cannot be
+carried between requests). They are then joined server-side with
+compose_object, unless a chunk other than the last is below the 5 MB S3
+part minimum. In that case they are concatenated through the worker. If that
+step fails, the session stays open with every byte received, and the client
+retries it with ``complete_session``. Parts left behind by expired or
+abandoned sessions are removed by ``remove_orphaned_parts`` (housekeeping).
+"""
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import queue
+import uuid
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Optional
+
+from minio.commonconfig import ComposeSource, CopySource
+from minio.error import S3Error
+from redis.exceptions import WatchError
+
+from app.core.cache import get_redis, get_sync_redis
+from app.core.config import settings
+from app.core.storage import get_minio
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "blobs/sha256"
+STAGING_PREFIX = "uploads/staging"
+SESSION_PREFIX = "uploads/sessions"
+REDIS_SESSION_PREFIX = "upload-session:"
+
+# Request bodies arrive in small pieces; hand them to the upload thread in
+# blocks of at least this size
+HANDOFF_BYTES = 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 multipart minimum
+MAX_COMPOSE_SOURCES = 10000
+
+
+class UploadError(Exception):
+    """Base class for upload failures reported to the client"""
+
+
+class UploadTooLargeError(UploadError):
+    pass
+
+
+class HashMismatchError(UploadError):
+    pass
+
+
+class OffsetConflictError(UploadError):
+    def __init__(self, expected: int):
+        super().__init__(f"Upload offset must be {expected}")
+        self.expected = expected
+
+
+class SessionNotFoundError(UploadError):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    object_name: str
+    deduplicated: bool
+
+
+def blob_scope(org_id: Optional[int], user_id: int) -> str:
+    """Storage namespace of a principal's uploads: its organization, else the user"""
+    return f"org-{org_id}" if org_id is not None else f"user-{user_id}"
+
+
+def blob_name(scope: str, sha256: str) -> str:
+    return f"{BLOB_PREFIX}/{scope}/{sha256[:2]}/{sha256}"
+
+
+def _is_missing(exc: S3Error) -> bool:
+    return exc.code in ("NoSuchKey", "NoSuchObject", "ResourceNotFound")
+
+
+def _part_size() -> int:
+    return max(settings.UPLOAD_PART_SIZE_MB * 1024 * 1024, MIN_PART_SIZE)
+
+
+class _StreamBridge:
+    """Blocking file-like reader fed from the event loop.
+
+    MinIO's put_object reads from a file object on a worker thread; chunks
+    are handed over through a small bounded queue, so memory stays at a few
+    blocks however large the upload is.
+    """
+
+    def __init__(self, max_blocks: int = 4):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_blocks)
+        self._buffer = bytearray()
+        self._eof = False
+        self.reader_done = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._buffer += item
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def put(self, item) -> None:
+        """Hand over a block (None = EOF, exception = abort); called off the loop"""
+        while not self.reader_done:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise UploadError("Upload to object storage stopped")
+
+
+class _ChainedReader:
+    """Read several MinIO objects back to back as one stream, hashing as it goes"""
+
+    def __init__(self, client, object_names: list[str]):
+        self._client = client
+        self._names = list(object_names)
+        self._response = None
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            if self._response is None:
+                if not self._names:
+                    return b""
+                self._response = self._client.get_object(settings.MINIO_BUCKET, self._names.pop(0))
+            data = self._response.read(size if size > 0 else None)
+            if data:
+                self.digest.update(data)
+                self.size += len(data)
+                return data
+            self._close_current()
+
+    def _close_current(self) -> None:
+        self._response.close()
+        self._response.release_conn()
+        self._response = None
+
+    def close(self) -> None:
+        if self._response is not None:
+            self._close_current()
+
+
+class UploadService:
+    """Store files in MinIO by content hash"""
+
+    async def find(self, scope: str, sha256: str) -> Optional[StoredBlob]:
+        """The blob with this hash stored in scope, if any"""
+        sha256 = sha256.lower()
+        name = blob_name(scope, sha256)
+        try:
+            stat = await asyncio.to_thread(get_minio().stat_object, settings.MINIO_BUCKET, name)
+        except S3Error as exc:
+            if _is_missing(exc):
+                return None
+            raise
+        return StoredBlob(sha256, stat.size, name, deduplicated=True)
+
+    def read(self, scope: str, sha256: str) -> bytes:
+        """Whole contents of a stored blob (blocking; for Celery workers)"""
+        response = get_minio().get_object(settings.MINIO_BUCKET, blob_name(scope, sha256.lower()))
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def store_stream(
+        self,
+        scope: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream",
+        expected_sha256: Optional[str] = None,
+    ) -> StoredBlob:
+        """Stream a request body into scope, deduplicating by content"""
+        if expected_sha256:
+            existing = await self.find(scope, expected_sha256)
+            if existing is not None:
+                return existing
+
+        staging_name = f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+        sha256, size = await self._stream_to_object(chunks, staging_name, content_type)
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            await asyncio.to_thread(get_minio().remove_object, settings.MINIO_BUCKET, staging_name)
+            raise HashMismatchError("Uploaded content does not match X-Content-SHA256")
+        return await asyncio.to_thread(self._promote, staging_name, blob_name(scope, sha256), sha256, size)
+
+    async def _stream_to_object(self, chunks: AsyncIterator[bytes], object_name: str, content_type: str) -> tuple[str, int]:
+        max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        bridge = _StreamBridge()
+
+        def upload():
+            try:
+                get_minio().put_object(
+                    settings.MINIO_BUCKET, object_name, bridge, -1,
+                    content_type=content_type, part_size=_part_size(),
+                )
+            finally:
+                bridge.reader_done = True
+
+        uploading = asyncio.get_running_loop().run_in_executor(None, upload)
+        digest = hashlib.sha256()
+        size = 0
+        pending = bytearray()
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+                digest.update(chunk)
+                pending += chunk
+                if len(pending) >= HANDOFF_BYTES:
+                    await asyncio.to_thread(bridge.put, bytes(pending))
+                    pending.clear()
+            if pending:
+                await asyncio.to_thread(bridge.put, bytes(pending))
+            await asyncio.to_thread(bridge.put, None)
+        except BaseException as exc:
+            # Make the upload thread raise so MinIO aborts the multipart upload
+            with suppress(Exception):
+                await asyncio.to_thread(bridge.put, exc)
+            with suppress(Exception):
+                await uploading
+            raise
+        await uploading
+        return digest.hexdigest(), size
+
+    def _exists(self, object_name: str) -> bool:
+        try:
+            get_minio().stat_object(settings.MINIO_BUCKET, object_name)
+        except S3Error as exc:
+            if _is_missing(exc):
+                return False
+            raise
+        return True
+
+    def _promote(self, staging_name: str, target: str, sha256: str, size: int) -> StoredBlob:
+        """Move a staged object to its content address (or drop it as a duplicate)"""
+        client = get_minio()
+        deduplicated = self._exists(target)
+        if not deduplicated:
+            client.copy_object(settings.MINIO_BUCKET, target, CopySource(settings.MINIO_BUCKET, staging_name))
+        client.remove_object(settings.MINIO_BUCKET, staging_name)
+        return StoredBlob(sha256, size, target, deduplicated)
+
+    # Resumable sessions
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{REDIS_SESSION_PREFIX}{session_id}"
+
+    async def create_session(self, owner_id: int, scope: str, sha256: str, size: int, content_type: str) -> dict:
+        """Open a resumable upload; content already stored in scope completes immediately"""
+        sha256 = sha256.lower()
+        existing = await self.find(scope, sha256)
+        if existing is not None:
+            return {"id": None, "sha256": sha256, "size": existing.size, "received": existing.size,
+                    "complete": True, "blob": asdict(existing)}
+        if size > settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            raise UploadTooLargeError(f"File exceeds {settings.MAX_UPLOAD_SIZE_MB} MB")
+
+        session_id = uuid.uuid4().hex
+        session = {
+            "owner_id": owner_id,
+            "scope": scope,
+            "sha256": sha256,
+            "size": size,
+            "content_type": content_type,
+            "received": 0,
+            "parts": "[]",
+        }
+        await get_redis().hset(self._session_key(session_id), mapping=session)
+        await get_redis().expire(self._session_key(session_id), settings.UPLOAD_SESSION_TTL_SECONDS)
+        return self._session_view(session_id, session)
+
+    async def get_session(self, session_id: str, owner_id: int) -> dict:
+        session = await get_redis().hgetall(self._session_key(session_id))
+        if not session or int(session["owner_id"]) != owner_id:
+            raise SessionNotFoundError("Upload session not found or expired")
+        return self._session_view(session_id, session)
+
+    def _session_view(self, session_id: str, session: dict) -> dict:
+        return {
+            "id": session_id,
+            "sha256": session["sha256"],
+            "size": int(session["size"]),
+            "received": int(session["received"]),
+            "complete": False,
+            "blob": None,
+        }
+
+    async def append_chunk(self, session_id: str, owner_id: int, offset: int, data: bytes) -> dict:
+        """Store the chunk at `offset`; assembles the file once all bytes are in"""
+        redis = get_redis()
+        key = self._session_key(session_id)
+        session = await self.get_session(session_id, owner_id)
+        if offset != session["received"]:
+            raise OffsetConflictError(session["received"])
+        if offset + len(data) > session["size"]:
+            raise UploadTooLargeError("Chunk extends past the declared size")
+
+        # Named by offset: a retried chunk overwrites its earlier attempt
+        part_name = f"{SESSION_PREFIX}/{session_id}/{offset:012d}"
+        await asyncio.to_thread(
+            get_minio().put_object, settings.MINIO_BUCKET, part_name, io.BytesIO(data), len(data)
+        )
+
+        async with redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                received, parts = await pipe.hmget(key, "received", "parts")
+                if received is None or int(received) != offset:
+                    raise OffsetConflictError(int(received or 0))
+                parts = json.loads(parts)
+                parts.append(part_name)
+                pipe.multi()
+                pipe.hset(key, mapping={"received": offset + len(data), "parts": json.dumps(parts)})
+                pipe.expire(key, settings.UPLOAD_SESSION_TTL_SECONDS)
+                await pipe.execute()
+            except WatchError:
+                raise OffsetConflictError(offset)
+
+        session["received"] = offset + len(data)
+        if session["received"] < session["size"]:
+            return session
+        return await self.complete_session(session_id, owner_id)
+
+    async def complete_session(self, session_id: str, owner_id: int) -> dict:
+        """Assemble a session that has received every byte (retry after a failed assembly)"""
+        redis = get_redis()
+        key = self._session_key(session_id)
+        session = await self.get_session(session_id, owner_id)
+        if session["received"] < session["size"]:
+            raise OffsetConflictError(session["received"])
+        scope, parts = await redis.hmget(key, "scope", "parts")
+        try:
+            blob = await asyncio.to_thread(
+                self._assemble, scope, json.loads(parts), session["sha256"], session["size"]
+            )
+        except HashMismatchError:
+            # The parts are gone; the client has to start a new session
+            await redis.delete(key)
+            raise
+        await redis.delete(key)
+        return {**session, "complete": True, "blob": asdict(blob)}
+
+    def _assemble(self, scope: str, parts: list[str], sha256: str, size: int) -> StoredBlob:
+        """Verify the parts against the declared hash, then join them at the content address"""
+        client = get_minio()
+        reader = _ChainedReader(client, parts)
+        try:
+            while reader.read(_part_size()):
+                pass
+        finally:
+            reader.close()
+        if reader.digest.hexdigest() != sha256:
+            self._remove_parts(parts)
+            raise HashMismatchError("Assembled upload does not match the declared SHA-256")
+
+        target = blob_name(scope, sha256)
+        deduplicated = self._exists(target)
+        if not deduplicated:
+            # Parts are named by offset, so their sizes follow from the names
+            offsets = [int(part.rsplit("/", 1)[1]) for part in parts]
+            sizes = [end - start for start, end in zip(offsets, offsets[1:] + [size])]
+            if len(parts) <= MAX_COMPOSE_SOURCES and all(part_size >= MIN_PART_SIZE for part_size in sizes[:-1]):
+                client.compose_object(
+                    settings.MINIO_BUCKET, target,
+                    [ComposeSource(settings.MINIO_BUCKET, part) for part in parts],
+                )
+            else:
+                reader = _ChainedReader(client, parts)
+                try:
+                    client.put_object(settings.MINIO_BUCKET, target, reader, -1, part_size=_part_size())
+                finally:
+                    reader.close()
+        self._remove_parts(parts)
+        return StoredBlob(sha256, size, target, deduplicated)
+
+    def _remove_parts(self, parts: list[str]) -> None:
+        client = get_minio()
+        for part in parts:
+            with suppress(S3Error):
+                client.remove_object(settings.MINIO_BUCKET, part)
+
+    def remove_orphaned_parts(self) -> int:
+        """Delete the parts of sessions whose Redis record is gone (blocking; housekeeping)"""
+        client = get_minio()
+        redis = get_sync_redis()
+        removed = 0
+        for entry in client.list_objects(settings.MINIO_BUCKET, prefix=f"{SESSION_PREFIX}/"):
+            if not entry.is_dir:
+                continue
+            session_id = entry.object_name.rstrip("/").rsplit("/", 1)[1]
+            if redis.exists(self._session_key(session_id)):
+                continue
+            parts = [
+                part.object_name
+                for part in client.list_objects(settings.MINIO_BUCKET, prefix=entry.object_name, recursive=True)
+            ]
+            self._remove_parts(parts)
+            removed += len(parts)
+        if removed:
+            logger.info(f"Removed {removed} parts of expired upload sessions")
+        return removed
+
+    async def cancel_session(self, session_id: str, owner_id: int) -> None:
+        await self.get_session(session_id, owner_id)
+        parts = await get_redis().hget(self._session_key(session_id), "parts")
+        await get_redis().delete(self._session_key(session_id))
+        await asyncio.to_thread(self._remove_parts, json.loads(parts or "[]"))
+
+
+upload_service = UploadService()
@@ -0,0 +1,16 @@
+"""Feature store maintenance tasks"""
+from app.celery_app import celery_app
+from app.core.database import engine
+from app.services import feature_store
+
+
+@celery_app.task(name="features.refresh_all")
+def refresh_all() -> dict:
+    """Recompute every entity's features (days past due and turnover age daily)"""
+    return feature_store.refresh_all(engine)
+
+
+@celery_app.task(name="features.refresh_pending")
+def refresh_pending() -> int:
+    """Recompute the entities queued by invoice writes (ratios, averages, concentration)"""
+    return feature_store.refresh_pending(engine)
@@ -0,0 +1,47 @@
+"""Cashflow forecasting tasks"""
+import time
+from typing import Optional
+
+from celery import chord
+
+from app.celery_app import PRIORITY_BULK, PRIORITY_INTERACTIVE, celery_app
+from app.core.config import settings
+
+
+@celery_app.task(name="forecasting.fit_shard", priority=PRIORITY_BULK)
+def fit_shard(shard: int, shards: int, force: bool = False) -> dict:
+    """Fit the organizations of one shard whose payments changed"""
+    from app.ml.forecasting import fit_shard as run_shard
+    return run_shard(shard, shards, force=force)
+
+
+@celery_app.task(name="forecasting.summarize_fit")
+def summarize_fit(results: list[dict], started_at: float) -> dict:
+    from app.ml.forecasting import summarize
+    return summarize(results, time.time() - started_at)
+
+
+@celery_app.task(name="forecasting.fit_all")
+def fit_all(shards: Optional[int] = None, force: bool = False) -> None:
+    """Fan the nightly forecast fit out to one task per shard"""
+    shards = shards or settings.FORECAST_WORKERS or 4
+    chord(
+        fit_shard.s(shard, shards, force) for shard in range(shards)
+    )(summarize_fit.s(time.time()))
+
+
+@celery_app.task(name="forecasting.refit_organization", priority=PRIORITY_INTERACTIVE)
+def refit_organization(org_id: int) -> dict:
+    """Refit one organization after its watermark moved (queued by the API)"""
+    from app.core.cache import get_sync_redis
+    from app.ml.forecasting import fit_organization
+    from app.services.forecasting import REDIS_REFIT_LOCK_PREFIX
+
+    result = fit_organization(org_id)
+    # Release the lock only once the stored forecast is current. Otherwise
+    # (too little history, a failed fit) every GET would queue another refit,
+    # so the lock is left to expire: at most one attempt per
+    # FORECAST_REFIT_LOCK_SECONDS. An exception also leaves it to expire.
+    if result["fitted"] or result["unchanged"]:
+        get_sync_redis().delete(REDIS_REFIT_LOCK_PREFIX + str(org_id))
+    return result
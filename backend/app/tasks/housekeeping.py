@@ -0,0 +1,31 @@
+"""Periodic maintenance tasks"""
+from app.celery_app import celery_app
+from app.core.database import engine
+from app.services import audit_retention, overdue
+
+
+@celery_app.task(name="housekeeping.audit_ensure_partitions")
+def audit_ensure_partitions() -> list[str]:
+    """Create upcoming monthly audit_logs partitions"""
+    with engine.begin() as conn:
+        return audit_retention.ensure_partitions(conn)
+
+
+@celery_app.task(name="housekeeping.audit_enforce_retention")
+def audit_enforce_retention() -> list[dict]:
+    """Archive and drop audit_logs partitions past AUDIT_LOG_RETENTION_DAYS"""
+    return audit_retention.enforce_retention(engine)
+
+
+@celery_app.task(name="housekeeping.sweep_overdue_invoices")
+def sweep_overdue_invoices() -> dict:
+    """Move invoices still awaiting payment past their due date to OVERDUE"""
+    return overdue.sweep(engine)
+
+
+@celery_app.task(name="housekeeping.remove_orphaned_upload_parts")
+def remove_orphaned_upload_parts() -> int:
+    """Delete stored chunks of resumable uploads that expired or were abandoned"""
+    from app.services.uploads import upload_service
+
+    return upload_service.remove_orphaned_parts()
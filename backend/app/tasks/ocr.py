@@ -0,0 +1,30 @@
+"""Interactive OCR tasks (clients poll them through GET /jobs/{job_id})"""
+from app.celery_app import PRIORITY_INTERACTIVE, celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.db.models.invoice import Invoice
+
+
+@celery_app.task(
+    name="ocr.extract_invoice",
+    bind=True,
+    priority=PRIORITY_INTERACTIVE,
+    soft_time_limit=settings.OCR_TASK_TIME_LIMIT_SECONDS,
+)
+def extract_invoice(self, invoice_id: int, file_hash: str, scope: str) -> dict:
+    """OCR a blob uploaded to scope and record the result on the invoice"""
+    from app.ocr.engine import ocr_engine, record_result
+    from app.services.uploads import upload_service
+
+    self.update_state(state="PROGRESS", meta={"stage": "download"})
+    data = upload_service.read(scope, file_hash)
+
+    def progress(done: int, total: int) -> None:
+        self.update_state(state="PROGRESS", meta={"stage": "ocr", "pages_done": done, "pages": total})
+
+    result = ocr_engine.extract_sync(data, file_hash, progress=progress)
+    with SessionLocal() as db:
+        invoice = db.get(Invoice, invoice_id)
+        if invoice is not None and record_result(invoice, file_hash, result):
+            db.commit()
+    return {"invoice_id": invoice_id, "file_hash": file_hash, **result}
@@ -0,0 +1,39 @@
+"""Credit scoring tasks"""
+import time
+import uuid
+from typing import Optional
+
+from celery import chord
+
+from app.celery_app import PRIORITY_BULK, celery_app
+from app.core.config import settings
+
+
+@celery_app.task(name="scoring.rescore_shard", priority=PRIORITY_BULK)
+def rescore_shard(entity_type: str, shard: int, shards: int, run_id: str, batch_size: Optional[int] = None) -> dict:
+    """Rescore one shard of the portfolio (resumes from its checkpoint)"""
+    from app.ml.batch_scoring import rescore_shard as run_shard
+    return run_shard(entity_type, shard, shards, run_id, batch_size)
+
+
+@celery_app.task(name="scoring.summarize_rescore")
+def summarize_rescore(results: list[dict], entity_type: str, run_id: str, started_at: float) -> dict:
+    from app.ml.batch_scoring import summarize
+    return summarize(entity_type, run_id, results, time.time() - started_at)
+
+
+@celery_app.task(name="scoring.rescore_portfolio")
+def rescore_portfolio(entity_type: str, run_id: Optional[str] = None, shards: Optional[int] = None) -> str:
+    """Fan a portfolio rescore out to one task per shard.
+    
+    Re-sending with the same run_id resumes an interrupted run, with the
+    shard count it started with.
+    """
+    from app.ml.batch_scoring import claim_shards
+
+    run_id = run_id or uuid.uuid4().hex
+    shards = claim_shards(run_id, entity_type, shards, default=settings.SCORING_WORKERS or 4)
+    chord(
+        rescore_shard.s(entity_type, shard, shards, run_id) for shard in range(shards)
+    )(summarize_rescore.s(entity_type, run_id, time.time()))
+    return run_id
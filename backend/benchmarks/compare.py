@@ -0,0 +1,118 @@
+"""Compare two benchmarks.load reports, e.g. from two commits.
+
+For every operation (and the total), reports throughput, p50, p95, p99 and
+error rate of both runs, with the percentage change. A regression is:
+- throughput lower by more than --max-regression-pct
+- p95 or p99 higher by more than --max-regression-pct, and by at least
+  --min-delta-ms (so sub-millisecond noise never fails a run)
+- a higher error rate
+
+Exits 1 on any regression, so it can gate CI. Runs are only comparable on
+the same dataset (tag, seed, scale), mix and concurrency. When those differ,
+the report lists the differences under "mismatched".
+
+Usage (from backend/):
+    python -m benchmarks.compare benchmarks/results/load-<old>.json benchmarks/results/load-<new>.json
+    python -m benchmarks.compare old.json new.json --max-regression-pct 5
+"""
+import argparse
+import json
+import sys
+from typing import Optional
+
+LATENCY_METRICS = ("p50", "p95", "p99")
+# Latencies that fail the comparison when they regress; p50 is reported only
+GATED_LATENCIES = ("p95", "p99")
+
+
+def _change_pct(baseline: Optional[float], candidate: Optional[float]) -> Optional[float]:
+    if not baseline or candidate is None:
+        return None
+    return round((candidate - baseline) / baseline * 100, 1)
+
+
+def _mismatched(baseline: dict, candidate: dict) -> list[str]:
+    fields = [
+        ("dataset", "tag"), ("dataset", "seed"), ("dataset", "scale"),
+        ("config", "mix"), ("config", "concurrency"), ("target",),
+    ]
+    differences = []
+    for path in fields:
+        old, new = baseline, candidate
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        if old != new:
+            differences.append(f"{'.'.join(path)}: {old!r} != {new!r}")
+    return differences
+
+
+def compare_operation(name: str, baseline: dict, candidate: dict, max_regression_pct: float, min_delta_ms: float):
+    regressions = []
+    throughput_change = _change_pct(baseline["requests_per_second"], candidate["requests_per_second"])
+    if throughput_change is not None and throughput_change < -max_regression_pct:
+        regressions.append(f"{name}: throughput {throughput_change}%")
+
+    latency = {}
+    for metric in LATENCY_METRICS:
+        old, new = baseline["latency_ms"][metric], candidate["latency_ms"][metric]
+        change = _change_pct(old, new)
+        latency[metric] = {"baseline": old, "candidate": new, "change_pct": change}
+        if (
+            metric in GATED_LATENCIES and change is not None
+            and change > max_regression_pct and new - old >= min_delta_ms
+        ):
+            regressions.append(f"{name}: {metric} {old} -> {new} ms (+{change}%)")
+
+    if candidate["error_rate"] > baseline["error_rate"]:
+        regressions.append(f"{name}: error rate {baseline['error_rate']} -> {candidate['error_rate']}")
+
+    return {
+        "requests_per_second": {
+            "baseline": baseline["requests_per_second"],
+            "candidate": candidate["requests_per_second"],
+            "change_pct": throughput_change,
+        },
+        "latency_ms": latency,
+        "error_rate": {"baseline": baseline["error_rate"], "candidate": candidate["error_rate"]},
+    }, regressions
+
+
+def compare(baseline: dict, candidate: dict, max_regression_pct: float, min_delta_ms: float) -> dict:
+    operations, regressions = {}, []
+    pairs = [(name, baseline["operations"][name], candidate["operations"][name])
+             for name in baseline["operations"] if name in candidate["operations"]]
+    pairs.append(("total", baseline["total"], candidate["total"]))
+    for name, old, new in pairs:
+        operations[name], found = compare_operation(name, old, new, max_regression_pct, min_delta_ms)
+        regressions.extend(found)
+    return {
+        "baseline": {key: baseline.get(key) for key in ("git", "label", "started_at")},
+        "candidate": {key: candidate.get(key) for key in ("git", "label", "started_at")},
+        "mismatched": _mismatched(baseline, candidate),
+        "max_regression_pct": max_regression_pct,
+        "operations": operations,
+        "regressions": regressions,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two load benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--max-regression-pct", type=float, default=10.0)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    report = compare(baseline, candidate, args.max_regression_pct, args.min_delta_ms)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,545 @@
+"""Seeded synthetic ledger for load tests.
+
+Fills a migrated database with organizations (one borrower admin each),
+customers, invoices, tranches, attestations, audit logs and cached scores.
+The same --seed, scale and --as-of always produce the same rows.
+Rows are written with COPY, one batch of --batch-orgs organizations per
+transaction, so the large scale (millions of rows) loads in minutes and
+memory stays flat. Because COPY bypasses the ORM, its hooks (score
+invalidation, feature store refresh) do not run. Marketplace listings for
+the new tranches are copied explicitly.
+
+Ids are reserved in blocks from each table's sequence, so each dataset
+occupies contiguous id ranges. Use a dedicated benchmark database: nothing
+else should insert while a dataset is loading. Every row belongs to --tag:
+- users are <tag>-admin-N, <tag>-agent-N and <tag>-investor-N at
+  bench.example.com, all with the same password
+- organizations have registration numbers <tag>-N
+
+The manifest written to benchmarks/results/dataset-<tag>.json records the
+id ranges, the credentials and a sample of pledgeable tranches.
+benchmarks.load replays requests against it. --drop deletes a tag's rows
+again, including pledges and audit records left by load runs.
+
+Usage (from backend/, against a migrated database):
+    python -m benchmarks.dataset --scale small
+    python -m benchmarks.dataset --scale large --seed 7 --as-of 2024-06-30
+    python -m benchmarks.dataset --organizations 50 --invoices-per-org 5000
+    python -m benchmarks.dataset --tag bench7 --drop
+"""
+import argparse
+import csv
+import enum
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from faker import Faker
+from sqlalchemy import delete, insert, select, text
+
+from app.core.database import engine
+from app.core.security import get_password_hash
+from app.db.models import (
+    Attestation,
+    AuditLog,
+    CashflowForecast,
+    Customer,
+    EntityFeatures,
+    Invoice,
+    InvoiceStatus,
+    MarketplaceListing,
+    Organization,
+    Pledge,
+    ScoreCache,
+    Tranche,
+    TrancheStatus,
+    User,
+    UserRole,
+)
+from app.ml.scoring import FEATURE_NAMES, score_band
+from app.services.audit_retention import ensure_partitions
+from app.services.marketplace import LISTING_COLUMNS, listing_query
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+EMAIL_DOMAIN = "bench.example.com"
+DEFAULT_PASSWORD = "bench-password"
+
+# Pledgeable tranche ids kept in the manifest for the pledge requests
+TRANCHE_SAMPLE_SIZE = 10_000
+
+SCALES = {
+    # organizations, customers per org, invoices per org, investors, agents
+    "small": {"organizations": 20, "customers_per_org": 25, "invoices_per_org": 100, "investors": 20, "agents": 5},
+    "medium": {"organizations": 200, "customers_per_org": 50, "invoices_per_org": 1000, "investors": 200, "agents": 20},
+    "large": {"organizations": 1000, "customers_per_org": 100, "invoices_per_org": 2000, "investors": 1000, "agents": 50},
+}
+
+COUNTRIES = (("KE", "KES"), ("UG", "UGX"), ("TZ", "TZS"), ("RW", "RWF"), ("NG", "NGN"), ("US", "USD"))
+PAYMENT_TERMS_DAYS = (14, 30, 30, 45, 60, 90)
+ATTESTATION_TYPES = ("inspection", "delivery", "payment_proof")
+
+USER_COLUMNS = ("id", "email", "hashed_password", "full_name", "role", "org_id", "is_active", "is_verified")
+ORGANIZATION_COLUMNS = ("id", "name", "country", "region", "address", "phone", "email", "admin_id",
+                        "registration_number", "tax_id", "is_active", "is_verified")
+CUSTOMER_COLUMNS = ("id", "org_id", "name", "email", "phone", "city", "country")
+INVOICE_COLUMNS = ("id", "org_id", "customer_id", "creator_id", "invoice_number", "amount", "currency",
+                   "tax_amount", "total_amount", "amount_paid", "issued_date", "due_date", "payment_date",
+                   "status", "description", "created_at")
+TRANCHE_COLUMNS = ("id", "invoice_id", "tranche_number", "share_amount", "price", "pledged_amount",
+                   "funded_amount", "target_amount", "expected_return", "return_percentage", "risk_band",
+                   "risk_score", "status", "open_date", "funding_deadline", "funded_date", "maturity_date",
+                   "closed_date", "minimum_investment", "created_at")
+ATTESTATION_COLUMNS = ("invoice_id", "agent_id", "attestation_type", "file_hash", "signature",
+                       "latitude", "longitude", "device_timestamp", "is_verified", "created_at")
+AUDIT_COLUMNS = ("actor_id", "actor_type", "actor_name", "action", "resource_type", "resource_id",
+                 "org_id", "details_json", "ip_address", "status", "created_at")
+SCORE_COLUMNS = ("org_id", "entity_id", "entity_type", "score", "score_band", "confidence", "model_version",
+                 "model_type", "features_json", "top_features", "is_valid")
+
+CENT = Decimal("0.01")
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(value)).quantize(CENT)
+
+
+def _email(tag: str, kind: str, index: int) -> str:
+    return f"{tag}-{kind}-{index}@{EMAIL_DOMAIN}"
+
+
+def _csv_value(value):
+    """Render a value for COPY ... WITH (FORMAT csv); unquoted empty = NULL"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.name  # SQLEnum columns hold member names
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def _copy(conn, table: str, columns: tuple, rows: list[tuple]) -> int:
+    if not rows:
+        return 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def _reserve_ids(conn, table: str, count: int) -> int:
+    """Advance the table's id sequence by count; returns the first reserved id"""
+    return conn.execute(text(
+        "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+        "nextval(pg_get_serial_sequence(:table, 'id')) + :count - 1) - :count + 1"
+    ), {"table": table, "count": count}).scalar_one()
+
+
+class DatasetBuilder:
+    """Generates and loads one tagged dataset"""
+
+    def __init__(self, tag: str, seed: int, as_of: date, history_days: int, password: str, batch_orgs: int,
+                 organizations: int, customers_per_org: int, invoices_per_org: int, investors: int, agents: int):
+        self.tag = tag
+        self.seed = seed
+        self.as_of = datetime.combine(as_of, datetime.min.time(), tzinfo=timezone.utc)
+        self.history_days = history_days
+        self.password = password
+        self.batch_orgs = batch_orgs
+        self.organizations = organizations
+        self.customers_per_org = customers_per_org
+        self.invoices_per_org = invoices_per_org
+        self.investors = investors
+        self.agents = agents
+
+        self.rng = random.Random(seed)
+        # Separate stream, so the sample size never changes the generated rows
+        self.sample_rng = random.Random(seed + 1)
+        self.fake = Faker()
+        self.fake.seed_instance(seed)
+
+        self.counts: dict[str, int] = {}
+        self.ids: dict[str, dict] = {}
+        self._first_ids: dict[str, int] = {}
+        self.tranche_sample: list[int] = []
+        self._pledgeable_seen = 0
+
+    def _reserve(self, conn, table: str, count: int) -> int:
+        first_id = _reserve_ids(conn, table, count)
+        self._first_ids.setdefault(table, first_id)
+        return first_id
+
+    # Identity rows
+
+    def _load_identities(self, conn) -> None:
+        """Users (org admins, agents, investors) and organizations, in one transaction"""
+        hashed_password = get_password_hash(self.password)
+        user_count = self.organizations + self.agents + self.investors
+        first_user = self._reserve(conn, "users", user_count)
+        first_org = self._reserve(conn, "organizations", self.organizations)
+        self.ids["admins"] = {"first_id": first_user, "count": self.organizations}
+        self.ids["agents"] = {"first_id": first_user + self.organizations, "count": self.agents}
+        self.ids["investors"] = {"first_id": first_user + self.organizations + self.agents, "count": self.investors}
+        self.ids["organizations"] = {"first_id": first_org, "count": self.organizations}
+
+        self.countries = [self.rng.choice(COUNTRIES) for _ in range(self.organizations)]
+        self.admin_names = [self.fake.name() for _ in range(self.organizations)]
+
+        users, organizations = [], []
+        for index in range(self.organizations):
+            users.append((first_user + index, _email(self.tag, "admin", index), hashed_password,
+                          self.admin_names[index], UserRole.BORROWER, first_org + index, True, True))
+            organizations.append((
+                first_org + index, self.fake.company(), self.countries[index][0], self.fake.city(),
+                self.fake.street_address(), self.fake.msisdn(), self.fake.company_email(), first_user + index,
+                f"{self.tag}-{index}", self.fake.bothify("P0########?"), True, self.rng.random() < 0.8,
+            ))
+        for kind, count in (("agent", self.agents), ("investor", self.investors)):
+            first_id = self.ids[f"{kind}s"]["first_id"]
+            role = UserRole.AGENT if kind == "agent" else UserRole.INVESTOR
+            for index in range(count):
+                users.append((first_id + index, _email(self.tag, kind, index), hashed_password,
+                              self.fake.name(), role, None, True, True))
+
+        self._count("users", _copy(conn, "users", USER_COLUMNS, users))
+        self._count("organizations", _copy(conn, "organizations", ORGANIZATION_COLUMNS, organizations))
+
+    # Ledger rows, one batch of organizations at a time
+
+    def _invoice(self, invoice_id: int, org_index: int, customer_id: int) -> tuple:
+        rng = self.rng
+        org_id = self.ids["organizations"]["first_id"] + org_index
+        issued = self.as_of - timedelta(days=rng.uniform(0, self.history_days))
+        due = issued + timedelta(days=rng.choice(PAYMENT_TERMS_DAYS))
+        amount = _money(min(rng.lognormvariate(7.5, 1.2), 5_000_000))
+        tax = (amount * Decimal("0.16")).quantize(CENT) if rng.random() < 0.7 else Decimal("0.00")
+        total = amount + tax
+
+        payment_date, amount_paid = None, Decimal("0.00")
+        roll = rng.random()
+        if due < self.as_of:
+            if roll < 0.75:
+                status = InvoiceStatus.PAID
+            elif roll < 0.80:
+                status = InvoiceStatus.PARTIALLY_PAID
+            elif roll < 0.95:
+                status = InvoiceStatus.OVERDUE
+            else:
+                status = InvoiceStatus.CANCELLED
+        else:
+            if roll < 0.05:
+                status = InvoiceStatus.DRAFT
+            elif roll < 0.65:
+                status = InvoiceStatus.ISSUED
+            elif roll < 0.90:
+                status = InvoiceStatus.PAYMENT_PENDING
+            else:
+                status = InvoiceStatus.PARTIALLY_PAID
+        if status == InvoiceStatus.PAID:
+            # Most pay around the due date, some early, a tail late
+            payment_date = min(due + timedelta(days=rng.gauss(3, 12)), self.as_of)
+            payment_date = max(payment_date, issued + timedelta(hours=1))
+            amount_paid = total
+        elif status == InvoiceStatus.PARTIALLY_PAID:
+            payment_date = issued + (min(due, self.as_of) - issued) * rng.random()
+            amount_paid = (total * Decimal(str(round(rng.uniform(0.1, 0.9), 2)))).quantize(CENT)
+
+        return (
+            invoice_id, org_id, customer_id, self.ids["admins"]["first_id"] + org_index,
+            f"{self.tag}-INV-{invoice_id}", amount, self.countries[org_index][1], tax, total, amount_paid,
+            issued, due, payment_date, status, self.fake.bs().capitalize(), issued,
+        )
+
+    def _tranches(self, invoice: tuple) -> list[dict]:
+        """Zero or more tranches: open ones on unpaid invoices, completed ones on some paid ones"""
+        rng = self.rng
+        invoice_id, total, issued, due, status = invoice[0], invoice[8], invoice[10], invoice[11], invoice[13]
+        if status in (InvoiceStatus.ISSUED, InvoiceStatus.PAYMENT_PENDING) and rng.random() < 0.4:
+            parts, completed = rng.choice((1, 1, 2, 3)), False
+        elif status == InvoiceStatus.PAID and rng.random() < 0.2:
+            parts, completed = 1, True
+        else:
+            return []
+
+        advance = total * Decimal(str(round(rng.uniform(0.6, 0.9), 2)))
+        target = max((advance / parts).quantize(CENT), Decimal("100.00"))
+        opened = min(issued + timedelta(days=rng.uniform(0, 3)), self.as_of)
+        rows = []
+        for _ in range(parts):
+            return_percentage = Decimal(str(round(rng.uniform(6, 24), 2)))
+            risk_score = Decimal(str(round(rng.uniform(35, 95), 2)))
+            if completed:
+                pledged, tranche_status = target, TrancheStatus.COMPLETED
+            else:
+                roll = rng.random()
+                if roll < 0.5:
+                    pledged, tranche_status = Decimal("0.00"), TrancheStatus.OPEN
+                elif roll < 0.9:
+                    pledged = (target * Decimal(str(round(rng.uniform(0.05, 0.95), 2)))).quantize(CENT)
+                    tranche_status = TrancheStatus.FUNDING
+                else:
+                    pledged, tranche_status = target, TrancheStatus.FUNDED
+            rows.append({
+                "invoice_id": invoice_id,
+                "share_amount": target,
+                "price": (target * (1 - return_percentage / 100)).quantize(CENT),
+                "pledged_amount": pledged,
+                "funded_amount": pledged if tranche_status in (TrancheStatus.FUNDED, TrancheStatus.COMPLETED) else Decimal("0.00"),
+                "target_amount": target,
+                "expected_return": (target * return_percentage / 100).quantize(CENT),
+                "return_percentage": return_percentage,
+                "risk_band": score_band(float(risk_score)),
+                "risk_score": risk_score,
+                "status": tranche_status,
+                "open_date": opened,
+                "funding_deadline": opened + timedelta(days=14) if completed
+                else max(opened + timedelta(days=rng.randint(7, 45)), self.as_of + timedelta(days=1)),
+                "funded_date": opened + timedelta(days=rng.uniform(1, 14)) if tranche_status != TrancheStatus.OPEN and pledged == target else None,
+                "maturity_date": due,
+                "closed_date": invoice[12] if completed else None,
+                "minimum_investment": Decimal("10.00"),
+            })
+        return rows
+
+    def _sample_tranche(self, tranche_id: int) -> None:
+        """Reservoir sample of pledgeable tranches"""
+        self._pledgeable_seen += 1
+        if len(self.tranche_sample) < TRANCHE_SAMPLE_SIZE:
+            self.tranche_sample.append(tranche_id)
+        else:
+            slot = self.sample_rng.randrange(self._pledgeable_seen)
+            if slot < TRANCHE_SAMPLE_SIZE:
+                self.tranche_sample[slot] = tranche_id
+
+    def _load_batch(self, conn, org_indexes: range) -> None:
+        rng = self.rng
+        first_org = self.ids["organizations"]["first_id"]
+        first_admin = self.ids["admins"]["first_id"]
+
+        customer_count = len(org_indexes) * self.customers_per_org
+        first_customer = self._reserve(conn, "customers", customer_count)
+        customers, scores = [], []
+        for offset in range(customer_count):
+            org_index = org_indexes[offset // self.customers_per_org]
+            customers.append((first_customer + offset, first_org + org_index, self.fake.company(),
+                              self.fake.company_email(), self.fake.msisdn(), self.fake.city(),
+                              self.countries[org_index][0]))
+
+        first_invoice = self._reserve(conn, "invoices", len(org_indexes) * self.invoices_per_org)
+        invoices, tranche_rows, attestations, audit_logs = [], [], [], []
+        for position, org_index in enumerate(org_indexes):
+            org_id, admin_id = first_org + org_index, first_admin + org_index
+            admin = self.admin_names[org_index]
+            org_customers = first_customer + position * self.customers_per_org
+            for number in range(self.invoices_per_org):
+                invoice = self._invoice(
+                    first_invoice + position * self.invoices_per_org + number,
+                    org_index,
+                    # A few customers account for most of an organization's invoices
+                    org_customers + int(self.customers_per_org * rng.random() ** 2),
+                )
+                invoices.append(invoice)
+                invoice_id, issued, payment_date = invoice[0], invoice[10], invoice[12]
+                audit_logs.append((admin_id, "user", admin, "create_invoice", "invoice", invoice_id, org_id,
+                                   None, self.fake.ipv4_public(), "success", issued))
+                if payment_date is not None:
+                    audit_logs.append((admin_id, "user", admin, "record_payment", "invoice", invoice_id, org_id,
+                                       json.dumps({"amount_paid": str(invoice[9])}), self.fake.ipv4_public(),
+                                       "success", payment_date))
+                tranche_rows.extend(self._tranches(invoice))
+                if self.agents and rng.random() < 0.25:
+                    attested = min(issued + timedelta(days=rng.uniform(0, 10)), self.as_of)
+                    attestations.append((
+                        invoice_id, self.ids["agents"]["first_id"] + rng.randrange(self.agents),
+                        rng.choice(ATTESTATION_TYPES), hashlib.sha256(rng.randbytes(32)).hexdigest(),
+                        json.dumps({"type": "synthetic", "invoice": invoice_id}),
+                        f"{rng.uniform(-4.5, 4.5):.6f}", f"{rng.uniform(29.5, 41.5):.6f}", attested,
+                        rng.random() < 0.7, attested,
+                    ))
+
+            score = round(rng.uniform(30, 97), 2)
+            scores.append(self._score_row(org_id, org_id, "organization", score))
+        for customer in customers:
+            scores.append(self._score_row(customer[1], customer[0], "customer", round(rng.uniform(20, 99), 2)))
+
+        tranches = []
+        if tranche_rows:
+            first_tranche = self._reserve(conn, "tranches", len(tranche_rows))
+            org_of_invoice = {invoice[0]: (invoice[1], invoice[3]) for invoice in invoices}
+            for offset, row in enumerate(tranche_rows):
+                tranche_id = first_tranche + offset
+                tranches.append((tranche_id, row["invoice_id"], f"{self.tag}-T{tranche_id}",
+                                 *(row[column] for column in TRANCHE_COLUMNS[3:-1]), row["open_date"]))
+                if row["status"] in (TrancheStatus.OPEN, TrancheStatus.FUNDING):
+                    self._sample_tranche(tranche_id)
+                org_id, admin_id = org_of_invoice[row["invoice_id"]]
+                audit_logs.append((admin_id, "user", self.admin_names[org_id - first_org], "create_tranche",
+                                   "tranche", tranche_id, org_id, None, None, "success", row["open_date"]))
+
+        self._count("customers", _copy(conn, "customers", CUSTOMER_COLUMNS, customers))
+        self._count("invoices", _copy(conn, "invoices", INVOICE_COLUMNS, invoices))
+        self._count("tranches", _copy(conn, "tranches", TRANCHE_COLUMNS, tranches))
+        self._count("attestations", _copy(conn, "attestations", ATTESTATION_COLUMNS, attestations))
+        self._count("audit_logs", _copy(conn, "audit_logs", AUDIT_COLUMNS, audit_logs))
+        self._count("score_cache", _copy(conn, "score_cache", SCORE_COLUMNS, scores))
+        if tranches:
+            listings = conn.execute(
+                insert(MarketplaceListing).from_select(
+                    list(LISTING_COLUMNS),
+                    listing_query().where(Tranche.id.between(tranches[0][0], tranches[-1][0])),
+                )
+            )
+            self._count("marketplace_listings", listings.rowcount)
+
+    def _score_row(self, org_id: int, entity_id: int, entity_type: str, score: float) -> tuple:
+        features = {name: round(self.rng.random(), 4) for name in FEATURE_NAMES}
+        top = sorted(FEATURE_NAMES, key=features.get, reverse=True)[:3]
+        return (org_id, entity_id, entity_type, score, score_band(score), round(self.rng.uniform(60, 99), 2),
+                f"synthetic-{self.seed}", "synthetic", json.dumps(features), json.dumps(top), True)
+
+    def _count(self, table: str, rows: int) -> None:
+        self.counts[table] = self.counts.get(table, 0) + rows
+
+    def build(self) -> dict:
+        started = time.perf_counter()
+        history_start = (self.as_of - timedelta(days=self.history_days)).date()
+        months = (date.today().year - history_start.year) * 12 + date.today().month - history_start.month
+        with engine.begin() as conn:
+            # Audit rows go back to the start of the history
+            ensure_partitions(conn, months_ahead=months + 1, today=history_start)
+            self._load_identities(conn)
+
+        for start in range(0, self.organizations, self.batch_orgs):
+            with engine.begin() as conn:
+                self._load_batch(conn, range(start, min(start + self.batch_orgs, self.organizations)))
+            print(f"loaded {min(start + self.batch_orgs, self.organizations)}/{self.organizations} organizations",
+                  file=sys.stderr)
+
+        elapsed = time.perf_counter() - started
+        total_rows = sum(self.counts.values())
+        # Contiguous, as long as nothing else inserted while loading
+        for table in ("customers", "invoices", "tranches"):
+            self.ids[table] = {"first_id": self._first_ids.get(table), "count": self.counts.get(table, 0)}
+        return {
+            "tag": self.tag,
+            "seed": self.seed,
+            "as_of": self.as_of.date().isoformat(),
+            "history_days": self.history_days,
+            "scale": {
+                "organizations": self.organizations,
+                "customers_per_org": self.customers_per_org,
+                "invoices_per_org": self.invoices_per_org,
+                "investors": self.investors,
+                "agents": self.agents,
+            },
+            "email_domain": EMAIL_DOMAIN,
+            "password": self.password,
+            "ids": self.ids,
+            "pledgeable_tranches": sorted(self.tranche_sample),
+            "rows": self.counts,
+            "seconds": round(elapsed, 1),
+            "rows_per_second": round(total_rows / elapsed) if elapsed else None,
+        }
+
+
+def drop(tag: str) -> dict:
+    """Delete every row of a dataset, plus pledges and audit records made by its users"""
+    org_ids = select(Organization.id).where(Organization.registration_number.like(f"{tag}-%"))
+    user_ids = select(User.id).where(User.email.like(f"{tag}-%@{EMAIL_DOMAIN}"))
+    invoice_ids = select(Invoice.id).where(Invoice.org_id.in_(org_ids))
+    tranche_ids = select(Tranche.id).where(Tranche.invoice_id.in_(invoice_ids))
+    statements = (
+        ("pledges", delete(Pledge).where(Pledge.tranche_id.in_(tranche_ids) | Pledge.investor_id.in_(user_ids))),
+        ("marketplace_listings", delete(MarketplaceListing).where(MarketplaceListing.tranche_id.in_(tranche_ids))),
+        ("tranches", delete(Tranche).where(Tranche.id.in_(tranche_ids))),
+        ("attestations", delete(Attestation).where(Attestation.invoice_id.in_(invoice_ids))),
+        ("score_cache", delete(ScoreCache).where(ScoreCache.org_id.in_(org_ids))),
+        ("cashflow_forecasts", delete(CashflowForecast).where(CashflowForecast.org_id.in_(org_ids))),
+        ("entity_features", delete(EntityFeatures).where(EntityFeatures.org_id.in_(org_ids))),
+        ("audit_logs", delete(AuditLog).where(AuditLog.org_id.in_(org_ids) | AuditLog.actor_id.in_(user_ids))),
+        ("invoices", delete(Invoice).where(Invoice.id.in_(invoice_ids))),
+        ("customers", delete(Customer).where(Customer.org_id.in_(org_ids))),
+        ("organizations", delete(Organization).where(Organization.id.in_(org_ids))),
+        ("users", delete(User).where(User.id.in_(user_ids))),
+    )
+    deleted = {}
+    with engine.begin() as conn:
+        for table, statement in statements:
+            deleted[table] = conn.execute(statement).rowcount
+    return {"tag": tag, "deleted": deleted}
+
+
+def manifest_path(tag: str) -> str:
+    return os.path.join(RESULTS_DIR, f"dataset-{tag}.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load a seeded synthetic ledger for benchmarks")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--organizations", type=int, help="Override the scale preset")
+    parser.add_argument("--customers-per-org", type=int)
+    parser.add_argument("--invoices-per-org", type=int)
+    parser.add_argument("--investors", type=int)
+    parser.add_argument("--agents", type=int)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Date the history ends (default: today); fix it to reproduce a dataset exactly")
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--tag", help="Prefix of every generated key (default: bench<seed>)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--batch-orgs", type=int, default=20, help="Organizations per COPY transaction")
+    parser.add_argument("--manifest", help=f"Where to write the manifest (default: {RESULTS_DIR}/dataset-<tag>.json)")
+    parser.add_argument("--drop", action="store_true", help="Delete the tag's rows instead of loading")
+    args = parser.parse_args(argv)
+    tag = args.tag or f"bench{args.seed}"
+
+    if args.drop:
+        report = drop(tag)
+    else:
+        scale = dict(SCALES[args.scale])
+        for name in scale:
+            if getattr(args, name) is not None:
+                scale[name] = getattr(args, name)
+        if scale["organizations"] < 1 or scale["customers_per_org"] < 1 or scale["investors"] < 1:
+            parser.error("need at least one organization, customer per organization and investor")
+        builder = DatasetBuilder(
+            tag=tag,
+            seed=args.seed,
+            as_of=args.as_of or datetime.now(timezone.utc).date(),
+            history_days=args.history_days,
+            password=args.password,
+            batch_orgs=args.batch_orgs,
+            **scale,
+        )
+        report = builder.build()
+        path = args.manifest or manifest_path(tag)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as handle:
+            json.dump(report, handle, indent=2)
+        report = {key: value for key, value in report.items() if key != "pledgeable_tranches"}
+        report["manifest"] = path
+
+    engine.dispose()
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
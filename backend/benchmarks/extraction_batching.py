@@ -0,0 +1,133 @@
+"""Field extraction throughput: dynamic batching against one document per call.
+
+Loads the extraction model once (reporting the cold load time a warm worker
+avoids), then sends --documents synthetic OCR texts from --concurrency
+concurrent callers in two modes:
+- single: every call runs its own forward pass (FieldExtractor.extract_unbatched)
+- batched: calls are merged by the collector (FieldExtractor.extract)
+
+Reports documents per second and latency percentiles per mode, plus the
+batched/single throughput ratio. Needs torch and transformers, and
+onnxruntime for --backend onnx.
+
+Usage (from backend/):
+    python -m benchmarks.extraction_batching --model <hf-id-or-path> --backend int8
+    python -m benchmarks.extraction_batching --model <...> --concurrency 64 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from app.core.config import settings
+from app.ocr.extraction import BACKENDS, FieldExtractor
+
+VENDORS = ("Acme Supplies Ltd", "Nairobi Hardware", "Kilimo Agro Traders", "Umoja Logistics", "Jua Kali Works")
+ITEMS = ("Cement 50kg", "Steel bars", "Transport", "Maize seed", "Fertilizer", "Labour", "Timber", "Roofing sheets")
+
+
+def synthetic_invoice(rng: random.Random) -> str:
+    """OCR-like invoice text of varying length"""
+    lines = [
+        rng.choice(VENDORS),
+        f"P.O. Box {rng.randint(100, 99999)}, Nairobi",
+        f"Invoice No: INV-{rng.randint(1000, 99999)}",
+        f"Date: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        f"Bill to: {rng.choice(VENDORS)}",
+        "Description Qty Unit price Amount",
+    ]
+    total = 0.0
+    for _ in range(rng.randint(2, 40)):
+        quantity, price = rng.randint(1, 50), round(rng.uniform(50, 5000), 2)
+        total += quantity * price
+        lines.append(f"{rng.choice(ITEMS)} {quantity} {price:,.2f} {quantity * price:,.2f}")
+    lines += [f"Subtotal {total:,.2f}", f"VAT 16% {total * 0.16:,.2f}", f"Total due {total * 1.16:,.2f}"]
+    return "\n".join(lines)
+
+
+async def run_mode(extractor: FieldExtractor, mode: str, texts: list[str], concurrency: int) -> dict:
+    call = extractor.extract if mode == "batched" else extractor.extract_unbatched
+    queue = list(reversed(texts))
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        while queue:
+            text = queue.pop()
+            started = time.perf_counter()
+            await call(text)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "documents": len(latencies),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(quantiles[49] * 1000, 2),
+            "p95": round(quantiles[94] * 1000, 2),
+            "p99": round(quantiles[98] * 1000, 2),
+        },
+    }
+
+
+async def run(args) -> dict:
+    extractor = FieldExtractor(
+        model_name=args.model,
+        backend=args.backend,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_length=settings.EXTRACTION_MAX_LENGTH,
+        stride=settings.EXTRACTION_STRIDE,
+        min_score=settings.EXTRACTION_MIN_SCORE,
+        threads=args.threads,
+    )
+    rng = random.Random(args.seed)
+    texts = [synthetic_invoice(rng) for _ in range(args.documents)]
+    try:
+        await extractor.start()
+        results = {mode: await run_mode(extractor, mode, texts, args.concurrency) for mode in ("single", "batched")}
+    finally:
+        await extractor.stop()
+
+    single, batched = results["single"]["documents_per_second"], results["batched"]["documents_per_second"]
+    return {
+        "model": args.model,
+        "backend": args.backend,
+        "concurrency": args.concurrency,
+        "max_batch": args.max_batch,
+        "max_wait_ms": args.max_wait_ms,
+        "load_seconds": round(extractor.load_seconds, 3),
+        **results,
+        "throughput_ratio": round(batched / single, 2) if single and batched else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Extraction throughput with and without dynamic batching")
+    parser.add_argument("--model", default=settings.EXTRACTION_MODEL, help="Hugging Face id or local path")
+    parser.add_argument("--backend", choices=BACKENDS, default=settings.EXTRACTION_BACKEND)
+    parser.add_argument("--documents", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=settings.EXTRACTION_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EXTRACTION_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=settings.EXTRACTION_THREADS)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    if not args.model:
+        parser.error("--model is required when EXTRACTION_MODEL is not set")
+
+    report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""Replay a realistic request mix against a seeded dataset.
+
+--concurrency virtual users each sign in once as a borrower (an
+organization admin) and once as an investor from the dataset manifest (see
+benchmarks.dataset). Then each repeatedly picks an operation by --mix weight:
+- login: POST /auth/login as a random dataset user (bcrypt-bound)
+- invoice_list: GET /invoices for the borrower's organization, sometimes
+  filtered by status, sometimes following the previous page's cursor
+- score_lookup: GET /score/{id} for a random organization or customer
+- pledge: POST /tranches/{id}/pledge of 10-100 on a pledgeable tranche,
+  with an Idempotency-Key (409 once a tranche is full counts as rejected,
+  not as an error)
+
+Requests go to app.main:app in process through httpx's ASGI transport.
+The lifespan runs, and the app needs the database and Redis. Rate limiting
+is off unless RATE_LIMIT_ENABLED is set. With --base-url they go to a
+running server instead, which must not rate limit the benchmark client.
+
+Reports requests per second, error counts and latency percentiles per
+operation and overall. The report is saved under benchmarks/results with
+the git commit it ran on. Compare two reports with benchmarks.compare.
+
+Usage (from backend/):
+    python -m benchmarks.load --tag bench7 --concurrency 32 --duration 60
+    python -m benchmarks.load --mix login=0,invoice_list=70,score_lookup=30 --requests 20000
+    python -m benchmarks.load --base-url http://localhost:8000 --concurrency 128
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+API_PREFIX = "/api/v1"
+
+OPERATIONS = ("login", "invoice_list", "score_lookup", "pledge")
+DEFAULT_MIX = "login=5,invoice_list=50,score_lookup=30,pledge=15"
+
+# Answers that are correct under load rather than failures
+EXPECTED_STATUSES = {
+    "login": (200,),
+    "invoice_list": (200,),
+    "score_lookup": (200,),
+    "pledge": (200, 201, 409),
+}
+
+INVOICE_STATUS_FILTERS = ("issued", "payment_pending", "overdue", "paid")
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r} (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def git_revision() -> dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+class Stats:
+    """Latencies and status codes per operation"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {name: [] for name in OPERATIONS}
+        self.statuses: dict[str, dict[str, int]] = {name: {} for name in OPERATIONS}
+        self.recording = False
+
+    def record(self, operation: str, status: str, seconds: float) -> None:
+        if not self.recording:
+            return
+        self.latencies[operation].append(seconds)
+        self.statuses[operation][status] = self.statuses[operation].get(status, 0) + 1
+
+    def summary(self, operation: Optional[str], elapsed: float) -> dict:
+        names = [operation] if operation else OPERATIONS
+        latencies = [value for name in names for value in self.latencies[name]]
+        statuses: dict[str, int] = {}
+        errors = 0
+        for name in names:
+            for status, count in self.statuses[name].items():
+                statuses[status] = statuses.get(status, 0) + count
+                if not status.isdigit() or int(status) not in EXPECTED_STATUSES[name]:
+                    errors += count
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0] if latencies else 0.0] * 99
+        return {
+            "requests": len(latencies),
+            "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+            "latency_ms": {
+                "p50": round(quantiles[49] * 1000, 2),
+                "p95": round(quantiles[94] * 1000, 2),
+                "p99": round(quantiles[98] * 1000, 2),
+                "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+                "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+            },
+        }
+
+
+class VirtualUser:
+    """One client session: a borrower and an investor token and a paging cursor"""
+
+    def __init__(self, client: httpx.AsyncClient, manifest: dict, stats: Stats, rng: random.Random):
+        self.client = client
+        self.manifest = manifest
+        self.stats = stats
+        self.rng = rng
+        ids = manifest["ids"]
+        self.org_index = rng.randrange(ids["organizations"]["count"])
+        self.org_id = ids["organizations"]["first_id"] + self.org_index
+        self.investor_index = rng.randrange(ids["investors"]["count"])
+        self.headers: dict[str, dict] = {}
+        self.cursor: Optional[str] = None
+
+    def _email(self, kind: str, index: int) -> str:
+        return f"{self.manifest['tag']}-{kind}-{index}@{self.manifest['email_domain']}"
+
+    async def _login(self, email: str) -> httpx.Response:
+        return await self.client.post(
+            f"{API_PREFIX}/auth/login", json={"email": email, "password": self.manifest["password"]}
+        )
+
+    async def sign_in(self) -> None:
+        for role, kind, index in (("borrower", "admin", self.org_index), ("investor", "investor", self.investor_index)):
+            response = await self._login(self._email(kind, index))
+            response.raise_for_status()
+            self.headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def _timed(self, operation: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as exc:
+            self.stats.record(operation, type(exc).__name__, time.perf_counter() - started)
+            return None
+        self.stats.record(operation, str(response.status_code), time.perf_counter() - started)
+        return response
+
+    async def login(self) -> None:
+        ids = self.manifest["ids"]
+        kind = self.rng.choice(("admin", "investor"))
+        count = ids["admins" if kind == "admin" else "investors"]["count"]
+        await self._timed("login", self._login(self._email(kind, self.rng.randrange(count))))
+
+    async def invoice_list(self) -> None:
+        params = {"org_id": self.org_id, "limit": 50}
+        if self.cursor and self.rng.random() < 0.3:
+            params["cursor"] = self.cursor
+        elif self.rng.random() < 0.2:
+            params["status"] = self.rng.choice(INVOICE_STATUS_FILTERS)
+        response = await self._timed(
+            "invoice_list", self.client.get(f"{API_PREFIX}/invoices", params=params, headers=self.headers["borrower"])
+        )
+        if response is not None and response.status_code == 200 and "status" not in params:
+            self.cursor = response.json().get("next_cursor")
+
+    async def score_lookup(self) -> None:
+        ids = self.manifest["ids"]
+        if self.rng.random() < 0.7 or not ids["customers"]["count"]:
+            entity_type, entity_id = "organization", ids["organizations"]["first_id"] + self.rng.randrange(ids["organizations"]["count"])
+        else:
+            entity_type, entity_id = "customer", ids["customers"]["first_id"] + self.rng.randrange(ids["customers"]["count"])
+        await self._timed("score_lookup", self.client.get(
+            f"{API_PREFIX}/score/{entity_id}", params={"entity_type": entity_type}, headers=self.headers["investor"]
+        ))
+
+    async def pledge(self) -> None:
+        tranche_id = self.rng.choice(self.manifest["pledgeable_tranches"])
+        amount = Decimal(self.rng.randrange(1000, 10001)) / 100
+        await self._timed("pledge", self.client.post(
+            f"{API_PREFIX}/tranches/{tranche_id}/pledge",
+            json={"amount": str(amount)},
+            headers={**self.headers["investor"], "Idempotency-Key": uuid.uuid4().hex},
+        ))
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"/ready did not return 200 within {timeout:.0f}s")
+        await asyncio.sleep(0.5)
+
+
+async def replay(client: httpx.AsyncClient, manifest: dict, args) -> dict:
+    await wait_until_ready(client, args.ready_timeout)
+    if "pledge" in args.mix and not manifest["pledgeable_tranches"]:
+        raise RuntimeError("The dataset has no pledgeable tranches; drop pledge from --mix")
+
+    stats = Stats()
+    users = [VirtualUser(client, manifest, stats, random.Random(f"{args.seed}-{n}")) for n in range(args.concurrency)]
+    await asyncio.gather(*(user.sign_in() for user in users))
+
+    operations, weights = list(args.mix), list(args.mix.values())
+    remaining = args.requests
+    stop_at = 0.0
+
+    async def run_user(user: VirtualUser) -> None:
+        nonlocal remaining
+        while time.perf_counter() < stop_at:
+            if stats.recording and args.requests:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            await getattr(user, user.rng.choices(operations, weights)[0])()
+
+    if args.warmup:
+        stop_at = time.perf_counter() + args.warmup
+        await asyncio.gather(*(run_user(user) for user in users))
+
+    stats.recording = True
+    started = time.perf_counter()
+    stop_at = started + (args.duration if not args.requests else float("inf"))
+    await asyncio.gather(*(run_user(user) for user in users))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "seconds": round(elapsed, 3),
+        "operations": {name: stats.summary(name, elapsed) for name in OPERATIONS if name in args.mix},
+        "total": stats.summary(None, elapsed),
+    }
+
+
+async def run(manifest: dict, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+            return await replay(client, manifest, args)
+
+    # Settings are read on import: switch rate limiting off first
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            return await replay(client, manifest, args)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a weighted request mix and report latency percentiles")
+    parser.add_argument("--tag", default="bench7", help="Dataset tag (see benchmarks.dataset)")
+    parser.add_argument("--manifest", help=f"Dataset manifest (default: {RESULTS_DIR}/dataset-<tag>.json)")
+    parser.add_argument("--base-url", help="Send requests to a running server instead of app.main:app in process")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to measure")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests instead of --duration")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of unrecorded traffic first")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", help="Free-form note stored with the results")
+    parser.add_argument("--output", help=f"Where to save the report (default: {RESULTS_DIR}/load-<commit>-<time>.json)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Exit 1 above this overall error rate")
+    args = parser.parse_args(argv)
+
+    with open(args.manifest or os.path.join(RESULTS_DIR, f"dataset-{args.tag}.json")) as handle:
+        manifest = json.load(handle)
+
+    started_at = datetime.now(timezone.utc)
+    results = asyncio.run(run(manifest, args))
+    revision = git_revision()
+    report = {
+        "benchmark": "load",
+        "label": args.label,
+        "git": revision,
+        "started_at": started_at.isoformat(),
+        "target": args.base_url or "asgi",
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "dataset": {key: manifest[key] for key in ("tag", "seed", "as_of", "scale", "rows")},
+        "config": {
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration": None if args.requests else args.duration,
+            "requests": args.requests or None,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        **results,
+    }
+
+    path = args.output or os.path.join(
+        RESULTS_DIR, f"load-{(revision['commit'] or 'unknown')[:12]}-{started_at:%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as handle:
+        json.dump(report, handle, indent=2)
+    report["output"] = path
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report["total"]["error_rate"] > args.max_error_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
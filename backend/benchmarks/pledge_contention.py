@@ -0,0 +1,198 @@
+"""Pledge throughput on one contended tranche.
+
+Creates a throwaway tranche, plus the investor, organization, customer and
+invoice rows it needs. Then --concurrency workers pledge --amount each until
+the tranche is full. Reports pledges per second and latency percentiles. It
+also checks that the tranche ended FUNDED exactly at target, with pledges
+summing to target.
+
+Modes:
+- atomic: app.services.pledging.pledge (one conditional UPDATE, autocommit)
+- locked: baseline of SELECT ... FOR UPDATE, check in Python, then UPDATE
+  and INSERT and COMMIT
+
+Usage (from backend/, against a migrated database):
+    python -m benchmarks.pledge_contention --concurrency 50 --pledges 2000
+    python -m benchmarks.pledge_contention --mode locked --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.core.database import async_engine
+from app.db.models import (
+    Customer,
+    Invoice,
+    InvoiceStatus,
+    Organization,
+    Pledge,
+    PledgeStatus,
+    Tranche,
+    TrancheStatus,
+    User,
+    UserRole,
+)
+from app.services.pledging import PLEDGEABLE_STATUSES, PledgeRejectedError, pledge
+
+users = User.__table__
+organizations = Organization.__table__
+customers = Customer.__table__
+invoices = Invoice.__table__
+tranches = Tranche.__table__
+pledges = Pledge.__table__
+
+
+async def create_fixture(target: Decimal) -> dict:
+    """Core inserts only, so ORM hooks (feature store refresh) stay out of it"""
+    suffix = uuid.uuid4().hex[:12]
+    now = datetime.now(timezone.utc)
+    async with async_engine.begin() as conn:
+        investor_id = (await conn.execute(insert(users).values(
+            email=f"bench-{suffix}@example.invalid", hashed_password="!", full_name="Pledge benchmark",
+            role=UserRole.INVESTOR, is_active=True,
+        ).returning(users.c.id))).scalar_one()
+        org_id = (await conn.execute(insert(organizations).values(
+            name=f"Benchmark {suffix}", country="KE", admin_id=investor_id,
+        ).returning(organizations.c.id))).scalar_one()
+        customer_id = (await conn.execute(insert(customers).values(
+            org_id=org_id, name=f"Benchmark customer {suffix}",
+        ).returning(customers.c.id))).scalar_one()
+        invoice_id = (await conn.execute(insert(invoices).values(
+            org_id=org_id, customer_id=customer_id, creator_id=investor_id, invoice_number=f"BENCH-{suffix}",
+            amount=target, total_amount=target, issued_date=now, due_date=now + timedelta(days=30),
+            status=InvoiceStatus.ISSUED,
+        ).returning(invoices.c.id))).scalar_one()
+        tranche_id = (await conn.execute(insert(tranches).values(
+            invoice_id=invoice_id, tranche_number=f"BENCH-{suffix}-T1", share_amount=target, price=target,
+            target_amount=target, pledged_amount=0, status=TrancheStatus.OPEN,
+        ).returning(tranches.c.id))).scalar_one()
+    return {"investor_id": investor_id, "org_id": org_id, "customer_id": customer_id,
+            "invoice_id": invoice_id, "tranche_id": tranche_id}
+
+
+async def drop_fixture(ids: dict) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(pledges).where(pledges.c.tranche_id == ids["tranche_id"]))
+        await conn.execute(delete(tranches).where(tranches.c.id == ids["tranche_id"]))
+        await conn.execute(delete(invoices).where(invoices.c.id == ids["invoice_id"]))
+        await conn.execute(delete(customers).where(customers.c.id == ids["customer_id"]))
+        await conn.execute(delete(organizations).where(organizations.c.id == ids["org_id"]))
+        await conn.execute(delete(users).where(users.c.id == ids["investor_id"]))
+
+
+async def pledge_atomic(tranche_id: int, investor_id: int, amount: Decimal) -> bool:
+    try:
+        await pledge(tranche_id, investor_id, amount)
+    except PledgeRejectedError:
+        return False
+    return True
+
+
+async def pledge_locked(tranche_id: int, investor_id: int, amount: Decimal) -> bool:
+    """Read-check-write under a row lock held for the whole transaction"""
+    async with async_engine.begin() as conn:
+        row = (await conn.execute(
+            select(tranches.c.status, tranches.c.pledged_amount, tranches.c.target_amount)
+            .where(tranches.c.id == tranche_id)
+            .with_for_update()
+        )).one()
+        if row.status not in PLEDGEABLE_STATUSES or row.pledged_amount + amount > row.target_amount:
+            return False
+        pledged = row.pledged_amount + amount
+        await conn.execute(update(tranches).where(tranches.c.id == tranche_id).values(
+            pledged_amount=pledged,
+            status=TrancheStatus.FUNDED if pledged >= row.target_amount else TrancheStatus.FUNDING,
+        ))
+        await conn.execute(insert(pledges).values(
+            tranche_id=tranche_id, investor_id=investor_id, amount=amount, status=PledgeStatus.PLEDGED,
+        ))
+    return True
+
+
+async def run(mode: str, concurrency: int, count: int, amount: Decimal, keep: bool) -> dict:
+    target = amount * count
+    ids = await create_fixture(target)
+    attempt = pledge_atomic if mode == "atomic" else pledge_locked
+    latencies: list[float] = []
+    rejected = 0
+
+    async def worker() -> None:
+        nonlocal rejected
+        while True:
+            started = time.perf_counter()
+            accepted = await attempt(ids["tranche_id"], ids["investor_id"], amount)
+            if not accepted:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        async with async_engine.connect() as conn:
+            tranche = (await conn.execute(
+                select(tranches.c.status, tranches.c.pledged_amount).where(tranches.c.id == ids["tranche_id"])
+            )).one()
+            pledge_total, pledge_count = (await conn.execute(
+                select(func.coalesce(func.sum(pledges.c.amount), 0), func.count())
+                .where(pledges.c.tranche_id == ids["tranche_id"])
+            )).one()
+    finally:
+        if not keep:
+            await drop_fixture(ids)
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "pledges": len(latencies),
+        "rejected_after_full": rejected,
+        "seconds": round(elapsed, 3),
+        "pledges_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(quantiles[49] * 1000, 2),
+            "p95": round(quantiles[94] * 1000, 2),
+            "p99": round(quantiles[98] * 1000, 2),
+        },
+        "checks": {
+            "status_funded": tranche.status == TrancheStatus.FUNDED,
+            "pledged_equals_target": tranche.pledged_amount == target,
+            "pledges_sum_to_target": Decimal(pledge_total) == target and pledge_count == count,
+        },
+        "fixture": ids if keep else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent pledges against a single tranche")
+    parser.add_argument("--mode", choices=("atomic", "locked"), default="atomic")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pledges", type=int, default=2000, help="Pledges needed to fill the tranche")
+    parser.add_argument("--amount", type=Decimal, default=Decimal("10.00"))
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark rows")
+    args = parser.parse_args(argv)
+
+    async def _main() -> dict:
+        try:
+            return await run(args.mode, args.concurrency, args.pledges, args.amount, args.keep)
+        finally:
+            await async_engine.dispose()
+
+    report = asyncio.run(_main())
+    json.dump(report, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if all(report["checks"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
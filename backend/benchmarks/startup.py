@@ -0,0 +1,140 @@
+"""Cold-start benchmark for app.main:app.
+
+Each run uses a fresh interpreter and measures three things:
+- import: time to import app.main
+- startup: time for the lifespan startup to complete
+- first_request: latency of the first GET / and GET /ready, in process via
+  httpx's ASGI transport
+
+Results are printed as JSON (median, min and max per metric), with the peak
+RSS of the process after the first requests.
+
+With --check, the run is a regression gate. It exits 1 when the median
+import + startup time or the peak RSS exceeds its budget, or when any heavy
+ML/OCR library was imported (app.core.features keeps them lazy).
+
+Usage (from backend/):
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --importtime 15   # also list the slowest imports
+    python -m benchmarks.startup --check --max-startup-ms 3000 --max-rss-mb 160
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Must never be imported by an API worker that has not used the feature yet
+HEAVY_MODULES = (
+    "torch", "transformers", "onnxruntime", "prophet", "cmdstanpy", "pandas", "numpy",
+    "lightgbm", "shap", "sklearn", "cv2", "camelot", "pytesseract", "pdf2image", "PIL", "celery",
+)
+
+DEFAULT_MAX_STARTUP_MS = 3000
+DEFAULT_MAX_RSS_MB = 160
+
+CHILD = r"""
+import asyncio, json, resource, sys, time
+t0 = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    import httpx
+    timings = {"import": imported - t0}
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        timings["startup"] = started - imported
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in ("/", "/ready"):
+                t = time.perf_counter()
+                response = await client.get(path)
+                timings[f"first_request {path}"] = time.perf_counter() - t
+                timings[f"status {path}"] = response.status_code
+    # ru_maxrss is in KiB on Linux
+    timings["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    timings["modules"] = sorted({name.split(".")[0] for name in sys.modules})
+    print(json.dumps(timings))
+
+asyncio.run(main())
+"""
+
+
+def _run_once(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _slowest_imports(env: dict, top: int) -> list[dict]:
+    """Cumulative import time per module from ``python -X importtime``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append({"module": module, "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure import and first-request latency of app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Also report the N slowest imports")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a budget is exceeded")
+    parser.add_argument("--max-startup-ms", type=float, default=DEFAULT_MAX_STARTUP_MS,
+                        help="Budget for median import + lifespan startup")
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB,
+                        help="Budget for peak RSS after the first requests")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    runs = [_run_once(env) for _ in range(args.runs)]
+    metrics = [key for key in runs[0] if not key.startswith("status") and key not in ("rss_mb", "modules")]
+    report = {
+        "runs": args.runs,
+        "metrics_ms": {
+            key: {
+                "median": round(statistics.median(run[key] for run in runs) * 1000, 1),
+                "min": round(min(run[key] for run in runs) * 1000, 1),
+                "max": round(max(run[key] for run in runs) * 1000, 1),
+            }
+            for key in metrics
+        },
+        "status": {key: runs[-1][key] for key in runs[-1] if key.startswith("status")},
+        "rss_mb": round(max(run["rss_mb"] for run in runs), 1),
+        "heavy_modules_loaded": sorted({m for run in runs for m in run["modules"]} & set(HEAVY_MODULES)),
+    }
+    if args.importtime:
+        report["slowest_imports"] = _slowest_imports(env, args.importtime)
+
+    if args.check:
+        startup_ms = statistics.median((run["import"] + run["startup"]) * 1000 for run in runs)
+        failures = []
+        if startup_ms > args.max_startup_ms:
+            failures.append(f"import + startup {startup_ms:.0f} ms > {args.max_startup_ms:.0f} ms")
+        if report["rss_mb"] > args.max_rss_mb:
+            failures.append(f"RSS {report['rss_mb']} MB > {args.max_rss_mb:.0f} MB")
+        if report["heavy_modules_loaded"]:
+            failures.append(f"heavy modules imported at startup: {', '.join(report['heavy_modules_loaded'])}")
+        report["budget"] = {
+            "max_startup_ms": args.max_startup_ms,
+            "max_rss_mb": args.max_rss_mb,
+            "startup_ms": round(startup_ms, 1),
+            "failures": failures,
+        }
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if args.check and report["budget"]["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from app.services.invoice_import import InvoiceImporter
+
+
+def _importer():
+    return InvoiceImporter(db=None, org_id=1, creator_id=1)
+
+
+def test_row_mixing_plain_and_offset_dates_validates():
+    record = {
+        "invoice_number": "INV-1",
+        "customer_name": "Acme",
+        "amount": "100.00",
+        "issued_date": "2024-03-01",
+        "due_date": "2024-03-31T12:00:00+03:00",
+    }
+    rows = _importer()._validate([(1, record)])
+
+    assert len(rows) == 1
+    row = rows[0][1]
+    assert row.issued_date == datetime(2024, 3, 1, tzinfo=timezone.utc)
+    assert row.due_date.utcoffset() is not None
+
+
+def test_due_before_issued_across_formats_is_a_row_error():
+    importer = _importer()
+    record = {
+        "invoice_number": "INV-2",
+        "customer_name": "Acme",
+        "amount": "100.00",
+        "issued_date": "2024-03-31T00:00:00",
+        "due_date": "2024-03-01",
+    }
+    rows = importer._validate([(7, record)])
+
+    assert rows == []
+    assert importer.report.invalid == 1